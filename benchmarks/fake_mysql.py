@@ -0,0 +1,371 @@
+import random
+import threading
+import time
+from dataclasses import fields
+from datetime import datetime, timedelta
+
+from dolphie.Modules.MySQL import Database
+from dolphie.Modules.Queries import MySQLQueries
+from pymysql.constants import FIELD_TYPE
+
+# The counters Dolphie graphs or displays, along with roughly how fast they grow per second on a busy host
+STATUS_COUNTER_RATES = {
+    "Queries": 12000,
+    "Com_select": 8000,
+    "Com_insert": 1500,
+    "Com_update": 1200,
+    "Com_delete": 300,
+    "Com_replace": 10,
+    "Com_commit": 2500,
+    "Com_rollback": 5,
+    "Innodb_buffer_pool_read_requests": 900000,
+    "Innodb_buffer_pool_write_requests": 150000,
+    "Innodb_buffer_pool_reads": 120,
+    "Innodb_lsn_current": 8 * 1024 * 1024,
+    "Innodb_os_log_written": 8 * 1024 * 1024,
+    "Table_open_cache_hits": 9000,
+    "Table_open_cache_misses": 3,
+    "Table_open_cache_overflows": 1,
+    "Created_tmp_tables": 400,
+    "Created_tmp_disk_tables": 20,
+    "Created_tmp_files": 1,
+    "Aborted_clients": 1,
+    "Aborted_connects": 1,
+    "Binlog_cache_use": 2500,
+    "Binlog_cache_disk_use": 2,
+    "Opened_tables": 2,
+    "Uptime": 1,
+}
+
+STATUS_GAUGES = {
+    "Threads_cached": 32,
+    "Open_tables": 4000,
+    "Innodb_buffer_pool_bytes_data": 96 * 1024**3,
+    "Innodb_buffer_pool_bytes_dirty": 2 * 1024**3,
+    "Innodb_checkpoint_age": 700 * 1024**2,
+}
+
+GLOBAL_VARIABLES = {
+    "read_only": "OFF",
+    "version_compile_os": "Linux",
+    "version_compile_machine": "x86_64",
+    "innodb_buffer_pool_size": 128 * 1024**3,
+    "innodb_buffer_pool_instances": 16,
+    "innodb_log_file_size": 2 * 1024**3,
+    "innodb_log_files_in_group": 2,
+    "innodb_redo_log_capacity": 4 * 1024**3,
+    "innodb_adaptive_hash_index": "ON",
+    "innodb_thread_concurrency": 0,
+    "binlog_format": "ROW",
+    "binlog_row_image": "FULL",
+    "binlog_transaction_compression": "OFF",
+    "gtid_mode": "ON",
+    "slave_parallel_workers": 4,
+    "performance_schema": "ON",
+    "hostname": "db-primary-01",
+    "version": "8.0.35",
+    "version_comment": "MySQL Community Server - GPL",
+    "basedir": "/usr/",
+    "server_uuid": "3e11fa47-71ca-11e1-9e33-c80aa9429562",
+    "server_id": 1,
+}
+
+INNODB_METRIC_RATES = {
+    "adaptive_hash_searches": 60000,
+    "adaptive_hash_searches_btree": 9000,
+    "trx_rseg_history_len": 0,
+}
+
+USERS = ["app", "app_ro", "reporting", "etl", "orchestrator", "backup"]
+DATABASES = ["orders", "customers", "inventory", "analytics", "billing"]
+STATES = ["executing", "Sending data", "statistics", "updating", "waiting for handler commit", "Sorting result"]
+QUERIES = [
+    "SELECT o.id, o.status, o.total, c.email FROM orders o JOIN customers c ON c.id = o.customer_id "
+    "WHERE o.created_at >= NOW() - INTERVAL 1 DAY AND o.status IN ('pending', 'paid') ORDER BY o.created_at DESC "
+    "LIMIT 100",
+    "UPDATE inventory SET quantity = quantity - 1, updated_at = NOW() WHERE sku = 'SKU-%d' AND quantity > 0",
+    "INSERT INTO billing_events (account_id, event_type, amount, payload) VALUES (%d, 'charge', 19.99, '{}')",
+    "SELECT COUNT(*) FROM analytics.page_views WHERE site_id = %d AND viewed_at BETWEEN '2023-01-01' "
+    "AND '2023-12-31' GROUP BY DATE(viewed_at)",
+    "DELETE FROM sessions WHERE expires_at < NOW() LIMIT 1000",
+    "SELECT * FROM customers WHERE id IN (%s)",
+]
+
+
+def encode(value):
+    # PyMySQL is used with use_unicode=False, so every string comes back as bytes
+    if isinstance(value, str):
+        return value.encode()
+
+    return value
+
+
+class FakeServer:
+    """Produces result sets shaped like the ones Dolphie gets from MySQL 8.0, at a configurable scale.
+
+    Every call to tick() moves time forward by a second: counters grow, query times increase and a slice of
+    the processlist is replaced by new threads so the incremental DataTable updates get exercised. Latency is
+    the number of seconds each query waits for to mimic a host on the other end of a network."""
+
+    def __init__(self, threads=1000, replicas=50, idle_ratio=0.3, churn_ratio=0.1, latency=0, seed=42):
+        self.random = random.Random(seed)
+        self.latency = latency
+        self.thread_count = threads
+        self.replica_count = replicas
+        self.idle_ratio = idle_ratio
+        self.churn_ratio = churn_ratio
+
+        self.now = datetime(2023, 9, 1, 12, 0, 0)
+        self.elapsed = 0
+        self.next_thread_id = 1000
+        self.next_connection_id = 1
+
+        self.status_filler = {f"Status_variable_{i}": i for i in range(400)}
+        self.variable_filler = {f"variable_{i}": f"value_{i}" for i in range(550)}
+        self.innodb_metric_filler = {f"metric_{i}": i for i in range(300)}
+
+        self.status_counters = {name: 10**6 for name in STATUS_COUNTER_RATES}
+        self.innodb_metric_counters = {name: 10**6 for name in INNODB_METRIC_RATES}
+
+        self.threads = [self.create_thread() for _ in range(threads)]
+        self.replicas = [
+            {
+                "id": 10 + i,
+                "user": b"repl",
+                "host": f"replica-{i:02}.db.internal:{40000 + i}".encode(),
+            }
+            for i in range(replicas)
+        ]
+
+    def create_thread(self):
+        thread_id = self.next_thread_id
+        self.next_thread_id += 1
+
+        rnd = self.random
+        idle = rnd.random() < self.idle_ratio
+        in_trx = not idle and rnd.random() < 0.4
+
+        query = ""
+        if not idle:
+            query = rnd.choice(QUERIES)
+            if "(%s)" in query:
+                query = query % ", ".join(str(rnd.randint(1, 10**7)) for _ in range(rnd.randint(5, 200)))
+            elif "%d" in query:
+                query = query % rnd.randint(1, 10**6)
+
+        return {
+            "id": thread_id,
+            "mysql_thread_id": str(thread_id + 50),
+            "user": rnd.choice(USERS),
+            "host": f"app-{rnd.randint(1, 80):02}.internal:{rnd.randint(30000, 60000)}",
+            "db": rnd.choice(DATABASES),
+            "command": "Sleep" if idle else "Query",
+            "time": rnd.randint(0, 30) if not idle else rnd.randint(0, 3600),
+            "query": query,
+            "state": "" if idle else rnd.choice(STATES),
+            "trx_query": query if in_trx else "",
+            "trx_state": "RUNNING" if in_trx else "",
+            "trx_operation_state": "fetching rows" if in_trx else "",
+            "trx_rows_locked": str(rnd.randint(0, 5000)) if in_trx else "0",
+            "trx_rows_modified": str(rnd.randint(0, 500)) if in_trx else "0",
+            "trx_concurrency_tickets": "0" if in_trx else "",
+        }
+
+    def tick(self, seconds=1):
+        self.elapsed += seconds
+        self.now += timedelta(seconds=seconds)
+
+        # Counters grow at their rate give or take 20% so per second values aren't flat lines
+        for counters, rates in (
+            (self.status_counters, STATUS_COUNTER_RATES),
+            (self.innodb_metric_counters, INNODB_METRIC_RATES),
+        ):
+            for name, rate in rates.items():
+                counters[name] += int(rate * seconds * self.random.uniform(0.8, 1.2))
+
+        for thread in self.threads:
+            thread["time"] += seconds
+
+        replace = int(len(self.threads) * self.churn_ratio)
+        for _ in range(replace):
+            self.threads[self.random.randrange(len(self.threads))] = self.create_thread()
+
+    def global_status(self):
+        status = dict(self.status_filler)
+        status.update(self.status_counters)
+        status.update(STATUS_GAUGES)
+
+        active = sum(1 for thread in self.threads if thread["command"] != "Sleep")
+        status["Threads_connected"] = len(self.threads)
+        status["Threads_running"] = active
+        status["Uptime"] = 86400 + self.elapsed
+
+        return [{"Variable_name": encode(name), "Value": encode(str(value))} for name, value in status.items()]
+
+    def global_variables(self):
+        variables = dict(self.variable_filler)
+        variables.update(GLOBAL_VARIABLES)
+
+        return [{"Variable_name": encode(name), "Value": encode(str(value))} for name, value in variables.items()]
+
+    def innodb_metrics(self):
+        metrics = dict(self.innodb_metric_filler)
+        metrics.update(self.innodb_metric_counters)
+        metrics["trx_rseg_history_len"] = 1500 + self.random.randint(0, 200)
+
+        return [{"NAME": encode(name), "COUNT": value} for name, value in metrics.items()]
+
+    def processlist(self, performance_schema=True):
+        rows = []
+        for thread in self.threads:
+            row = {field: encode(value) for field, value in thread.items()}
+            row["time"] = encode(str(thread["time"]))
+            if not performance_schema:
+                del row["mysql_thread_id"]
+
+            rows.append(row)
+
+        return rows
+
+    def binlog_status(self):
+        return [
+            {
+                "File": b"mysql-bin.001234",
+                "Position": self.status_counters["Innodb_os_log_written"] // 4,
+                "Binlog_Do_DB": b"",
+                "Binlog_Ignore_DB": b"",
+                "Executed_Gtid_Set": b"3E11FA47-71CA-11E1-9E33-C80AA9429562:1-%d" % (10**6 + self.elapsed * 2500),
+            }
+        ]
+
+    def execute(self, query):
+        # Map the query back to the MySQLQueries field it came from. Queries with a $placeholder have had it
+        # replaced so they're matched by everything before it
+        query = query.replace("/* dolphie */ ", "", 1).strip()
+
+        for name, text in QUERY_PREFIXES:
+            if query.startswith(text):
+                break
+        else:
+            return []
+
+        if name in ("status", "variables", "server_capabilities"):
+            rows = self.global_status() if name == "status" else self.global_variables()
+
+            # SHOW GLOBAL ... WHERE Variable_name IN (...)
+            if name == "server_capabilities":
+                rows = [row for row in rows if f"'{row['Variable_name'].decode()}'" in query]
+
+            return rows
+        elif name == "innodb_metrics":
+            return self.innodb_metrics()
+        elif name in ("ps_query", "pl_query"):
+            return self.processlist(performance_schema=name == "ps_query")
+        elif name in ("ps_find_replicas", "pl_find_replicas"):
+            return self.replicas
+        elif name in ("binlog_status", "binary_log_status"):
+            return self.binlog_status()
+        elif name == "checkpoint_age":
+            return [{"checkpoint_age": STATUS_GAUGES["Innodb_checkpoint_age"]}]
+        elif name == "active_redo_logs":
+            return [{"count": 4}]
+
+        return []
+
+
+QUERY_PREFIXES = sorted(
+    (
+        (query_field.name, getattr(MySQLQueries, query_field.name).split("$placeholder")[0].strip())
+        for query_field in fields(MySQLQueries)
+    ),
+    key=lambda item: len(item[1]),
+    reverse=True,
+)
+
+
+class FakeConnection:
+    open = True
+
+    def close(self):
+        pass
+
+    def ping(self, reconnect=False):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, server: FakeServer):
+        self.server = server
+        self.rows = []
+
+    def execute(self, query, values=None):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        self.rows = self.server.execute(query)
+
+        return len(self.rows)
+
+    def fetchall(self):
+        rows = self.rows
+        self.rows = []
+
+        return rows
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+
+class FakeTupleCursor(FakeCursor):
+    """The server's rows as tuples with a description, like PyMySQL's default cursor"""
+
+    def __init__(self, server: FakeServer):
+        super().__init__(server)
+        self.description = None
+
+    def execute(self, query, values=None):
+        row_count = super().execute(query, values)
+
+        self.description = None
+        if self.rows:
+            self.description = tuple(
+                (
+                    name,
+                    FIELD_TYPE.VAR_STRING if isinstance(value, bytes) else FIELD_TYPE.LONGLONG,
+                    None,
+                    None,
+                    None,
+                    None,
+                    True,
+                )
+                for name, value in self.rows[0].items()
+            )
+            self.rows = [tuple(row.values()) for row in self.rows]
+
+        return row_count
+
+
+class FakeDatabase(Database):
+    """A Database that never connects anywhere. Only the cursor is replaced so everything else (execute,
+    process_row, fetch_data, ...) is the real code being measured."""
+
+    def __init__(self, server: FakeServer):
+        # Connecting costs a TCP handshake plus the authentication exchange
+        if server.latency:
+            time.sleep(server.latency * 3)
+
+        self.host = "fake"
+        self.user = "dolphie"
+        self.password = ""
+        self.socket = None
+        self.port = 3306
+        self.ssl = {}
+
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.connection = FakeConnection()
+        self.server_version = GLOBAL_VARIABLES["version"]
+        self.connection_id = server.next_connection_id
+        server.next_connection_id += 1
+        self.cursor = FakeCursor(server)
+        self.tuple_cursor = FakeTupleCursor(server)
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+
+# Benchmarks for Dolphie's collection and rendering hot paths against a fake MySQL server.
+#
+#   python -m benchmarks.run --threads 100,1000,20000 --replicas 50
+#   python -m benchmarks.run --save baseline.json
+#   python -m benchmarks.run --compare baseline.json
+
+import asyncio
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from datetime import datetime, timedelta
+
+import dolphie
+from benchmarks.fake_mysql import FakeDatabase, FakeServer
+from dolphie import Dolphie
+from dolphie.app import DolphieApp
+from dolphie.Modules.CollectionPlan import CollectionPlan
+from dolphie.Modules.MetricManager import Graph, MetricManager
+from dolphie.Modules.Queries import MySQLQueries
+from dolphie.Panels import dashboard_panel, processlist_panel
+from rich.console import Console
+from rich.table import Table
+from textual.app import App, ComposeResult
+from textual.widgets import DataTable
+
+
+class BenchmarkApp(App):
+    def compose(self) -> ComposeResult:
+        yield DataTable(id="panel_processlist")
+        yield Graph(id="graph")
+
+
+class Benchmark:
+    def __init__(self, threads, replicas, iterations, history, latency):
+        self.threads = threads
+        self.replicas = replicas
+        self.iterations = iterations
+        self.history = history
+        self.latency = latency
+        self.results = []
+
+        self.server = FakeServer(threads=threads, replicas=replicas)
+        self.db = FakeDatabase(self.server)
+
+        dolphie = Dolphie()
+        dolphie.main_db_connection = self.db
+        dolphie.secondary_db_connection = self.db
+        dolphie.main_db_connection_id = 1
+        dolphie.secondary_db_connection_id = 2
+        dolphie.use_performance_schema = True
+        dolphie.performance_schema_enabled = True
+        dolphie.show_idle_threads = True
+        capabilities = dolphie.probe_server_capabilities(self.db)
+        dolphie.mysql_version = capabilities.mysql_version
+        dolphie.host_distro = capabilities.host_distro
+        dolphie.collection_plan = CollectionPlan.build(capabilities, None, dolphie.command_max_execution_time)
+        dolphie.display_dashboard_panel = True
+        dolphie.display_processlist_panel = True
+        self.dolphie = dolphie
+
+    def add_result(self, name, timings, units=1, unit="op", alloc_kib=0, peak_kib=0):
+        mean = statistics.mean(timings)
+        self.results.append(
+            {
+                "name": name,
+                "threads": self.threads,
+                "mean_ms": mean * 1000,
+                "p95_ms": sorted(timings)[max(int(len(timings) * 0.95) - 1, 0)] * 1000,
+                "throughput": units / mean if mean else 0,
+                "unit": unit,
+                "alloc_kib": alloc_kib,
+                "peak_kib": peak_kib,
+            }
+        )
+
+    def measure(self, name, func, setup=None, units=1, unit="op"):
+        # Timing and allocations are measured in separate passes since tracemalloc slows everything down a lot
+        if setup:
+            setup()
+        func()
+
+        timings = []
+        for _ in range(self.iterations):
+            if setup:
+                setup()
+
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        if setup:
+            setup()
+
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        func()
+        after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.add_result(name, timings, units, unit, (after - before) / 1024, (peak - before) / 1024)
+
+    def tick(self):
+        self.server.tick()
+
+        dolphie = self.dolphie
+        dolphie.worker_start_time = dolphie.worker_previous_start_time + timedelta(seconds=1)
+        dolphie.worker_job_time = 1
+        dolphie.worker_previous_start_time = dolphie.worker_start_time
+
+    def collect(self):
+        dolphie = self.dolphie
+
+        if dolphie.metric_manager.worker_start_time:
+            dolphie.metric_manager.update_metrics_with_last_value()
+
+        dolphie.global_variables = self.db.fetch_data("variables")
+        dolphie.global_status = self.db.fetch_data("status")
+        dolphie.innodb_metrics = self.db.fetch_data("innodb_metrics")
+        dolphie.replica_data = self.db.fetch_data("find_replicas", dolphie.use_performance_schema)
+        dolphie.binlog_status = self.db.fetch_data("binlog_status")
+        dolphie.massage_metrics_data()
+
+    def refresh_metrics(self):
+        dolphie = self.dolphie
+
+        dolphie.metric_manager.refresh_data(
+            worker_start_time=dolphie.worker_start_time,
+            worker_job_time=dolphie.worker_job_time,
+            global_variables=dolphie.global_variables,
+            global_status=dolphie.global_status,
+            innodb_metrics=dolphie.innodb_metrics,
+            innodb_status={},
+            replication_status=dolphie.replication_status,
+            replication_lag=dolphie.replica_lag,
+        )
+
+    def run_collection(self):
+        dolphie = self.dolphie
+        db = self.db
+
+        # Fetching rows is measured on its own against the processlist since it's the biggest result set
+        self.measure(
+            "Database.fetch_rows (processlist)",
+            lambda: db.fetch_rows(MySQLQueries.ps_query),
+            units=self.threads,
+            unit="row",
+        )
+
+        self.measure("Database.fetch_data (status/variables/metrics)", self.collect, setup=self.tick)
+
+        self.measure(
+            "processlist_panel.fetch_data",
+            lambda: processlist_panel.fetch_data(dolphie),
+            setup=self.tick,
+            units=self.threads,
+            unit="thread",
+        )
+
+        def setup_refresh_data():
+            self.tick()
+            self.collect()
+
+        self.measure("MetricManager.refresh_data", self.refresh_metrics, setup=setup_refresh_data)
+
+    def run_rendering(self, app: BenchmarkApp):
+        dolphie = self.dolphie
+        dolphie.app = app
+
+        # Fill the graphs with history so rendering is measured at a realistic size
+        dolphie.metric_manager = MetricManager()
+        for _ in range(self.history):
+            self.tick()
+            self.collect()
+            self.refresh_metrics()
+
+        def setup_processlist():
+            self.tick()
+            dolphie.processlist_threads, dolphie.processlist_groups = processlist_panel.fetch_data(dolphie)
+
+        self.measure(
+            "processlist_panel.create_panel",
+            lambda: processlist_panel.create_panel(dolphie),
+            setup=setup_processlist,
+            units=self.threads,
+            unit="thread",
+        )
+
+        graph = app.query_one("#graph", Graph)
+        self.measure(
+            f"Graph.render_graph (dml, {self.history} points)",
+            lambda: graph.render_graph(dolphie.metric_manager.metrics.dml),
+        )
+
+        def setup_dashboard():
+            self.tick()
+            self.collect()
+            self.refresh_metrics()
+
+        self.measure("dashboard_panel.create_panel", lambda: dashboard_panel.create_panel(dolphie), setup_dashboard)
+
+        console = Console(file=io.StringIO(), width=app.size.width, color_system="truecolor")
+        self.measure(
+            "dashboard_panel (create + render)",
+            lambda: console.print(dashboard_panel.create_panel(dolphie)),
+            setup_dashboard,
+        )
+
+    async def run_startup(self):
+        # Time to first frame: from Dolphie being created to the loading screen being replaced by the first
+        # refresh of data, with every query paying the fake server's latency like it would over a network
+        server = FakeServer(threads=self.threads, replicas=self.replicas, latency=self.latency)
+        connect = dolphie.Database
+        dolphie.Database = lambda *args: FakeDatabase(server)
+
+        timings = []
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                for _ in range(min(self.iterations, 5)):
+                    instance = Dolphie()
+                    instance.update_check = False
+                    instance.host_cache_file = os.path.join(temp_dir, "host_cache")
+                    instance.quick_switch_hosts_file = os.path.join(temp_dir, "quick_switch_hosts")
+
+                    app = DolphieApp(instance)
+                    async with app.run_test(size=(200, 50)) as pilot:
+                        while instance.time_to_first_frame is None:
+                            await pilot.pause(0.01)
+
+                    timings.append(instance.time_to_first_frame)
+        finally:
+            dolphie.Database = connect
+
+        self.add_result(f"Startup to first frame ({self.latency * 1000:g} ms latency)", timings)
+
+    async def run(self):
+        self.dolphie.worker_previous_start_time = datetime(2023, 9, 1, 12, 0, 0)
+        self.tick()
+        self.collect()
+        self.refresh_metrics()
+
+        self.run_collection()
+
+        app = BenchmarkApp()
+        async with app.run_test(size=(200, 50)) as pilot:
+            await pilot.pause()
+            self.run_rendering(app)
+
+        await self.run_startup()
+
+        return self.results
+
+
+def print_results(console: Console, results, baseline=None, threshold=10):
+    table = Table(title="Dolphie benchmarks", header_style="bold #c5c7d2", style="#52608d")
+    table.add_column("Benchmark")
+    table.add_column("Threads", justify="right")
+    table.add_column("Mean", justify="right")
+    table.add_column("p95", justify="right")
+    table.add_column("Throughput", justify="right")
+    table.add_column("Alloc", justify="right")
+    table.add_column("Peak", justify="right")
+    if baseline:
+        table.add_column("vs baseline", justify="right")
+
+    baseline_results = {(result["name"], result["threads"]): result for result in baseline or []}
+
+    regressions = 0
+    for result in results:
+        row = [
+            result["name"],
+            f"{result['threads']:,}",
+            f"{result['mean_ms']:.2f} ms",
+            f"{result['p95_ms']:.2f} ms",
+            f"{result['throughput']:,.0f} {result['unit']}/s",
+            f"{result['alloc_kib']:,.1f} KiB",
+            f"{result['peak_kib']:,.1f} KiB",
+        ]
+
+        if baseline:
+            previous = baseline_results.get((result["name"], result["threads"]))
+            if previous and previous["mean_ms"]:
+                change = (result["mean_ms"] - previous["mean_ms"]) / previous["mean_ms"] * 100
+                if change >= threshold:
+                    regressions += 1
+                    row.append(f"[#fc7979]+{change:.1f}%")
+                elif change <= -threshold:
+                    row.append(f"[#54efae]{change:.1f}%")
+                else:
+                    row.append(f"{change:+.1f}%")
+            else:
+                row.append("[#969aad]new")
+
+        table.add_row(*row)
+
+    console.print(table)
+
+    return regressions
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark Dolphie's collection and rendering hot paths")
+    parser.add_argument(
+        "--threads",
+        type=str,
+        default="100,1000,20000",
+        help="Comma separated list of processlist sizes to benchmark (default: %(default)s)",
+    )
+    parser.add_argument("--replicas", type=int, default=50, help="Number of replicas (default: %(default)s)")
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=None,
+        help="Timed iterations per benchmark (default: scaled down as the thread count goes up)",
+    )
+    parser.add_argument(
+        "--history", type=int, default=600, help="Seconds of graph history to render (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=2,
+        help="Milliseconds each query to the fake server takes when benchmarking startup (default: %(default)s)",
+    )
+    parser.add_argument("--save", type=str, help="Save the results as JSON to compare against later")
+    parser.add_argument("--compare", type=str, help="Compare the results against a file from --save")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="Percentage slower than the baseline that counts as a regression (default: %(default)s)",
+    )
+    args = parser.parse_args()
+
+    console = Console()
+
+    results = []
+    for threads in [int(value) for value in args.threads.split(",")]:
+        iterations = args.iterations or max(5, min(50, 100000 // threads))
+
+        with console.status(f"Benchmarking with {threads:,} threads ({iterations} iterations)"):
+            benchmark = Benchmark(threads, args.replicas, iterations, args.history, args.latency / 1000)
+            results.extend(asyncio.run(benchmark.run()))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    regressions = print_results(console, results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if regressions:
+        console.print(f"[#fc7979]{regressions} benchmark(s) regressed by {args.threshold}% or more")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from dolphie.Modules.MySQL import ServerCapabilities
+from dolphie.Modules.Queries import MySQLQueries
+from packaging.version import parse as parse_version
+
+LOCK_WAITS_UNAVAILABLE = "[indian_red]Lock waits need performance_schema on MySQL 8"
+
+
+@lru_cache(maxsize=None)
+def is_version_at_least(version: str, target: str) -> bool:
+    return parse_version(version) >= parse_version(target)
+
+
+@lru_cache(maxsize=None)
+def legacy_replication_column(column: str) -> str:
+    # SHOW REPLICA STATUS renamed Master/Slave to Source/Replica. Dolphie reads the old names everywhere so the
+    # new ones are mapped back to them. Replicate_* columns kept their names, hence the underscore
+    return re.sub(r"\bReplica_", "Slave_", column.replace("Source", "Master"))
+
+
+@dataclass(frozen=True)
+class CollectionPlan:
+    """What the worker collects from a host and how, decided once per connection from its capabilities so the
+    refresh loop doesn't have to work it out again every tick"""
+
+    binlog_status_query: str
+    replication_status_query: str
+    legacy_replication_columns: bool
+    replica_lag_query: str
+    replica_lag_source: str
+    replication_applier_status: bool
+    parallel_workers_variable: str
+    lock_waits_query: str
+    checkpoint_age: bool
+    active_redo_logs: bool
+    command_max_execution_time_query: str
+
+    @classmethod
+    def build(cls, capabilities: ServerCapabilities, heartbeat_table: str, command_max_execution_time: int):
+        version = capabilities.mysql_version
+        mariadb = "MariaDB" in capabilities.host_distro
+        mysql_8 = not mariadb and is_version_at_least(version, "8.0")
+
+        # MySQL 8.4 removed SHOW MASTER/SLAVE STATUS
+        binlog_status_query = MySQLQueries.binlog_status
+        if mysql_8 and is_version_at_least(version, "8.2"):
+            binlog_status_query = MySQLQueries.binary_log_status
+
+        replication_status_query = MySQLQueries.replication_status
+        legacy_replication_columns = mysql_8 and is_version_at_least(version, "8.0.22")
+        if legacy_replication_columns:
+            replication_status_query = MySQLQueries.replica_status
+
+        if heartbeat_table:
+            replica_lag_query = MySQLQueries.heartbeat_replica_lag
+            replica_lag_source = "HB"
+        elif mysql_8 and capabilities.performance_schema:
+            replica_lag_query = MySQLQueries.ps_replica_lag
+            replica_lag_source = "PS"
+        else:
+            replica_lag_query = replication_status_query
+            replica_lag_source = None
+
+        parallel_workers_variable = "slave_parallel_workers"
+        if mysql_8 and is_version_at_least(version, "8.0.26"):
+            parallel_workers_variable = "replica_parallel_workers"
+
+        # MySQL 8 removed the information_schema lock tables, so without performance_schema there's nothing to use
+        lock_waits_query = MySQLQueries.innodb_lock_waits
+        if mysql_8:
+            lock_waits_query = MySQLQueries.ps_lock_waits if capabilities.performance_schema else None
+
+        # Commands run on the secondary connection so cap how long their queries can run for. MySQL only applies
+        # this to SELECT statements, anything else can still be stopped by cancelling the command
+        command_max_execution_time_query = None
+        if mariadb:
+            if is_version_at_least(version, "10.1"):
+                command_max_execution_time_query = f"SET SESSION max_statement_time = {command_max_execution_time}"
+        elif is_version_at_least(version, "5.7.8"):
+            command_max_execution_time_query = f"SET SESSION max_execution_time = {command_max_execution_time * 1000}"
+
+        return cls(
+            binlog_status_query=binlog_status_query,
+            replication_status_query=replication_status_query,
+            legacy_replication_columns=legacy_replication_columns,
+            replica_lag_query=replica_lag_query,
+            replica_lag_source=replica_lag_source,
+            replication_applier_status=mysql_8,
+            parallel_workers_variable=parallel_workers_variable,
+            lock_waits_query=lock_waits_query,
+            checkpoint_age=mysql_8,
+            active_redo_logs=mysql_8 and is_version_at_least(version, "8.0.30"),
+            command_max_execution_time_query=command_max_execution_time_query,
+        )
+
+    def map_replication_status(self, row: dict) -> dict:
+        if not row or not self.legacy_replication_columns:
+            return row
+
+        return {legacy_replication_column(column): value for column, value in row.items()}
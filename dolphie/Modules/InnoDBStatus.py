@@ -0,0 +1,222 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict
+
+# Section headers in SHOW ENGINE INNODB STATUS are a title sandwiched between two lines of dashes
+SECTION_HEADER = re.compile(r"^-{3,}\n([A-Z][A-Z0-9 /'_()-]*)\n-{3,}$", flags=re.M)
+LOG_SEQUENCE_NUMBER = re.compile(r"Log sequence number\s+(\d+)")
+
+
+def search_int(pattern, text, default=0):
+    match = re.search(pattern, text)
+
+    return int(match.group(1)) if match else default
+
+
+def sum_ints(pattern, text):
+    return sum(int(value) for value in re.findall(pattern, text))
+
+
+def search_pending_aio(operation, text):
+    # Formats vary by version: "reads: [0, 0, 0, 0]" or "reads: 2 [1, 1, 0, 0]"
+    match = re.search(r"aio %s:\s*(\d+)?\s*(?:\[([\d, ]*)\])?" % operation, text)
+    if not match:
+        return 0
+
+    if match.group(1):
+        return int(match.group(1))
+
+    return sum(int(value) for value in match.group(2).split(",") if value.strip()) if match.group(2) else 0
+
+
+@dataclass
+class SemaphoresSection:
+    reservation_count: int = 0
+    signal_count: int = 0
+    os_waits: int = 0
+    spin_waits: int = 0
+
+
+@dataclass
+class TransactionsSection:
+    trx_id_counter: int = 0
+    history_list_length: int = 0
+    active_transactions: int = 0
+
+
+@dataclass
+class FileIOSection:
+    pending_reads: int = 0
+    pending_writes: int = 0
+    pending_log_fsyncs: int = 0
+    pending_buffer_pool_fsyncs: int = 0
+    os_file_reads: int = 0
+    os_file_writes: int = 0
+    os_fsyncs: int = 0
+
+
+@dataclass
+class InsertBufferSection:
+    size: int = 0
+    free_list_length: int = 0
+    merges: int = 0
+    hash_table_size: int = 0
+
+
+@dataclass
+class LogSection:
+    log_sequence_number: int = 0
+    log_flushed_up_to: int = 0
+    last_checkpoint: int = 0
+    checkpoint_age: int = 0
+    pending_log_flushes: int = 0
+    log_ios: int = 0
+
+
+@dataclass
+class BufferPoolSection:
+    pool_size: int = 0
+    free_buffers: int = 0
+    database_pages: int = 0
+    modified_pages: int = 0
+    pending_reads: int = 0
+    pages_read: int = 0
+    pages_created: int = 0
+    pages_written: int = 0
+
+
+@dataclass
+class RowOperationsSection:
+    queries_inside: int = 0
+    queries_in_queue: int = 0
+    read_views: int = 0
+    rows_inserted: int = 0
+    rows_updated: int = 0
+    rows_deleted: int = 0
+    rows_read: int = 0
+
+
+@dataclass
+class InnoDBStatusData:
+    raw: str
+    log_sequence_number: int = None
+    sections: Dict[str, str] = field(default_factory=dict)
+    semaphores: SemaphoresSection = field(default_factory=SemaphoresSection)
+    transactions: TransactionsSection = field(default_factory=TransactionsSection)
+    file_io: FileIOSection = field(default_factory=FileIOSection)
+    insert_buffer: InsertBufferSection = field(default_factory=InsertBufferSection)
+    log: LogSection = field(default_factory=LogSection)
+    buffer_pool: BufferPoolSection = field(default_factory=BufferPoolSection)
+    row_operations: RowOperationsSection = field(default_factory=RowOperationsSection)
+
+    @property
+    def latest_deadlock(self):
+        return self.sections.get("LATEST DETECTED DEADLOCK")
+
+    @property
+    def metrics(self) -> Dict[str, int]:
+        # These are the values MetricManager tracks from this output (see InnoDBActivityMetrics)
+        return {
+            "pending_reads": self.buffer_pool.pending_reads,
+            "log_flushes": self.log.log_ios,
+            "os_waits": self.semaphores.os_waits,
+        }
+
+
+class InnoDBStatus:
+    def __init__(self):
+        # The parsed output is cached by log sequence number so opening it repeatedly while the
+        # server is idle (or before InnoDB refreshes its output) doesn't re-parse anything
+        self.cache: InnoDBStatusData = None
+
+    def parse(self, raw: str) -> InnoDBStatusData:
+        if not raw:
+            return InnoDBStatusData(raw="")
+
+        match = LOG_SEQUENCE_NUMBER.search(raw)
+        log_sequence_number = int(match.group(1)) if match else None
+
+        cache = self.cache
+        if cache and log_sequence_number is not None and cache.log_sequence_number == log_sequence_number:
+            return cache
+
+        data = InnoDBStatusData(raw=raw, log_sequence_number=log_sequence_number)
+
+        # Split the output once into [preamble, title, body, title, body, ...]
+        parts = SECTION_HEADER.split(raw)
+        for i in range(1, len(parts) - 1, 2):
+            data.sections[parts[i].strip()] = parts[i + 1].strip("\n")
+
+        sections = data.sections
+
+        text = sections.get("SEMAPHORES", "")
+        data.semaphores = SemaphoresSection(
+            reservation_count=search_int(r"reservation count (\d+)", text),
+            signal_count=search_int(r"signal count (\d+)", text),
+            os_waits=sum_ints(r"OS waits (\d+)", text),
+            spin_waits=sum_ints(r"spin waits (\d+)", text),
+        )
+
+        text = sections.get("TRANSACTIONS", "")
+        data.transactions = TransactionsSection(
+            trx_id_counter=search_int(r"Trx id counter (\d+)", text),
+            history_list_length=search_int(r"History list length (\d+)", text),
+            active_transactions=len(re.findall(r"^---TRANSACTION \d+, ACTIVE", text, flags=re.M)),
+        )
+
+        text = sections.get("FILE I/O", "")
+        data.file_io = FileIOSection(
+            pending_reads=search_pending_aio("reads", text),
+            pending_writes=search_pending_aio("writes", text),
+            pending_log_fsyncs=search_int(r"Pending flushes \(fsync\) log: (\d+)", text),
+            pending_buffer_pool_fsyncs=search_int(r"buffer pool: (\d+)", text),
+            os_file_reads=search_int(r"(\d+) OS file reads", text),
+            os_file_writes=search_int(r"(\d+) OS file writes", text),
+            os_fsyncs=search_int(r"(\d+) OS fsyncs", text),
+        )
+
+        text = sections.get("INSERT BUFFER AND ADAPTIVE HASH INDEX", "")
+        data.insert_buffer = InsertBufferSection(
+            size=search_int(r"Ibuf: size (\d+)", text),
+            free_list_length=search_int(r"free list len (\d+)", text),
+            merges=search_int(r"(\d+) merges", text),
+            hash_table_size=search_int(r"Hash table size (\d+)", text),
+        )
+
+        text = sections.get("LOG", "")
+        last_checkpoint = search_int(r"Last checkpoint at\s+(\d+)", text)
+        data.log = LogSection(
+            log_sequence_number=log_sequence_number or 0,
+            log_flushed_up_to=search_int(r"Log flushed up to\s+(\d+)", text),
+            last_checkpoint=last_checkpoint,
+            checkpoint_age=max((log_sequence_number or 0) - last_checkpoint, 0),
+            pending_log_flushes=search_int(r"(\d+) pending log flushes", text),
+            log_ios=search_int(r"(\d+) log i/o's done", text),
+        )
+
+        text = sections.get("BUFFER POOL AND MEMORY", "")
+        data.buffer_pool = BufferPoolSection(
+            pool_size=search_int(r"Buffer pool size\s+(\d+)", text),
+            free_buffers=search_int(r"Free buffers\s+(\d+)", text),
+            database_pages=search_int(r"Database pages\s+(\d+)", text),
+            modified_pages=search_int(r"Modified db pages\s+(\d+)", text),
+            pending_reads=search_int(r"Pending reads\s+(\d+)", text),
+            pages_read=search_int(r"Pages read (\d+)", text),
+            pages_created=search_int(r"created (\d+)", text),
+            pages_written=search_int(r"written (\d+)", text),
+        )
+
+        text = sections.get("ROW OPERATIONS", "")
+        data.row_operations = RowOperationsSection(
+            queries_inside=search_int(r"(\d+) queries inside InnoDB", text),
+            queries_in_queue=search_int(r"(\d+) queries in queue", text),
+            read_views=search_int(r"(\d+) read views open", text),
+            rows_inserted=search_int(r"Number of rows inserted (\d+)", text),
+            rows_updated=search_int(r"Number of rows inserted \d+, updated (\d+)", text),
+            rows_deleted=search_int(r"Number of rows inserted \d+, updated \d+, deleted (\d+)", text),
+            rows_read=search_int(r"Number of rows inserted \d+, updated \d+, deleted \d+, read (\d+)", text),
+        )
+
+        self.cache = data
+
+        return data
@@ -0,0 +1,195 @@
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from typing import List, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock, so nothing stops two Dolphies from sharing a file there
+    fcntl = None
+
+# magic, format version, capacity, width, length of the column names, head, length
+HEADER = struct.Struct("=8sIIIIQQ")
+HEADER_MAGIC = b"DOLPHIEM"
+HEADER_VERSION = 1
+
+# Where head and length are in the header since they're rewritten on every append
+POSITION = struct.Struct("=QQ")
+POSITION_OFFSET = HEADER.size - POSITION.size
+
+TIMESTAMP = struct.Struct("=d")
+
+NAN = float("nan")
+
+
+class MetricHistory:
+    """A host's metric history saved to disk so graphs survive restarts and reconnects.
+
+    The file is a fixed number of fixed size records (a timestamp followed by one double per column) used as a ring
+    buffer, so it never grows past the size it was created with. The column names are stored in the header and if
+    they or the capacity change, the file is compacted into the new layout keeping only what's within retention"""
+
+    def __init__(self, path: str, columns: List[str], capacity: int, retention: int):
+        self.path = path
+        self.columns = list(columns)
+        self.width = len(self.columns)
+        self.capacity = capacity
+        self.retention = retention
+
+        self.record_size = TIMESTAMP.size + self.width * 8
+        self.names = json.dumps(self.columns).encode()
+        self.data_offset = self.align(HEADER.size + len(self.names))
+
+        self.head = 0
+        self.length = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.file = open(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b")
+        try:
+            self.lock()
+        except OSError:
+            self.file.close()
+            raise
+
+        self.mmap = None
+        self.open()
+
+    def lock(self):
+        # Two Dolphies writing to the same ring would corrupt it
+        if fcntl:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    @staticmethod
+    def align(size: int) -> int:
+        return (size + 7) & ~7
+
+    def open(self):
+        records = []
+
+        # Only the header is read to check the layout. The records are only needed when it has to be compacted
+        file_size = os.fstat(self.file.fileno()).st_size
+        if file_size:
+            header = self.read_header(file_size)
+            if header and header[1:] == (self.capacity, self.columns) and header[0][2] == self.data_offset:
+                self.map()
+                self.head, self.length, _ = header[0]
+                return
+
+            if header:
+                existing = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    records = self.read_records(existing, *header)
+                finally:
+                    existing.close()
+
+        self.create(records)
+
+    def read_header(self, file_size: int):
+        self.file.seek(0)
+        data = self.file.read(HEADER.size)
+        if len(data) < HEADER.size:
+            return None
+
+        magic, version, capacity, width, names_length, head, length = HEADER.unpack(data)
+        if magic != HEADER_MAGIC or version != HEADER_VERSION:
+            return None
+
+        try:
+            columns = json.loads(self.file.read(names_length))
+        except ValueError:
+            return None
+
+        data_offset = self.align(HEADER.size + names_length)
+        if len(columns) != width or file_size < data_offset + capacity * (TIMESTAMP.size + width * 8):
+            return None
+
+        return (head, length, data_offset), capacity, columns
+
+    def read_records(self, data: mmap.mmap, position, capacity: int, columns: List[str]) -> List[Tuple[float, array]]:
+        # Map the old layout's columns onto the current ones by name. Anything that no longer exists is dropped
+        # and new columns start out as NaN
+        head, length, data_offset = position
+        record_size = TIMESTAMP.size + len(columns) * 8
+        mapping = [columns.index(column) if column in columns else None for column in self.columns]
+
+        oldest = time.time() - self.retention
+        records = []
+        for i in range(length):
+            start = data_offset + ((head - length + i) % capacity) * record_size
+            (timestamp,) = TIMESTAMP.unpack_from(data, start)
+            if timestamp < oldest:
+                continue
+
+            values = array("d")
+            values.frombytes(data[start + TIMESTAMP.size : start + record_size])
+            records.append(
+                (timestamp, array("d", [values[index] if index is not None else NAN for index in mapping]))
+            )
+
+        return records[-self.capacity :]
+
+    def create(self, records: List[Tuple[float, array]]):
+        # Compaction writes to a new file that replaces the old one so a crash never leaves a half written file
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(HEADER.pack(HEADER_MAGIC, HEADER_VERSION, self.capacity, self.width, len(self.names), 0, 0))
+            file.write(self.names)
+            file.truncate(self.data_offset + self.capacity * self.record_size)
+
+        os.replace(temp_path, self.path)
+
+        # The lock is held on the old file, so take it again on the new one
+        self.file.close()
+        self.file = open(os.open(self.path, os.O_RDWR), "r+b")
+        self.lock()
+
+        self.map()
+        self.head = 0
+        self.length = 0
+        for timestamp, values in records:
+            self.append(timestamp, values)
+
+    def map(self):
+        self.mmap = mmap.mmap(self.file.fileno(), self.data_offset + self.capacity * self.record_size)
+
+    def append(self, timestamp: float, values: array):
+        start = self.data_offset + self.head * self.record_size
+        self.mmap[start : start + TIMESTAMP.size] = TIMESTAMP.pack(timestamp)
+        self.mmap[start + TIMESTAMP.size : start + self.record_size] = values.tobytes()
+
+        self.head = (self.head + 1) % self.capacity
+        self.length = min(self.length + 1, self.capacity)
+        POSITION.pack_into(self.mmap, POSITION_OFFSET, self.head, self.length)
+
+    def load(self, limit: int) -> List[Tuple[float, array]]:
+        # Returns the newest records within retention, oldest first
+        oldest = time.time() - self.retention
+        data = self.mmap
+
+        records = []
+        for i in range(min(self.length, limit)):
+            start = self.data_offset + ((self.head - 1 - i) % self.capacity) * self.record_size
+            (timestamp,) = TIMESTAMP.unpack_from(data, start)
+            if timestamp < oldest:
+                break
+
+            values = array("d")
+            values.frombytes(data[start + TIMESTAMP.size : start + self.record_size])
+            records.append((timestamp, values))
+
+        records.reverse()
+
+        return records
+
+    def close(self):
+        if self.mmap:
+            self.mmap.flush()
+            self.mmap.close()
+            self.mmap = None
+
+        self.file.close()
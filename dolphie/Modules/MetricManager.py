@@ -1,9 +1,11 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Union
+from typing import Dict, List, Tuple, Union
 
-import plotext as plt
 from dolphie.Modules.Functions import format_bytes, format_number, format_time
+from dolphie.Modules.MetricHistory import MetricHistory
 from rich.text import Text
 from textual.widgets import Static
 
@@ -14,6 +16,7 @@ class Graph(Static):
 
         self.bar = bar
         self.metric_instance = None
+        self.window = DEFAULT_GRAPH_WINDOW
 
     def on_show(self) -> None:
         self.render_graph(self.metric_instance)
@@ -27,18 +30,23 @@ class Graph(Static):
         if self.metric_instance is None:
             return
 
+        # plotext is only needed once a graph is shown, which a lot of sessions never do
+        import plotext as plt
+
         plt.clf()
-        plt.date_form("H:M:S")
+        plt.date_form("Y-m-d H:M:S", "H:M:S")
         plt.canvas_color((3, 9, 24))
         plt.axes_color((3, 9, 24))
         plt.ticks_color((144, 169, 223))
 
         plt.plotsize(self.size.width, self.size.height)
 
+        # Braille markers fit two points per cell so anything beyond that wouldn't be seen
+        max_points = max(self.size.width, 1) * 2
+
         max_y_value = 0
         if type(self.metric_instance) == CheckpointMetrics:
-            x = self.metric_instance.datetimes
-            y = self.metric_instance.Innodb_checkpoint_age.values
+            x, y = self.metric_instance.Innodb_checkpoint_age.get_window_series(self.window, max_points)
 
             if y:
                 plt.hline(0, (3, 9, 24))
@@ -70,14 +78,10 @@ class Graph(Static):
                 )
                 max_y_value = self.metric_instance.checkpoint_age_max
         elif type(self.metric_instance) == RedoLogMetrics and self.bar:
-            if self.metric_instance.Innodb_lsn_current.values:
+            lsn_values = self.metric_instance.Innodb_lsn_current.values
+            if lsn_values:
                 x = [0]
-                y = [
-                    round(
-                        sum(self.metric_instance.Innodb_lsn_current.values)
-                        * (3600 / len(self.metric_instance.Innodb_lsn_current.values))
-                    )
-                ]
+                y = [round(sum(lsn_values) * (3600 / len(lsn_values)))]
 
                 plt.hline(self.metric_instance.redo_log_size, (252, 121, 121))
                 plt.text(
@@ -111,8 +115,7 @@ class Graph(Static):
                 )
                 max_y_value = max(self.metric_instance.redo_log_size, max(y))
         elif type(self.metric_instance) == RedoLogActiveCountMetrics:
-            x = self.metric_instance.datetimes
-            y = self.metric_instance.Active_redo_log_count.values
+            x, y = self.metric_instance.Active_redo_log_count.get_window_series(self.window, max_points)
 
             if y:
                 plt.hline(1, (3, 9, 24))
@@ -138,8 +141,7 @@ class Graph(Static):
         else:
             for metric_data in self.metric_instance.__dict__.values():
                 if isinstance(metric_data, MetricData) and metric_data.visible:
-                    x = self.metric_instance.datetimes
-                    y = metric_data.values
+                    x, y = metric_data.get_window_series(self.window, max_points)
 
                     if y:
                         plt.plot(x, y, marker="braille", label=metric_data.label, color=metric_data.color)
@@ -151,7 +153,7 @@ class Graph(Static):
         if y_tick_interval >= 1:
             y_ticks = [i * y_tick_interval for i in range(max_y_ticks + 1)]
         else:
-            y_ticks = [i for i in range(max_y_value + 1)]
+            y_ticks = [i for i in range(int(max_y_value) + 1)]
 
         format_function = get_number_format_function(self.metric_instance)
         y_labels = [format_function(val) for val in y_ticks]
@@ -176,6 +178,7 @@ def get_number_format_function(data, color=False):
 class MetricSource:
     global_status: str = "global_status"
     innodb_metrics: str = "innodb_metrics"
+    innodb_status: str = "innodb_status"
     none: str = "none"
 
 
@@ -188,6 +191,409 @@ class MetricColor:
     yellow: tuple = (252, 213, 121)
 
 
+# How many refreshes of metrics are kept in memory for the graphs
+MAX_METRIC_HISTORY = 10800
+
+# Lower resolution copies of the history as (seconds per bucket, number of buckets). Each one covers 24 hours so long
+# graph windows don't have to read every refresh
+ROLLUP_TIERS = [(10, 8640), (60, 1440), (600, 144)]
+
+# The time windows the graphs can be zoomed to, in seconds
+GRAPH_WINDOWS = [
+    ("5 minutes", 300),
+    ("15 minutes", 900),
+    ("30 minutes", 1800),
+    ("1 hour", 3600),
+    ("3 hours", 10800),
+    ("6 hours", 21600),
+    ("12 hours", 43200),
+    ("24 hours", 86400),
+]
+
+DEFAULT_GRAPH_WINDOW = 10800
+
+# Time labels include the date so windows that cross midnight are still in order
+TIME_LABEL_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+NAN = float("nan")
+
+# The baseline of a metric is an exponentially weighted moving average/variance. This alpha weights roughly the last
+# 100 refreshes
+STATISTICS_EWMA_ALPHA = 0.02
+
+# A value is an anomaly when it's this many standard deviations away from the baseline. Nothing is flagged until the
+# baseline has seen enough values and the deviation never counts as less than a fraction of the baseline itself, so
+# metrics that barely move aren't flagged for tiny changes
+ANOMALY_SIGMA = 4
+ANOMALY_WARMUP = 60
+ANOMALY_MIN_RELATIVE_DEVIATION = 0.05
+
+# Percentiles are estimated over roughly this many of the most recent values
+PERCENTILE_WINDOW = 3600
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+class P2Quantile:
+    """Estimates a quantile of a stream of values in constant time and memory with the P-square algorithm
+    (Jain & Chlamtac, 1985). Only five markers are kept no matter how many values are added"""
+
+    def __init__(self, quantile: float):
+        self.quantile = quantile
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired_positions = [1, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5]
+        self.increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value: float):
+        self.count += 1
+        heights = self.heights
+
+        if len(heights) < 5:
+            insort(heights, value)
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = bisect_right(heights, value) - 1
+
+        positions = self.positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired_positions[i] += self.increments[i]
+
+        # Move the middle markers towards where they should be, using a parabolic prediction of their height when
+        # it keeps them in order and a linear one when it doesn't
+        for i in range(1, 4):
+            difference = self.desired_positions[i] - positions[i]
+            if (difference >= 1 and positions[i + 1] - positions[i] > 1) or (
+                difference <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                direction = 1 if difference > 0 else -1
+
+                height = heights[i] + direction / (positions[i + 1] - positions[i - 1]) * (
+                    (positions[i] - positions[i - 1] + direction)
+                    * (heights[i + 1] - heights[i])
+                    / (positions[i + 1] - positions[i])
+                    + (positions[i + 1] - positions[i] - direction)
+                    * (heights[i] - heights[i - 1])
+                    / (positions[i] - positions[i - 1])
+                )
+
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + direction * (heights[i + direction] - heights[i]) / (
+                        positions[i + direction] - positions[i]
+                    )
+
+                heights[i] = height
+                positions[i] += direction
+
+    @property
+    def value(self) -> float:
+        if not self.heights:
+            return None
+
+        if len(self.heights) < 5:
+            return self.heights[min(int(self.quantile * len(self.heights)), len(self.heights) - 1)]
+
+        return self.heights[2]
+
+
+class MetricStatistics:
+    """Summary statistics of a metric that are updated with every value it gets in constant time"""
+
+    def __init__(self):
+        self.count = 0
+        self.ewma: float = None
+        self.variance = 0.0
+
+        # How many standard deviations the latest value was from the baseline when it was an anomaly
+        self.anomaly: float = None
+
+        # P-square can't forget old values, so estimates are restarted every PERCENTILE_WINDOW values. The previous
+        # ones are used until the new ones have seen half a window
+        self.percentiles = [P2Quantile(percentile) for percentile in PERCENTILES]
+        self.previous_percentiles: List[P2Quantile] = None
+
+    @property
+    def stddev(self) -> float:
+        return self.variance**0.5
+
+    def add(self, value: float):
+        self.count += 1
+
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            self.anomaly = None
+            if self.count > ANOMALY_WARMUP:
+                deviation = max(self.stddev, abs(self.ewma) * ANOMALY_MIN_RELATIVE_DEVIATION)
+                if deviation:
+                    sigma = (value - self.ewma) / deviation
+                    if abs(sigma) >= ANOMALY_SIGMA:
+                        self.anomaly = sigma
+
+            difference = value - self.ewma
+            increment = STATISTICS_EWMA_ALPHA * difference
+            self.ewma += increment
+            self.variance = (1 - STATISTICS_EWMA_ALPHA) * (self.variance + difference * increment)
+
+        if self.percentiles[0].count >= PERCENTILE_WINDOW:
+            self.previous_percentiles = self.percentiles
+            self.percentiles = [P2Quantile(percentile) for percentile in PERCENTILES]
+
+        for estimator in self.percentiles:
+            estimator.add(value)
+
+    def get_percentiles(self) -> List[float]:
+        percentiles = self.percentiles
+        if self.previous_percentiles and percentiles[0].count < PERCENTILE_WINDOW // 2:
+            percentiles = self.previous_percentiles
+
+        return [estimator.value for estimator in percentiles]
+
+
+class MetricRollup:
+    """Aggregates a MetricStore's rows into fixed size time buckets. Every bucket keeps the min, max, total and count
+    of each column so the min/avg/max of a bucket can be read back"""
+
+    def __init__(self, seconds: int, capacity: int, width: int):
+        self.seconds = seconds
+        self.capacity = capacity
+        self.width = width
+
+        self.minimums = array("d", [NAN]) * (capacity * width)
+        self.maximums = array("d", [NAN]) * (capacity * width)
+        self.totals = array("d", [0]) * (capacity * width)
+        self.counts = array("d", [0]) * (capacity * width)
+        self.starts = array("d", [0]) * capacity
+
+        self.bucket: float = None  # The start of the bucket being filled
+        self.head = 0
+        self.length = 0
+        self.offset = 0
+
+    def start_bucket(self, bucket: float):
+        width = self.width
+        offset = self.head * width
+
+        self.minimums[offset : offset + width] = array("d", [NAN]) * width
+        self.maximums[offset : offset + width] = array("d", [NAN]) * width
+        self.totals[offset : offset + width] = array("d", [0]) * width
+        self.counts[offset : offset + width] = array("d", [0]) * width
+        self.starts[self.head] = bucket
+
+        self.bucket = bucket
+        self.offset = offset
+        self.head = (self.head + 1) % self.capacity
+        self.length = min(self.length + 1, self.capacity)
+
+    def current(self) -> Tuple[array, array, array, array]:
+        offset = self.offset
+        end = offset + self.width
+
+        return self.minimums[offset:end], self.maximums[offset:end], self.totals[offset:end], self.counts[offset:end]
+
+    def merge(self, minimums, maximums, totals, counts):
+        offset = self.offset
+        bucket_minimums = self.minimums
+        bucket_maximums = self.maximums
+        bucket_totals = self.totals
+        bucket_counts = self.counts
+
+        for column in range(self.width):
+            count = counts[column]
+            if not count:
+                continue
+
+            i = offset + column
+            if bucket_counts[i]:
+                if minimums[column] < bucket_minimums[i]:
+                    bucket_minimums[i] = minimums[column]
+                if maximums[column] > bucket_maximums[i]:
+                    bucket_maximums[i] = maximums[column]
+            else:
+                bucket_minimums[i] = minimums[column]
+                bucket_maximums[i] = maximums[column]
+
+            bucket_totals[i] += totals[column]
+            bucket_counts[i] += count
+
+    def chronological(self, values: array) -> array:
+        if self.length == self.capacity:
+            return values[self.head :] + values[: self.head]
+
+        return values[: self.length]
+
+    def get_series(self, column: int, since: float, aggregate: str = "avg") -> Tuple[List[str], List[float]]:
+        starts = self.chronological(self.starts)
+        counts = self.chronological(self.counts[column :: self.width])
+        if aggregate == "min":
+            values = self.chronological(self.minimums[column :: self.width])
+        elif aggregate == "max":
+            values = self.chronological(self.maximums[column :: self.width])
+        else:
+            values = self.chronological(self.totals[column :: self.width])
+
+        series_datetimes = []
+        series_values = []
+        for start, count, value in zip(starts, counts, values):
+            if count and start >= since:
+                series_datetimes.append(datetime.fromtimestamp(start).strftime(TIME_LABEL_FORMAT))
+                series_values.append(value / count if aggregate == "avg" else value)
+
+        return series_datetimes, series_values
+
+
+class MetricStore:
+    """Every metric that keeps history lives in one preallocated array of time x metric rows that's used as a ring
+    buffer. A metric that wasn't collected during a refresh is left as NaN in that row. Finished rows are also rolled
+    up into each of the ROLLUP_TIERS"""
+
+    def __init__(self, capacity: int = MAX_METRIC_HISTORY):
+        self.capacity = capacity
+        self.columns: Dict[str, int] = {}
+        self.width = 0
+        self.data = array("d")
+        self.empty_row = array("d")
+        self.datetimes: List[str] = [None] * capacity
+        self.timestamps = array("d", [0]) * capacity
+        self.rollups: List[MetricRollup] = []
+
+        self.head = 0  # The row the next refresh is written to
+        self.length = 0
+        self.offset = 0  # Where the current row starts in data
+
+    def add_column(self, name: str) -> int:
+        self.columns[name] = self.width
+        self.width += 1
+
+        return self.columns[name]
+
+    def allocate(self):
+        self.empty_row = array("d", [NAN]) * self.width
+        self.data = array("d", [NAN]) * (self.capacity * self.width)
+        self.rollups = [MetricRollup(seconds, capacity, self.width) for seconds, capacity in ROLLUP_TIERS]
+
+    def resize(self, capacity: int):
+        # This drops any rows that have been added so it's only meant to be used before refreshing
+        self.capacity = capacity
+        self.datetimes = [None] * capacity
+        self.timestamps = array("d", [0]) * capacity
+        self.head = 0
+        self.length = 0
+        self.allocate()
+
+    def add_row(self, timestamp: float, values: array = None):
+        self.offset = self.head * self.width
+        self.data[self.offset : self.offset + self.width] = self.empty_row if values is None else values
+        self.datetimes[self.head] = datetime.fromtimestamp(timestamp).strftime(TIME_LABEL_FORMAT)
+        self.timestamps[self.head] = timestamp
+
+        self.head = (self.head + 1) % self.capacity
+        self.length = min(self.length + 1, self.capacity)
+
+    def finish_row(self):
+        # Called once every metric of the current row has been set so it can be rolled up. A rollup's bucket is only
+        # merged into the next tier when it's complete, so each refresh updates one tier most of the time
+        row = self.get_row()
+        totals = array("d", [0 if value != value else value for value in row])
+        counts = array("d", [0 if value != value else 1 for value in row])
+
+        self.add_to_rollup(0, self.timestamps[(self.head - 1) % self.capacity], row, row, totals, counts)
+
+    def add_to_rollup(self, tier: int, timestamp: float, minimums, maximums, totals, counts):
+        rollup = self.rollups[tier]
+        bucket = timestamp - timestamp % rollup.seconds
+
+        if bucket != rollup.bucket:
+            if rollup.bucket is not None and tier + 1 < len(self.rollups):
+                self.add_to_rollup(tier + 1, rollup.bucket, *rollup.current())
+
+            rollup.start_bucket(bucket)
+
+        rollup.merge(minimums, maximums, totals, counts)
+
+    def get_row(self) -> array:
+        return self.data[self.offset : self.offset + self.width]
+
+    def set(self, column: int, value: float):
+        self.data[self.offset + column] = value
+
+    def set_many(self, columns: List[int], values: List[float]):
+        data = self.data
+        offset = self.offset
+
+        for column, value in zip(columns, values):
+            if column is not None:
+                data[offset + column] = value
+
+    def get_series(self, column: int, start: int = 0) -> Tuple[List[str], List[float]]:
+        # Slicing with a step of the row width gives us the whole column at once, which is then rotated so
+        # it's in chronological order when the ring buffer has wrapped around
+        values = self.data[column :: self.width]
+        datetimes = self.datetimes
+
+        if self.length == self.capacity:
+            values = values[self.head :] + values[: self.head]
+            datetimes = datetimes[self.head :] + datetimes[: self.head]
+        else:
+            values = values[: self.length]
+
+        series_datetimes = []
+        series_values = []
+        for time_label, value in zip(datetimes[start:], values[start:]):
+            # NaN is never equal to itself so this skips refreshes the metric wasn't collected in
+            if value == value:
+                series_datetimes.append(time_label)
+                series_values.append(value)
+
+        return series_datetimes, series_values
+
+    def get_window_series(self, column: int, window: int, max_points: int) -> Tuple[List[str], List[float]]:
+        # Read the window from the finest resolution that covers it without going over max_points. Plotting more
+        # points than the graph has room for only costs time
+        if not self.length:
+            return [], []
+
+        timestamps = self.timestamps
+        if self.length == self.capacity:
+            timestamps = timestamps[self.head :] + timestamps[: self.head]
+        else:
+            timestamps = timestamps[: self.length]
+
+        since = timestamps[-1] - window
+        start = bisect_left(timestamps, since)
+
+        # Once the ring has wrapped, rows older than what it holds are only in the rollups
+        covered = self.length < self.capacity or start > 0
+        if covered and self.length - start <= max_points:
+            return self.get_series(column, start)
+
+        span = timestamps[-1] - max(since, timestamps[0]) if covered else window
+        for rollup in self.rollups:
+            if span / rollup.seconds <= max_points:
+                break
+
+        return rollup.get_series(column, since - since % rollup.seconds)
+
+    def get_latest(self, column: int) -> float:
+        data = self.data
+
+        for i in range(1, self.length + 1):
+            value = data[((self.head - i) % self.capacity) * self.width + column]
+            if value == value:
+                return value
+
+        return None
+
+
 @dataclass
 class MetricData:
     label: str
@@ -195,9 +601,47 @@ class MetricData:
     visible: bool = True
     save_history: bool = True
     per_second_calculation: bool = True
-    last_value: int = None
     graphable: bool = True
-    values: List[int] = field(default_factory=list)
+
+    # These are set by MetricManager when the metric is added to its MetricStore
+    name: str = None
+    column: int = None
+    store: MetricStore = field(default=None, repr=False)
+    statistics: MetricStatistics = field(default=None, repr=False)
+
+    @property
+    def series(self) -> Tuple[List[str], List[float]]:
+        if self.column is None:
+            return [], []
+
+        return self.store.get_series(self.column)
+
+    @property
+    def values(self) -> List[float]:
+        return self.series[1]
+
+    def get_window_series(self, window: int, max_points: int) -> Tuple[List[str], List[float]]:
+        if self.column is None:
+            return [], []
+
+        return self.store.get_window_series(self.column, window, max_points)
+
+    @property
+    def latest(self) -> float:
+        if self.column is None:
+            return None
+
+        return self.store.get_latest(self.column)
+
+
+@dataclass
+class SourceMetrics:
+    # The metrics collected from a source, split into counters (per second values) and gauges. The columns line up
+    # with the names and are None for metrics that don't keep history
+    counter_names: List[str] = field(default_factory=list)
+    counter_columns: List[int] = field(default_factory=list)
+    gauge_names: List[str] = field(default_factory=list)
+    gauge_columns: List[int] = field(default_factory=list)
 
 
 @dataclass
@@ -213,7 +657,6 @@ class DMLMetrics:
     graphs: List[str]
     tab_name: str = "dml"
     metric_source: MetricSource = MetricSource.global_status
-    datetimes: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -223,8 +666,6 @@ class ReplicationLagMetrics:
     tab_name: str = "replication_lag"
     metric_source: MetricSource = MetricSource.none
 
-    datetimes: List[str] = field(default_factory=list)
-
 
 @dataclass
 class CheckpointMetrics:
@@ -232,7 +673,6 @@ class CheckpointMetrics:
     graphs: List[str]
     tab_name: str = "checkpoint"
     metric_source: MetricSource = MetricSource.global_status
-    datetimes: List[str] = field(default_factory=list)
     checkpoint_age_max: int = 0
     checkpoint_age_sync_flush: int = 0
 
@@ -245,7 +685,6 @@ class BufferPoolRequestsMetrics:
     graphs: List[str]
     tab_name: str = "buffer_pool_requests"
     metric_source: MetricSource = MetricSource.global_status
-    datetimes: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -255,7 +694,6 @@ class AdaptiveHashIndexMetrics:
     graphs: List[str]
     tab_name: str = "adaptive_hash_index"
     metric_source: MetricSource = MetricSource.innodb_metrics
-    datetimes: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -265,7 +703,6 @@ class AdaptiveHashIndexHitRatioMetrics:
     smoothed_hit_ratio: float = None
     tab_name: str = "adaptive_hash_index"
     metric_source: MetricSource = MetricSource.none
-    datetimes: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -275,7 +712,6 @@ class RedoLogMetrics:
     tab_name: str = "redo_log"
     redo_log_size: int = 0
     metric_source: MetricSource = MetricSource.global_status
-    datetimes: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -284,7 +720,6 @@ class RedoLogActiveCountMetrics:
     graphs: List[str]
     tab_name: str = "redo_log"
     metric_source: MetricSource = MetricSource.global_status
-    datetimes: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -295,7 +730,6 @@ class TableCacheMetrics:
     graphs: List[str]
     tab_name: str = "table_cache"
     metric_source: MetricSource = MetricSource.global_status
-    datetimes: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -305,7 +739,6 @@ class ThreadMetrics:
     graphs: List[str]
     tab_name: str = "threads"
     metric_source: MetricSource = MetricSource.global_status
-    datetimes: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -316,7 +749,6 @@ class TemporaryObjectMetrics:
     graphs: List[str]
     tab_name: str = "temporary_objects"
     metric_source: MetricSource = MetricSource.global_status
-    datetimes: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -326,7 +758,16 @@ class AbortedConnectionsMetrics:
     graphs: List[str]
     tab_name: str = "aborted_connections"
     metric_source: MetricSource = MetricSource.global_status
-    datetimes: List[str] = field(default_factory=list)
+
+
+@dataclass
+class InnoDBActivityMetrics:
+    pending_reads: MetricData
+    log_flushes: MetricData
+    os_waits: MetricData
+    graphs: List[str]
+    tab_name: str = "innodb_activity"
+    metric_source: MetricSource = MetricSource.innodb_status
 
 
 @dataclass
@@ -343,10 +784,14 @@ class MetricInstances:
     threads: ThreadMetrics
     temporary_objects: TemporaryObjectMetrics
     aborted_connections: AbortedConnectionsMetrics
+    innodb_activity: InnoDBActivityMetrics
 
 
 class MetricManager:
     def __init__(self):
+        self.capacity = MAX_METRIC_HISTORY
+        self.history: MetricHistory = None
+
         self.reset()
 
     def reset(self):
@@ -354,6 +799,9 @@ class MetricManager:
         self.worker_job_time: float = None
         self.global_variables: Dict[str, Union[int, str]] = None
         self.global_status: Dict[str, int] = None
+        self.innodb_metrics: Dict[str, int] = None
+        self.innodb_status: Dict[str, int] = None
+        self.replication_status: Dict[str, Union[int, str]] = None
         self.replication_lag: int = None
         self.redo_log_size: int = 0
 
@@ -434,8 +882,65 @@ class MetricManager:
                 Aborted_clients=MetricData(label="Client (timeout)", color=MetricColor.blue),
                 Aborted_connects=MetricData(label="Connects (attempt)", color=MetricColor.red),
             ),
+            innodb_activity=InnoDBActivityMetrics(
+                graphs=["graph_innodb_activity"],
+                pending_reads=MetricData(label="Pending Reads", color=MetricColor.yellow, per_second_calculation=False),
+                log_flushes=MetricData(label="Log Flushes/sec", color=MetricColor.blue),
+                os_waits=MetricData(label="OS Waits/sec", color=MetricColor.red),
+            ),
         )
 
+        # Register every metric with the store once so each refresh only has to work with precomputed lists
+        # instead of inspecting the metric instances
+        self.store = MetricStore(self.capacity)
+        self.metric_index: Dict[str, MetricData] = {}
+        self.source_metrics: Dict[str, SourceMetrics] = {}
+        self.counter_positions: Dict[str, Tuple[str, int]] = {}
+        self.statistics_metrics: List[MetricData] = []
+
+        for metric_instance in self.metrics.__dict__.values():
+            source_metrics = None
+            if metric_instance.metric_source != MetricSource.none:
+                source_metrics = self.source_metrics.setdefault(metric_instance.metric_source, SourceMetrics())
+
+            for metric_name, metric_data in metric_instance.__dict__.items():
+                if not isinstance(metric_data, MetricData):
+                    continue
+
+                metric_data.name = metric_name
+                metric_data.store = self.store
+                self.metric_index[metric_name] = metric_data
+                if metric_data.save_history:
+                    metric_data.column = self.store.add_column(metric_name)
+                    metric_data.statistics = MetricStatistics()
+                    self.statistics_metrics.append(metric_data)
+
+                if source_metrics is None:
+                    continue
+
+                if metric_data.per_second_calculation:
+                    self.counter_positions[metric_name] = (
+                        metric_instance.metric_source,
+                        len(source_metrics.counter_names),
+                    )
+                    source_metrics.counter_names.append(metric_name)
+                    source_metrics.counter_columns.append(metric_data.column)
+                else:
+                    source_metrics.gauge_names.append(metric_name)
+                    source_metrics.gauge_columns.append(metric_data.column)
+
+        self.store.allocate()
+
+        # The counter values from the previous refresh for each source and the per second values calculated from them
+        self.last_values: Dict[str, List[int]] = {}
+        self.per_second_values: Dict[str, int] = {}
+
+        # Formatting is memoized until the next refresh since panels can ask for the same values many times
+        self.formatted_per_second_values: Dict[str, str] = {}
+
+        # Graphable metrics that became an anomaly during the last refresh
+        self.new_anomalies: List[MetricData] = []
+
     def refresh_data(
         self,
         worker_start_time: datetime,
@@ -443,6 +948,7 @@ class MetricManager:
         global_variables: Dict[str, Union[int, str]],
         global_status: Dict[str, int],
         innodb_metrics: Dict[str, int],
+        innodb_status: Dict[str, int],
         replication_status: Dict[str, Union[int, str]],
         replication_lag: int,  # this can be from SHOW SLAVE STatus/Performance Schema/heartbeat table
     ):
@@ -451,6 +957,7 @@ class MetricManager:
         self.global_variables = global_variables
         self.global_status = global_status
         self.innodb_metrics = innodb_metrics
+        self.innodb_status = innodb_status
         self.replication_status = replication_status
         self.replication_lag = replication_lag
 
@@ -462,6 +969,9 @@ class MetricManager:
         )
         self.redo_log_size = max(innodb_redo_log_capacity, innodb_log_file_size)
 
+        self.store.add_row(self.worker_start_time.timestamp())
+        self.formatted_per_second_values = {}
+
         self.update_metrics_with_per_second_values()
         self.update_metrics_replication_lag()
         self.update_metrics_checkpoint()
@@ -469,55 +979,100 @@ class MetricManager:
 
         self.metrics.redo_log.redo_log_size = self.redo_log_size
 
+        self.store.finish_row()
+        self.update_metrics_statistics()
+
+        if self.history:
+            self.history.append(self.worker_start_time.timestamp(), self.store.get_row())
+
+    def load_history(self, history: MetricHistory):
+        # Fill the graphs with what was saved from previous sessions and keep saving to it from now on. The store
+        # is grown to hold as much as the history file can
+        self.history = history
+
+        if history.capacity > self.capacity:
+            self.capacity = history.capacity
+            self.store.resize(self.capacity)
+
+        for timestamp, values in history.load(self.capacity):
+            self.store.add_row(timestamp, values)
+            self.store.finish_row()
+            self.update_metrics_statistics()
+
+        # Anything flagged while loading is old news
+        self.new_anomalies = []
+
+    def close_history(self):
+        if self.history:
+            self.history.close()
+            self.history = None
+
     def add_metric(self, metric_data: MetricData, value: int):
-        if metric_data.save_history:
-            metric_data.values.append(value)
+        if metric_data.column is not None:
+            self.store.set(metric_data.column, value)
+
+    def get_metric_source_data(self, metric_source: str) -> Dict[str, int]:
+        if metric_source == MetricSource.global_status:
+            return self.global_status
+        elif metric_source == MetricSource.innodb_metrics:
+            return self.innodb_metrics
+        elif metric_source == MetricSource.innodb_status:
+            return self.innodb_status
+
+        return None
 
     def update_metrics_with_per_second_values(self):
-        for metric_instance in self.metrics.__dict__.values():
-            added = False
+        worker_job_time = self.worker_job_time
+
+        for metric_source, source_metrics in self.source_metrics.items():
+            source_data = self.get_metric_source_data(metric_source)
+            last_values = self.last_values.get(metric_source)
+
+            # Nothing is added until we have the previous refresh's values to calculate against. That's the case on
+            # the first refresh and after InnoDB status comes back since it's only collected when graphs are displayed
+            if not source_data or last_values is None:
+                continue
+
+            current_values = [source_data.get(metric_name, 0) for metric_name in source_metrics.counter_names]
+            per_second_values = [
+                round((current_value - last_value) / worker_job_time)
+                for current_value, last_value in zip(current_values, last_values)
+            ]
+
+            self.per_second_values.update(zip(source_metrics.counter_names, per_second_values))
+            self.store.set_many(source_metrics.counter_columns, per_second_values)
+            self.store.set_many(
+                source_metrics.gauge_columns,
+                [source_data.get(metric_name, 0) for metric_name in source_metrics.gauge_names],
+            )
 
-            metric_source = None  # Initialize as None
+    def update_metrics_statistics(self):
+        row = self.store.get_row()
 
-            if metric_instance.metric_source == MetricSource.global_status:
-                metric_source = self.global_status
-            elif metric_instance.metric_source == MetricSource.innodb_metrics:
-                metric_source = self.innodb_metrics
+        self.new_anomalies = []
+        for metric_data in self.statistics_metrics:
+            value = row[metric_data.column]
 
-            if metric_source is None:
-                continue  # Skip if there's no metric source
+            # NaN means the metric wasn't collected this refresh
+            if value != value:
+                continue
 
-            for metric_name, metric_data in metric_instance.__dict__.items():
-                if isinstance(metric_data, MetricData):
-                    if metric_data.last_value is None:
-                        metric_data.last_value = metric_source.get(metric_name, 0)
-                    else:
-                        if metric_data.per_second_calculation:
-                            metric_status_per_sec = self.get_metric_calculate_per_sec(
-                                metric_name, metric_source, format=False
-                            )
-                        else:
-                            metric_status_per_sec = metric_source.get(metric_name, 0)
-
-                        self.add_metric(metric_data, metric_status_per_sec)
-                        added = True
-
-            if added:
-                metric_instance.datetimes.append(self.worker_start_time.strftime("%H:%M:%S"))
+            statistics = metric_data.statistics
+            was_anomaly = statistics.anomaly is not None
+            statistics.add(value)
+
+            if statistics.anomaly is not None and not was_anomaly and metric_data.graphable:
+                self.new_anomalies.append(metric_data)
 
     def update_metrics_replication_lag(self):
         if self.replication_status:
-            metric_instance = self.metrics.replication_lag
-            self.add_metric(metric_instance.lag, self.replication_lag)
-            metric_instance.datetimes.append(self.worker_start_time.strftime("%H:%M:%S"))
+            self.add_metric(self.metrics.replication_lag.lag, self.replication_lag)
 
     def update_metrics_adaptive_hash_index_hit_ratio(self):
         hit_ratio = self.get_metric_adaptive_hash_index(format=False)
 
         if hit_ratio:
-            metric_instance = self.metrics.adaptive_hash_index_hit_ratio
-            self.add_metric(metric_instance.hit_ratio, hit_ratio)
-            metric_instance.datetimes.append(self.worker_start_time.strftime("%H:%M:%S"))
+            self.add_metric(self.metrics.adaptive_hash_index_hit_ratio.hit_ratio, hit_ratio)
 
     def update_metrics_checkpoint(self):
         (max_checkpoint_age_bytes, checkpoint_age_sync_flush_bytes, _) = self.get_metric_checkpoint_age(format=False)
@@ -526,22 +1081,28 @@ class MetricManager:
         metric_instance.checkpoint_age_max = max_checkpoint_age_bytes
         metric_instance.checkpoint_age_sync_flush = checkpoint_age_sync_flush_bytes
 
-    def get_metric_calculate_per_sec(self, metric_name, metric_source=None, format=True):
-        if not metric_source:
-            metric_source = self.global_status
+    def get_metric_calculate_per_sec(self, metric_name, format=True):
+        if metric_name not in self.metric_index:
+            return None
 
-        for metric_instance in self.metrics.__dict__.values():
-            if hasattr(metric_instance, metric_name):
-                metric_data: MetricData = getattr(metric_instance, metric_name)
+        if not format:
+            return self.per_second_values.get(metric_name, 0)
 
-                last_value = metric_data.last_value
-                metric_diff = metric_source.get(metric_name, 0) - last_value
-                metric_per_sec = round(metric_diff / self.worker_job_time)
+        formatted_value = self.formatted_per_second_values.get(metric_name)
+        if formatted_value is None:
+            formatted_value = format_number(self.per_second_values.get(metric_name, 0))
+            self.formatted_per_second_values[metric_name] = formatted_value
 
-                if format:
-                    return format_number(metric_per_sec)
-                else:
-                    return metric_per_sec
+        return formatted_value
+
+    def get_rates(self, metric_names: List[str], format=True) -> Dict[str, Union[int, str]]:
+        return {metric_name: self.get_metric_calculate_per_sec(metric_name, format) for metric_name in metric_names}
+
+    def get_last_value(self, metric_name):
+        metric_source, position = self.counter_positions[metric_name]
+        last_values = self.last_values.get(metric_source)
+
+        return last_values[position] if last_values is not None else None
 
     def get_metric_checkpoint_age(self, format):
         checkpoint_age_bytes = round(self.global_status.get("Innodb_checkpoint_age", 0))
@@ -571,11 +1132,13 @@ class MetricManager:
         if ahi_status == "OFF":
             return "OFF" if format else None
 
-        current_hits = self.innodb_metrics.get("adaptive_hash_searches", 0)
-        current_misses = self.innodb_metrics.get("adaptive_hash_searches_btree", 0)
+        last_hits = self.get_last_value("adaptive_hash_searches")
+        last_misses = self.get_last_value("adaptive_hash_searches_btree")
+        if last_hits is None or last_misses is None:
+            return "Inactive" if format else None
 
-        hits = current_hits - self.metrics.adaptive_hash_index.adaptive_hash_searches.last_value
-        misses = current_misses - self.metrics.adaptive_hash_index.adaptive_hash_searches_btree.last_value
+        hits = self.innodb_metrics.get("adaptive_hash_searches", 0) - last_hits
+        misses = self.innodb_metrics.get("adaptive_hash_searches_btree", 0) - last_misses
         total_hits_misses = hits + misses
 
         if total_hits_misses <= 0:
@@ -606,13 +1169,13 @@ class MetricManager:
             return smoothed_hit_ratio
 
     def update_metrics_with_last_value(self):
-        # We set the last value for specific metrics that need it so they can get per second values
-        for metric_instance in self.metrics.__dict__.values():
-            if metric_instance.metric_source == MetricSource.global_status:
-                metrics_data = self.global_status
-            elif metric_instance.metric_source == MetricSource.innodb_metrics:
-                metrics_data = self.innodb_metrics
+        # Keep the counter values from this refresh so the next one can calculate per second values from them
+        for metric_source, source_metrics in self.source_metrics.items():
+            source_data = self.get_metric_source_data(metric_source)
 
-            for metric_name, metric_data in metric_instance.__dict__.items():
-                if isinstance(metric_data, MetricData) and metric_data.per_second_calculation:
-                    metric_data.last_value = metrics_data.get(metric_name, 0)
+            if source_data:
+                self.last_values[metric_source] = [
+                    source_data.get(metric_name, 0) for metric_name in source_metrics.counter_names
+                ]
+            else:
+                self.last_values[metric_source] = None
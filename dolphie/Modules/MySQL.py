@@ -1,7 +1,74 @@
+import threading
+import time
+from collections import namedtuple
+from dataclasses import dataclass
+from functools import lru_cache
+
 import pymysql
 from dolphie.Modules.Functions import detect_encoding
 from dolphie.Modules.ManualException import ManualException
 from dolphie.Modules.Queries import MySQLQueries
+from pymysql.constants import FIELD_TYPE
+
+# Without these a dead host (pulled cable, failover) leaves the connection hanging on TCP's own timeouts which can
+# take many minutes. Nothing Dolphie runs should come close to them on a healthy connection
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 60
+WRITE_TIMEOUT = 60
+
+# Connections that have been idle for this many seconds are pinged before they're used again
+HEALTH_CHECK_INTERVAL = 15
+
+# Seconds to wait between reconnect attempts, doubling each time up to the max
+RECONNECT_BASE_DELAY = 1
+RECONNECT_MAX_DELAY = 30
+
+
+# Column types PyMySQL hands back as bytes since Dolphie connects with use_unicode=False
+TEXT_FIELD_TYPES = {
+    FIELD_TYPE.VARCHAR,
+    FIELD_TYPE.VAR_STRING,
+    FIELD_TYPE.STRING,
+    FIELD_TYPE.TINY_BLOB,
+    FIELD_TYPE.MEDIUM_BLOB,
+    FIELD_TYPE.LONG_BLOB,
+    FIELD_TYPE.BLOB,
+    FIELD_TYPE.JSON,
+    FIELD_TYPE.ENUM,
+    FIELD_TYPE.SET,
+}
+
+
+def decode_text(value):
+    return value.decode() if value.__class__ is bytes else value
+
+
+def decode_query(value):
+    if value.__class__ is not bytes:
+        return value
+
+    # Most queries are plain ASCII which every encoding decodes the same, so don't pay for detecting one
+    if value.isascii():
+        return value.decode("ascii")
+
+    return value.decode(detect_encoding(value))
+
+
+@lru_cache(maxsize=None)
+def row_type(columns: tuple):
+    return namedtuple("Row", columns, rename=True)
+
+
+@dataclass
+class ServerCapabilities:
+    server_version: str
+    hostname: str
+    mysql_version: str
+    host_distro: str
+    host_is_rds: bool
+    host_is_cluster: bool
+    performance_schema: bool
+    server_uuid: str
 
 
 class Database:
@@ -13,6 +80,10 @@ class Database:
         self.port = port
         self.ssl = ssl
 
+        # Commands run this connection from worker threads so they have to take turns using it
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
         try:
             self.connection = pymysql.connect(
                 host=host,
@@ -23,27 +94,68 @@ class Database:
                 use_unicode=False,
                 ssl=ssl,
                 autocommit=True,
+                connect_timeout=CONNECT_TIMEOUT,
+                read_timeout=READ_TIMEOUT,
+                write_timeout=WRITE_TIMEOUT,
             )
             self.cursor = self.connection.cursor(pymysql.cursors.DictCursor)
+            self.tuple_cursor = self.connection.cursor()
+
+            # Both come from the handshake so they don't cost a query
+            self.server_version = self.connection.get_server_info()
+            self.connection_id = self.connection.thread_id()
         except pymysql.Error as e:
             raise ManualException(f"Failed to connect to database host {self.host}:{self.port}", reason=e.args[1])
         except FileNotFoundError:  # Catch SSL file path errors
             raise ManualException("SSL certificate file path isn't valid!")
 
-    def execute(self, query, values=None, ignore_error=False):
-        if not self.connection.open:
-            return
-
+    def execute(self, query, values=None, ignore_error=False, cursor=None):
         # Prefix all queries with dolphie so they can be identified in the processlist from other people
         query = "/* dolphie */ " + query
 
+        if not self.connection.open:
+            if ignore_error:
+                return None
+
+            raise ManualException(f"Lost connection to database host {self.host}:{self.port}", query=query)
+
         try:
-            return self.cursor.execute(query, values)
+            result = (cursor or self.cursor).execute(query, values)
+            self.last_used = time.monotonic()
+
+            return result
         except Exception as e:
             if ignore_error:
                 return None
             else:
-                raise ManualException("Failed to execute query\n", query=query, reason=e.args[1])
+                raise ManualException("Failed to execute query\n", query=query, reason=e.args[-1])
+
+    def is_healthy(self):
+        if not self.connection.open:
+            return False
+
+        # A connection that's been idle for a while (refresh paused, a screen open, no commands run) can have been
+        # dropped by a firewall or a failover without us knowing, so make sure it's still there before trusting it
+        if time.monotonic() - self.last_used < HEALTH_CHECK_INTERVAL:
+            return True
+
+        # If a command is using it right now, it's alive
+        if not self.lock.acquire(blocking=False):
+            return True
+
+        try:
+            self.connection.ping(reconnect=False)
+            self.last_used = time.monotonic()
+
+            return True
+        except pymysql.Error:
+            return False
+        finally:
+            self.lock.release()
+
+    def close(self):
+        if self.connection.open:
+            self.connection.close()
 
     def process_row(self, row):
         processed_row = {}
@@ -75,6 +187,32 @@ class Database:
 
         return self.process_row(row)
 
+    def fetch_rows(self, query, values=None):
+        # For big result sets. Rows skip DictCursor and process_row: they stay tuples (as named tuples), and which
+        # columns need decoding (and how) is worked out once from the result's metadata instead of for every value
+        self.execute(query, values, cursor=self.tuple_cursor)
+
+        description = self.tuple_cursor.description
+        if not description:
+            return []
+
+        make_row = row_type(tuple(column[0] for column in description))._make
+        decoders = [
+            (index, decode_query if "query" in column[0] else decode_text)
+            for index, column in enumerate(description)
+            if column[1] in TEXT_FIELD_TYPES
+        ]
+
+        rows = []
+        for row in self.tuple_cursor.fetchall():
+            row = list(row)
+            for index, decoder in decoders:
+                row[index] = decoder(row[index])
+
+            rows.append(make_row(row))
+
+        return rows
+
     def fetch_value_from_field(self, query, field=None, values=None):
         self.execute(query, values)
         data = self.cursor.fetchone()
@@ -94,17 +232,9 @@ class Database:
     def fetch_data(self, command, performance_schema=None):
         command_data = {}
 
-        if command in {"status", "variables"}:
-            self.execute(getattr(MySQLQueries, command))
-            data = self.fetchall()
-
-            for row in data:
-                variable = row["Variable_name"]
-                value = row["Value"]
-
-                converted_value = int(value) if value.isnumeric() else value
-
-                command_data[variable] = converted_value
+        if command in {"status", "variables", "server_capabilities"}:
+            for variable, value in self.fetch_rows(getattr(MySQLQueries, command)):
+                command_data[variable] = int(value) if value.isnumeric() else value
 
         elif command == "find_replicas":
             query = MySQLQueries.ps_find_replicas if performance_schema else MySQLQueries.pl_find_replicas
@@ -113,14 +243,8 @@ class Database:
             command_data = self.fetchall()
 
         elif command == "innodb_metrics":
-            self.execute(MySQLQueries.innodb_metrics)
-            data = self.fetchall()
-
-            for row in data:
-                metric = row["NAME"]
-                value = int(row["COUNT"])
-
-                command_data[metric] = value
+            for metric, value in self.fetch_rows(MySQLQueries.innodb_metrics):
+                command_data[metric] = int(value)
 
         else:
             self.execute(getattr(MySQLQueries, command))
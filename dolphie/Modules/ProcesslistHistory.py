@@ -0,0 +1,129 @@
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List
+
+from dolphie.Modules import QueryFingerprint
+
+# Only changes are kept so this is plenty unless a thread keeps flipping between states, in which case the oldest
+# ones are dropped
+MAX_TRANSITIONS = 50
+
+
+def intern(value):
+    # The same users, hosts, databases, commands and states show up in thousands of samples, so every sample
+    # points to one copy of each instead of a new string per tick
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class ThreadTimeline:
+    """Everything seen of a thread, stored as the changes to its command, state and query rather than every sample.
+    Each transition is (seen at, time, command, state, query digest)"""
+
+    __slots__ = (
+        "thread_id",
+        "user",
+        "host",
+        "db",
+        "first_seen",
+        "last_seen",
+        "last_time",
+        "disappeared",
+        "transitions",
+    )
+
+    def __init__(self, thread_id: str, user: str, host: str, db: str, seen_at: datetime):
+        self.thread_id = thread_id
+        self.user = user
+        self.host = host
+        self.db = db
+        self.first_seen = seen_at
+        self.last_seen = seen_at
+        self.last_time = 0
+        self.disappeared: datetime = None
+        self.transitions: List[tuple] = []
+
+    def update(self, seen_at: datetime, time: int, command: str, state: str, digest: str) -> bool:
+        # A new query is either a different one or the same one started again, which its time going back shows
+        last = self.transitions[-1] if self.transitions else None
+        changed = last is None or last[2:] != (command, state, digest) or time < self.last_time
+        if changed:
+            self.transitions.append((seen_at, time, intern(command), intern(state), intern(digest)))
+
+            if len(self.transitions) > MAX_TRANSITIONS:
+                del self.transitions[0]
+
+        self.last_seen = seen_at
+        self.last_time = time
+
+        return changed
+
+
+class ProcesslistHistory:
+    """A bounded history of the processlist samples, so what a thread did can still be looked at after it's gone.
+    Once more than max_threads threads are being remembered, the ones that have been gone the longest are forgotten.
+    Threads that are still running are always kept, so with more of them than max_threads only they are remembered
+
+    The worker records into it while the UI looks things up, so both go through the lock"""
+
+    def __init__(self, max_threads: int):
+        self.max_threads = max_threads
+        self.timelines: Dict[str, ThreadTimeline] = OrderedDict()
+        self.fingerprints: Dict[str, str] = OrderedDict()
+        self.active: set = set()
+        self.lock = threading.Lock()
+
+    def record(self, seen_at: datetime, threads: dict):
+        with self.lock:
+            self.record_threads(seen_at, threads)
+
+    def record_threads(self, seen_at: datetime, threads: dict):
+        timelines = self.timelines
+        fingerprints = self.fingerprints
+
+        for thread_id, thread in threads.items():
+            timeline = timelines.get(thread_id)
+            if timeline is None or timeline.disappeared:
+                timeline = timelines[thread_id] = ThreadTimeline(
+                    thread_id, intern(thread.user), intern(thread.host), intern(thread.db), seen_at
+                )
+
+            # Threads seen this tick go to the end so the front is always the ones that have been gone longest
+            timelines.move_to_end(thread_id)
+
+            digest = thread.digest
+            if timeline.update(seen_at, thread.time, thread.command, thread.state, digest):
+                if digest and digest not in fingerprints:
+                    fingerprints[digest] = QueryFingerprint.fingerprint(thread.query)
+
+        # Only the threads that were there last tick need checking to find the ones that are gone now
+        for thread_id in self.active.difference(threads):
+            timeline = timelines.get(thread_id)
+            if timeline and not timeline.disappeared:
+                timeline.disappeared = seen_at
+
+        self.active = set(threads)
+
+        # Threads seen this tick are at the end, so stop at the first one that's still running
+        while len(timelines) > self.max_threads and next(iter(timelines.values())).disappeared:
+            timelines.popitem(last=False)
+
+        while len(fingerprints) > self.max_threads:
+            fingerprints.popitem(last=False)
+
+    def find(self, value: str) -> List[ThreadTimeline]:
+        # A thread ID or a query fingerprint, newest first
+        with self.lock:
+            if value in self.timelines:
+                return [self.timelines[value]]
+
+            return [
+                timeline
+                for timeline in reversed(self.timelines.values())
+                if any(transition[4] == value for transition in timeline.transitions)
+            ]
+
+    def get_fingerprint(self, digest: str) -> str:
+        with self.lock:
+            return self.fingerprints.get(digest)
@@ -137,7 +137,6 @@ class MySQLQueries:
         WHERE
             data != 'Could not open log file.'
             $placeholder
-        ORDER BY timestamp
     """
     memory_by_user: str = """
         SELECT
@@ -245,8 +244,104 @@ class MySQLQueries:
         WITH ROLLUP
         ORDER BY worker_id
     """
+    ps_lock_waits: str = """
+        SELECT
+            wt.trx_mysql_thread_id                                      AS waiting_thread_id,
+            bt.trx_mysql_thread_id                                      AS blocking_thread_id,
+            IFNULL(TIMESTAMPDIFF(SECOND, wt.trx_wait_started, NOW()), 0) AS wait_age,
+            IFNULL(TIMESTAMPDIFF(SECOND, bt.trx_started, NOW()), 0)      AS blocking_trx_age,
+            IFNULL(bt.trx_rows_locked, 0)                               AS blocking_rows_locked,
+            IFNULL(wt.trx_query, "")                                    AS waiting_query,
+            IFNULL(bt.trx_query, "")                                    AS blocking_query,
+            IFNULL(t.processlist_user, "")                              AS blocking_user,
+            IFNULL(t.processlist_host, "")                              AS blocking_host,
+            CONCAT(l.object_schema, ".", l.object_name)                 AS lock_table,
+            IFNULL(l.index_name, "")                                    AS lock_index,
+            l.lock_mode                                                 AS lock_mode
+        FROM
+            performance_schema.data_lock_waits w
+            JOIN information_schema.innodb_trx wt ON wt.trx_id = w.requesting_engine_transaction_id
+            JOIN information_schema.innodb_trx bt ON bt.trx_id = w.blocking_engine_transaction_id
+            JOIN performance_schema.data_locks l ON l.engine_lock_id = w.requesting_engine_lock_id
+            LEFT JOIN performance_schema.threads t ON t.processlist_id = bt.trx_mysql_thread_id
+    """
+    innodb_lock_waits: str = """
+        SELECT
+            wt.trx_mysql_thread_id                                      AS waiting_thread_id,
+            bt.trx_mysql_thread_id                                      AS blocking_thread_id,
+            IFNULL(TIMESTAMPDIFF(SECOND, wt.trx_wait_started, NOW()), 0) AS wait_age,
+            IFNULL(TIMESTAMPDIFF(SECOND, bt.trx_started, NOW()), 0)      AS blocking_trx_age,
+            IFNULL(bt.trx_rows_locked, 0)                               AS blocking_rows_locked,
+            IFNULL(wt.trx_query, "")                                    AS waiting_query,
+            IFNULL(bt.trx_query, "")                                    AS blocking_query,
+            IFNULL(pl.User, "")                                         AS blocking_user,
+            IFNULL(pl.Host, "")                                         AS blocking_host,
+            l.lock_table                                                AS lock_table,
+            IFNULL(l.lock_index, "")                                    AS lock_index,
+            l.lock_mode                                                 AS lock_mode
+        FROM
+            information_schema.innodb_lock_waits w
+            JOIN information_schema.innodb_trx wt ON wt.trx_id = w.requesting_trx_id
+            JOIN information_schema.innodb_trx bt ON bt.trx_id = w.blocking_trx_id
+            JOIN information_schema.innodb_locks l ON l.lock_id = w.requested_lock_id
+            LEFT JOIN information_schema.PROCESSLIST pl ON pl.Id = bt.trx_mysql_thread_id
+    """
+    ps_transactions: str = """
+        SELECT
+            trx_id,
+            trx_mysql_thread_id                                   AS thread_id,
+            IFNULL(t.processlist_user, "")                        AS user,
+            IFNULL(t.processlist_host, "")                        AS host,
+            IFNULL(t.processlist_db, "")                          AS db,
+            IFNULL(trx_state, "")                                 AS trx_state,
+            IFNULL(trx_operation_state, "")                       AS trx_operation_state,
+            IFNULL(TIMESTAMPDIFF(SECOND, trx_started, NOW()), 0)  AS trx_age,
+            IFNULL(trx_rows_modified, 0)                          AS trx_rows_modified,
+            IFNULL(trx_rows_locked, 0)                            AS trx_rows_locked,
+            IFNULL(trx_tables_locked, 0)                          AS trx_tables_locked,
+            IFNULL(trx_query, "")                                 AS query,
+            (SELECT COUNT(*) FROM information_schema.innodb_trx)  AS total_transactions
+        FROM
+            information_schema.innodb_trx tx
+            LEFT JOIN performance_schema.threads t ON t.processlist_id = tx.trx_mysql_thread_id
+        ORDER BY
+            trx_started,
+            trx_rows_modified DESC
+        LIMIT 100
+    """
+    pl_transactions: str = """
+        SELECT
+            trx_id,
+            trx_mysql_thread_id                                   AS thread_id,
+            IFNULL(pl.User, "")                                   AS user,
+            IFNULL(pl.Host, "")                                   AS host,
+            IFNULL(pl.db, "")                                     AS db,
+            IFNULL(trx_state, "")                                 AS trx_state,
+            IFNULL(trx_operation_state, "")                       AS trx_operation_state,
+            IFNULL(TIMESTAMPDIFF(SECOND, trx_started, NOW()), 0)  AS trx_age,
+            IFNULL(trx_rows_modified, 0)                          AS trx_rows_modified,
+            IFNULL(trx_rows_locked, 0)                            AS trx_rows_locked,
+            IFNULL(trx_tables_locked, 0)                          AS trx_tables_locked,
+            IFNULL(trx_query, "")                                 AS query,
+            (SELECT COUNT(*) FROM information_schema.innodb_trx)  AS total_transactions
+        FROM
+            information_schema.innodb_trx tx
+            LEFT JOIN information_schema.PROCESSLIST pl ON pl.Id = tx.trx_mysql_thread_id
+        ORDER BY
+            trx_started,
+            trx_rows_modified DESC
+        LIMIT 100
+    """
+    server_capabilities: str = """
+        SHOW GLOBAL VARIABLES WHERE Variable_name IN (
+            'hostname', 'version', 'version_comment', 'basedir', 'performance_schema', 'aurora_version',
+            'server_uuid', 'server_id'
+        )
+    """
     status: str = "SHOW GLOBAL STATUS"
     variables: str = "SHOW GLOBAL VARIABLES"
     binlog_status: str = "SHOW MASTER STATUS"
+    binary_log_status: str = "SHOW BINARY LOG STATUS"
     replication_status: str = "SHOW SLAVE STATUS"
+    replica_status: str = "SHOW REPLICA STATUS"
     innodb_status: str = "SHOW ENGINE INNODB STATUS"
@@ -0,0 +1,64 @@
+import hashlib
+import re
+from functools import lru_cache
+
+# Everything that gets normalized is matched by one regex so a query is tokenized in a single pass. The order of
+# the alternatives matters: quoted identifiers and comments have to be consumed before anything inside of them can
+# be mistaken for a literal, and lists of literals before the literals themselves. Whitespace around operators and
+# commas is dropped so "id=1" and "id = 1" end up the same
+LITERAL = (
+    r"(?:'(?:[^'\\]|\\.|'')*'"
+    r'|"(?:[^"\\]|\\.|"")*"'
+    r"|0x[0-9a-fA-F]+|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|NULL)"
+)
+LITERAL_LIST = rf"\(\s*{LITERAL}(?:\s*,\s*{LITERAL})*\s*\)"
+
+TOKENIZER = re.compile(
+    rf"""
+    (?P<identifier>`(?:[^`]|``)*`)
+    |(?P<comment>\s*(?:/\*.*?\*/|(?:--\s|\#)[^\n]*)\s*)
+    |(?P<list>{LITERAL_LIST}(?:\s*,\s*{LITERAL_LIST})*)
+    |(?P<literal>(?<![\w.]){LITERAL}(?![\w.]))
+    |\s*(?P<operator>[=<>!]+|,)\s*
+    |(?P<whitespace>\s+)
+    """,
+    re.VERBOSE | re.DOTALL | re.IGNORECASE,
+)
+
+# Thousands of threads can be running the same few queries, and a long running one shows up again every refresh
+FINGERPRINT_CACHE_SIZE = 16384
+
+
+def replace_token(match: re.Match) -> str:
+    token = match.lastgroup
+    if token == "identifier":
+        return match.group()
+    elif token == "list":
+        return "(?+)"
+    elif token == "literal":
+        return "?"
+    elif token == "operator":
+        return match.group("operator")
+
+    return " "
+
+
+@lru_cache(maxsize=FINGERPRINT_CACHE_SIZE)
+def fingerprint(query: str) -> str:
+    """Normalizes a query into its shape: literals become ?, lists of them (IN lists, multi-row VALUES) become
+    (?+), comments are removed and whitespace is collapsed"""
+
+    if not query:
+        return ""
+
+    return TOKENIZER.sub(replace_token, query).strip().lower()
+
+
+@lru_cache(maxsize=FINGERPRINT_CACHE_SIZE)
+def digest(query: str) -> str:
+    """A short, stable ID for the fingerprint of a query that can be typed in to filter, group or kill by it"""
+
+    if not query:
+        return ""
+
+    return hashlib.md5(fingerprint(query).encode()).hexdigest()[:16]
@@ -0,0 +1,117 @@
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Tuple
+
+from dolphie.Modules import QueryFingerprint
+
+# How many query fingerprints are kept before the ones captured the longest ago are dropped
+SLOW_QUERY_RING_SIZE = 500
+
+
+@dataclass
+class SlowQuery:
+    mysql_host: str
+    digest: str
+    fingerprint: str
+    query: str
+    thread_id: str
+    user: str
+    host: str
+    db: str
+    query_start: datetime
+    first_captured: datetime
+    last_captured: datetime
+    max_time: int
+    count: int = 1
+
+
+class SlowQueryCapture:
+    """Catches queries whose time crosses the threshold from the processlist samples, as a lightweight stand-in for
+    the slow log. Each run of a query (thread ID and when it started) is counted once and they're deduplicated by
+    host and fingerprint, keeping the first one seen as the example. The host is kept with each query since what
+    couldn't be written before a host switch is still in here afterwards"""
+
+    def __init__(self, threshold: int, size: int = SLOW_QUERY_RING_SIZE):
+        self.threshold = threshold
+        self.size = size
+        self.queries: Dict[Tuple[str, str], SlowQuery] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def detect(self, mysql_host: str, seen_at: datetime, previous_threads: dict, threads: dict):
+        # Only the threads that are over the threshold now are looked at. If the same query was already over it
+        # last tick on the same thread, it's the same run and only its time needs updating
+        threshold = self.threshold
+
+        with self.lock:
+            for thread_id, thread in threads.items():
+                if thread.time < threshold or not thread.query:
+                    continue
+
+                digest = thread.digest
+                previous = previous_threads.get(thread_id)
+                same_run = (
+                    previous is not None
+                    and previous.time >= threshold
+                    and previous.time <= thread.time
+                    and previous.query == thread.query
+                )
+
+                key = (mysql_host, digest)
+                slow_query = self.queries.get(key)
+                if same_run:
+                    if slow_query:
+                        slow_query.max_time = max(slow_query.max_time, thread.time)
+                        slow_query.last_captured = seen_at
+                    continue
+
+                if slow_query:
+                    slow_query.count += 1
+                    slow_query.max_time = max(slow_query.max_time, thread.time)
+                    slow_query.last_captured = seen_at
+                    self.queries.move_to_end(key)
+                else:
+                    self.queries[key] = SlowQuery(
+                        mysql_host=mysql_host,
+                        digest=digest,
+                        fingerprint=QueryFingerprint.fingerprint(thread.query),
+                        query=thread.query,
+                        thread_id=thread_id,
+                        user=thread.user,
+                        host=thread.host,
+                        db=thread.db,
+                        query_start=seen_at - timedelta(seconds=thread.time),
+                        first_captured=seen_at,
+                        last_captured=seen_at,
+                        max_time=thread.time,
+                    )
+
+                    if len(self.queries) > self.size:
+                        self.queries.popitem(last=False)
+
+    def flush(self, path: str) -> int:
+        # Appends what's been captured to a JSON Lines file and starts over. If writing fails nothing is lost and
+        # the file is cut back to where it was so the next flush doesn't write the same queries twice
+        with self.lock:
+            if not self.queries:
+                return 0
+
+            lines = []
+            for slow_query in self.queries.values():
+                lines.append(json.dumps(asdict(slow_query), default=str) + "\n")
+
+            with open(path, "a") as file:
+                start = file.tell()
+                try:
+                    file.write("".join(lines))
+                    file.flush()
+                except OSError:
+                    file.truncate(start)
+                    raise
+
+            flushed = len(self.queries)
+            self.queries.clear()
+
+        return flushed
@@ -225,14 +225,19 @@ def create_panel(dolphie: Dolphie) -> Table:
     table_stats.add_column()
     table_stats.add_column(min_width=7)
 
-    table_stats.add_row("[#c5c7d2]Queries", dolphie.metric_manager.get_metric_calculate_per_sec("Queries"))
-    table_stats.add_row("[#c5c7d2]SELECT", dolphie.metric_manager.get_metric_calculate_per_sec("Com_select"))
-    table_stats.add_row("[#c5c7d2]INSERT", dolphie.metric_manager.get_metric_calculate_per_sec("Com_insert"))
-    table_stats.add_row("[#c5c7d2]UPDATE", dolphie.metric_manager.get_metric_calculate_per_sec("Com_update"))
-    table_stats.add_row("[#c5c7d2]DELETE", dolphie.metric_manager.get_metric_calculate_per_sec("Com_delete"))
-    table_stats.add_row("[#c5c7d2]REPLACE", dolphie.metric_manager.get_metric_calculate_per_sec("Com_replace"))
-    table_stats.add_row("[#c5c7d2]COMMIT", dolphie.metric_manager.get_metric_calculate_per_sec("Com_commit"))
-    table_stats.add_row("[#c5c7d2]ROLLBACK", dolphie.metric_manager.get_metric_calculate_per_sec("Com_rollback"))
+    statistics = {
+        "Queries": "Queries",
+        "SELECT": "Com_select",
+        "INSERT": "Com_insert",
+        "UPDATE": "Com_update",
+        "DELETE": "Com_delete",
+        "REPLACE": "Com_replace",
+        "COMMIT": "Com_commit",
+        "ROLLBACK": "Com_rollback",
+    }
+    rates = dolphie.metric_manager.get_rates(list(statistics.values()))
+    for label, metric_name in statistics.items():
+        table_stats.add_row(f"[#c5c7d2]{label}", rates[metric_name])
 
     tables_to_add.append(table_stats)
 
@@ -0,0 +1,197 @@
+import re
+from collections import deque
+
+from dolphie import Dolphie
+from dolphie.Modules.CollectionPlan import LOCK_WAITS_UNAVAILABLE
+from dolphie.Modules.Functions import format_number, format_time
+from rich import box
+from rich.align import Align
+from rich.console import Group
+from rich.style import Style
+from rich.table import Table
+
+# How many root blockers to display. On hosts with thousands of waiting threads there are
+# usually only a handful of roots, but we cap it so rendering cost stays flat
+MAX_DISPLAYED_BLOCKERS = 25
+
+
+def create_panel(dolphie: Dolphie) -> Group:
+    lock_chains = dolphie.lock_chains
+
+    if not lock_chains:
+        return Align.center("[#f1fb82]No lock waits detected![/#f1fb82] There are no threads waiting on a row lock")
+
+    table = Table(
+        title="Blocking Chains",
+        title_style=Style(bold=True),
+        header_style="bold #c5c7d2",
+        box=box.ROUNDED,
+        style="#52608d",
+    )
+
+    table.add_column("Blocker", no_wrap=True)
+    table.add_column("User", no_wrap=True)
+    table.add_column("Host", no_wrap=True)
+    table.add_column("TRX Age", no_wrap=True)
+    table.add_column("Rows Lock", no_wrap=True)
+    table.add_column("Waiters", no_wrap=True)
+    table.add_column("Direct", no_wrap=True)
+    table.add_column("Depth", no_wrap=True)
+    table.add_column("Max Wait", no_wrap=True)
+    table.add_column("Lock", no_wrap=True)
+    table.add_column("Query", overflow="ellipsis", no_wrap=True, max_width=80)
+
+    for chain in lock_chains[:MAX_DISPLAYED_BLOCKERS]:
+        if chain["max_wait"] >= 30:
+            wait_color = "#fc7979"
+        elif chain["max_wait"] >= 10:
+            wait_color = "#f1fb82"
+        else:
+            wait_color = "#54efae"
+
+        blocker = str(chain["thread_id"])
+        if chain["cycle"]:
+            blocker += " [#fc7979](cycle)"
+
+        query = chain["query"]
+        if query:
+            query = re.sub(r"\s+", " ", query)
+        else:
+            # A blocker with no query is idle inside an open transaction
+            query = "[#969aad]idle in transaction"
+
+        lock = chain["lock_table"]
+        if chain["lock_index"]:
+            lock += f" [#969aad]({chain['lock_index']})"
+        if chain["lock_mode"]:
+            lock += f" [#91abec]{chain['lock_mode']}"
+
+        table.add_row(
+            blocker,
+            chain["user"],
+            chain["host"],
+            format_time(chain["trx_age"]),
+            format_number(chain["rows_locked"]),
+            f"[b #fc7979]{format_number(chain['total_waiters'], color=False)}",
+            format_number(chain["direct_waiters"]),
+            str(chain["depth"]),
+            f"[{wait_color}]{format_time(chain['max_wait'])}[/{wait_color}]",
+            lock,
+            query,
+        )
+
+    total_waiting = len({waiter for chain in lock_chains for waiter in chain["waiters"]})
+    summary = (
+        f"[b #bbc8e8]Waiting threads[/b #bbc8e8] {format_number(total_waiting)}  "
+        f"[b #bbc8e8]Root blockers[/b #bbc8e8] {format_number(len(lock_chains))}"
+    )
+    if len(lock_chains) > MAX_DISPLAYED_BLOCKERS:
+        summary += f"  [#969aad](showing top {MAX_DISPLAYED_BLOCKERS})"
+
+    return Group(Align.center(table), Align.center(summary))
+
+
+def fetch_data(dolphie: Dolphie):
+    # The panel can still be open from the previous host after a quick switch
+    if not dolphie.collection_plan.lock_waits_query:
+        dolphie.display_locks_panel = False
+        dolphie.app.call_from_thread(close_panel, dolphie)
+
+        return []
+
+    dolphie.main_db_connection.execute(dolphie.collection_plan.lock_waits_query)
+    lock_waits = dolphie.main_db_connection.fetchall()
+
+    return build_blocking_chains(dolphie, lock_waits)
+
+
+def close_panel(dolphie: Dolphie):
+    dolphie.app.query_one("#panel_locks").display = False
+    dolphie.update_footer(LOCK_WAITS_UNAVAILABLE)
+
+
+def build_blocking_chains(dolphie: Dolphie, lock_waits):
+    # Build the blocker -> waiters graph from the edges returned by the lock wait query
+    waiters_of = {}
+    waiting_threads = set()
+    max_wait_of = {}
+    blockers = {}
+
+    for row in lock_waits:
+        waiting_thread_id = row["waiting_thread_id"]
+        blocking_thread_id = row["blocking_thread_id"]
+
+        waiters_of.setdefault(blocking_thread_id, set()).add(waiting_thread_id)
+        waiting_threads.add(waiting_thread_id)
+        max_wait_of[waiting_thread_id] = max(max_wait_of.get(waiting_thread_id, 0), row["wait_age"])
+
+        # Keep the first edge we see for each blocker since it has the lock its waiters are queued on
+        if blocking_thread_id not in blockers:
+            blockers[blocking_thread_id] = row
+
+    def walk_chain(root_thread_id):
+        # Breadth-first walk so we get the depth of the chain along with every waiter it holds up.
+        # The visited set protects us from cycles that exist for a moment before InnoDB resolves them
+        visited = {root_thread_id}
+        queue = deque([(root_thread_id, 0)])
+        depth = 0
+        max_wait = 0
+
+        while queue:
+            thread_id, level = queue.popleft()
+            depth = max(depth, level)
+
+            for waiter in waiters_of.get(thread_id, ()):
+                if waiter not in visited:
+                    visited.add(waiter)
+                    max_wait = max(max_wait, max_wait_of[waiter])
+                    queue.append((waiter, level + 1))
+
+        visited.discard(root_thread_id)
+
+        return visited, depth, max_wait
+
+    def create_chain(root_thread_id, cycle=False):
+        waiters, depth, max_wait = walk_chain(root_thread_id)
+        row = blockers[root_thread_id]
+
+        host = row["blocking_host"].split(":")[0]
+
+        return {
+            "thread_id": root_thread_id,
+            "user": row["blocking_user"],
+            "host": dolphie.get_hostname(host) if host else "",
+            "trx_age": row["blocking_trx_age"],
+            "rows_locked": row["blocking_rows_locked"],
+            "query": row["blocking_query"],
+            "lock_table": row["lock_table"] or "",
+            "lock_index": row["lock_index"],
+            "lock_mode": row["lock_mode"] or "",
+            "waiters": waiters,
+            "total_waiters": len(waiters),
+            "direct_waiters": len(waiters_of[root_thread_id]),
+            "depth": depth,
+            "max_wait": max_wait,
+            "cycle": cycle,
+        }
+
+    # Root blockers are the ones holding locks that aren't waiting on anything themselves
+    lock_chains = []
+    reached = set()
+    for blocking_thread_id in waiters_of:
+        if blocking_thread_id not in waiting_threads:
+            chain = create_chain(blocking_thread_id)
+            reached.update(chain["waiters"])
+            lock_chains.append(chain)
+
+    # Anything left over is part of a cycle with no root, so pick a member of each one to represent it
+    for blocking_thread_id in waiters_of:
+        if blocking_thread_id not in reached and blocking_thread_id in waiting_threads:
+            chain = create_chain(blocking_thread_id, cycle=True)
+            reached.add(blocking_thread_id)
+            reached.update(chain["waiters"])
+            lock_chains.append(chain)
+
+    lock_chains.sort(key=lambda chain: (chain["total_waiters"], chain["trx_age"]), reverse=True)
+
+    return lock_chains
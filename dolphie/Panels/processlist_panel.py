@@ -1,14 +1,33 @@
 import re
+from dataclasses import dataclass, field
 from datetime import timedelta
+from functools import lru_cache
 
 from dolphie import Dolphie
+from dolphie.Modules import QueryFingerprint
 from dolphie.Modules.Functions import format_number, format_time
 from dolphie.Modules.Queries import MySQLQueries
 from rich.text import Text
 from textual.widgets import DataTable
 
 
+GROUP_BY_NAMES = {"user": "Username", "host": "Hostname/IP", "db": "Database", "fingerprint": "Fingerprint"}
+
+
+@dataclass
+class ThreadGroup:
+    threads: int = 0
+    max_time: int = 0
+    trx_rows_locked: int = 0
+    trx_rows_modified: int = 0
+    query: str = None
+    thread_ids: list = field(default_factory=list)
+
+
 def create_panel(dolphie: Dolphie) -> DataTable:
+    if dolphie.processlist_group_by and dolphie.processlist_expanded_group is None:
+        return create_group_panel(dolphie)
+
     columns = [
         {"name": "Thread ID", "field": "id", "width": 11, "format_number": False},
         {"name": "Username", "field": "user", "width": 13, "format_number": False},
@@ -49,7 +68,7 @@ def create_panel(dolphie: Dolphie) -> DataTable:
     processlist_datatable = dolphie.app.query_one("#panel_processlist", DataTable)
 
     # Clear table if columns change
-    if len(processlist_datatable.columns) != len(columns):
+    if list(processlist_datatable.columns) != [column_data["field"] for column_data in columns]:
         processlist_datatable.clear(columns=True)
 
     # Add columns to the datatable if it is empty
@@ -60,12 +79,13 @@ def create_panel(dolphie: Dolphie) -> DataTable:
             column_width = column_data["width"]
             processlist_datatable.add_column(column_name, key=column_key, width=column_width)
 
-    # Iterate through dolphie.processlist_threads
-    for thread_id, thread in dolphie.processlist_threads.items():
-        # Add or modify the "command" field based on the condition
-        if thread["command"] == "Killed":
-            thread["command"] = "[#fc7979]Killed"
+    # An expanded group only shows the threads that are in it
+    threads = dolphie.processlist_threads
+    if dolphie.processlist_group_by:
+        group = dolphie.processlist_groups.get(dolphie.processlist_expanded_group)
+        threads = {thread_id: threads[thread_id] for thread_id in group.thread_ids} if group else {}
 
+    for thread_id, thread in threads.items():
         # Check if the thread_id exists in the datatable
         if thread_id in processlist_datatable.rows:
             datatable_row = processlist_datatable.get_row(thread_id)
@@ -77,10 +97,10 @@ def create_panel(dolphie: Dolphie) -> DataTable:
 
                 update_width = False
                 if column_name == "query":
-                    value = re.sub(r"\s+", " ", thread[column_name])
+                    value = re.sub(r"\s+", " ", thread.query)
                     update_width = True
                 else:
-                    value = format_number(thread[column_name]) if column_format_number else thread[column_name]
+                    value = column_value(thread, column_name, column_format_number)
 
                 if value != datatable_row[column_id] or column_name == "formatted_time":
                     processlist_datatable.update_cell(thread_id, column_name, value, update_width=update_width)
@@ -92,153 +112,240 @@ def create_panel(dolphie: Dolphie) -> DataTable:
                 column_format_number = column_data["format_number"]
 
                 if column_name == "query":
-                    value = re.sub(r"\s+", " ", thread[column_name])
+                    value = re.sub(r"\s+", " ", thread.query)
                 else:
-                    value = format_number(thread[column_name]) if column_format_number else thread[column_name]
+                    value = column_value(thread, column_name, column_format_number)
 
                 row_values.append(value)
 
             processlist_datatable.add_row(*row_values, key=thread_id)
 
-    # Remove rows from processlist_datatable that no longer exist in dolphie.processlist_threads
-    rows_to_remove = set(processlist_datatable.rows.keys()) - set(dolphie.processlist_threads.keys())
+    # Remove rows from processlist_datatable that no longer exist in threads
+    rows_to_remove = set(processlist_datatable.rows.keys()) - set(threads.keys())
     for id in rows_to_remove:
         processlist_datatable.remove_row(id)
 
     processlist_datatable.sort("formatted_time", reverse=dolphie.sort_by_time_descending)
 
 
-def fetch_data(dolphie: Dolphie):
-    if dolphie.use_performance_schema:
+def create_group_panel(dolphie: Dolphie) -> DataTable:
+    group_by_fingerprint = dolphie.processlist_group_by == "fingerprint"
+
+    columns = [
+        {
+            "name": GROUP_BY_NAMES[dolphie.processlist_group_by],
+            # Each grouping gets its own key so switching between them rebuilds the columns with the right header
+            "field": f"group_{dolphie.processlist_group_by}",
+            "width": 16 if group_by_fingerprint else None,
+        },
+        {"name": "Threads", "field": "threads", "width": 8},
+        {"name": "Max Time", "field": "formatted_time", "width": 9},
+        {"name": "Rows Lock", "field": "trx_rows_locked", "width": 9},
+        {"name": "Rows Mod", "field": "trx_rows_modified", "width": 8},
+    ]
+
+    if group_by_fingerprint:
+        columns.append({"name": "Query", "field": "query", "width": None})
+
+    processlist_datatable = dolphie.app.query_one("#panel_processlist", DataTable)
+
+    # Clear table if columns change
+    if list(processlist_datatable.columns) != [column_data["field"] for column_data in columns]:
+        processlist_datatable.clear(columns=True)
+
+    if not processlist_datatable.columns:
+        for column_data in columns:
+            processlist_datatable.add_column(column_data["name"], key=column_data["field"], width=column_data["width"])
+
+    for group_name, group in dolphie.processlist_groups.items():
+        row_values = [
+            group_name,
+            format_number(group.threads),
+            TextPlus(format_time(group.max_time)),
+            format_number(group.trx_rows_locked),
+            format_number(group.trx_rows_modified),
+        ]
+
+        if group_by_fingerprint:
+            row_values.append(group.query)
+
+        if group_name in processlist_datatable.rows:
+            datatable_row = processlist_datatable.get_row(group_name)
+
+            for column_id, column_data in enumerate(columns):
+                if row_values[column_id] != datatable_row[column_id]:
+                    processlist_datatable.update_cell(group_name, column_data["field"], row_values[column_id])
+        else:
+            processlist_datatable.add_row(*row_values, key=group_name)
+
+    rows_to_remove = set(processlist_datatable.rows.keys()) - set(dolphie.processlist_groups.keys())
+    for id in rows_to_remove:
+        processlist_datatable.remove_row(id)
+
+    processlist_datatable.sort("formatted_time", reverse=dolphie.sort_by_time_descending)
+
+
+def column_value(thread: "ThreadRecord", column_name: str, column_format_number: bool):
+    value = getattr(thread, column_name)
+
+    if column_name == "command" and value == "Killed":
+        return "[#fc7979]Killed"
+
+    return format_number(value) if column_format_number else value
+
+
+# Filters are passed to the query as parameters so their values are escaped instead of being put into it as is
+PS_FILTERS = {
+    "user": "processlist_user = %s",
+    "db": "processlist_db = %s",
+    "host": "processlist_host LIKE %s",
+    "query_time": "processlist_time >= %s",
+    "query": "(processlist_info LIKE %s OR trx_query LIKE %s)",
+}
+PL_FILTERS = {
+    "user": "User = %s",
+    "db": "db = %s",
+    "host": "Host LIKE %s",
+    "query_time": "Time >= %s",
+    "query": "Info LIKE %s",
+}
+
+
+@lru_cache(maxsize=None)
+def build_query(use_performance_schema: bool, show_idle_threads: bool, show_trxs_only: bool, filters: tuple) -> str:
+    # The query only changes when a filter is turned on or off, so each variation of it is only built once
+    if use_performance_schema:
         processlist_query = MySQLQueries.ps_query
+        filter_conditions = PS_FILTERS
     else:
         processlist_query = MySQLQueries.pl_query
+        filter_conditions = PL_FILTERS
 
-    ########################
-    # WHERE clause filters #
-    ########################
     where_clause = []
 
     # Filter out idle threads if specified
-    if not dolphie.show_idle_threads:
-        if dolphie.use_performance_schema:
+    if not show_idle_threads:
+        if use_performance_schema:
             where_clause.append(
-                "(processlist_command != 'Sleep' AND processlist_command NOT LIKE 'Binlog Dump%') AND "
+                "(processlist_command != 'Sleep' AND processlist_command NOT LIKE 'Binlog Dump%%') AND "
                 "(processlist_info IS NOT NULL OR trx_query IS NOT NULL)"
             )
         else:
             where_clause.append(
-                "(Command != 'Sleep' AND Command NOT LIKE 'Binlog Dump%') AND "
+                "(Command != 'Sleep' AND Command NOT LIKE 'Binlog Dump%%') AND "
                 "(Info IS NOT NULL OR trx_query IS NOT NULL)"
             )
 
     # Only show running transactions only
-    if dolphie.show_trxs_only:
+    if show_trxs_only:
         where_clause.append("trx_state != ''")
 
-    # Filter user
+    where_clause.extend(filter_conditions[name] for name in filters)
+
+    # Add in our dynamic WHERE clause for filtering
+    if where_clause:
+        return processlist_query.replace("$placeholder", "AND " + " AND ".join(where_clause))
+
+    return processlist_query.replace("$placeholder", "")
+
+
+def fetch_data(dolphie: Dolphie):
+    filters = []
+    values = []
+
     if dolphie.user_filter:
-        if dolphie.use_performance_schema:
-            where_clause.append("processlist_user = '%s'" % dolphie.user_filter)
-        else:
-            where_clause.append("User = '%s'" % dolphie.user_filter)
+        filters.append("user")
+        values.append(dolphie.user_filter)
 
-    # Filter database
     if dolphie.db_filter:
-        if dolphie.use_performance_schema:
-            where_clause.append("processlist_db = '%s'" % dolphie.db_filter)
-        else:
-            where_clause.append("db = '%s'" % dolphie.db_filter)
+        filters.append("db")
+        values.append(dolphie.db_filter)
 
-    # Filter hostname/IP
+    # Have to use LIKE since there's a port at the end
     if dolphie.host_filter:
-        # Have to use LIKE since there's a port at the end
-        if dolphie.use_performance_schema:
-            where_clause.append("processlist_host LIKE '%s%%'" % dolphie.host_filter)
-        else:
-            where_clause.append("Host LIKE '%s%%'" % dolphie.host_filter)
+        filters.append("host")
+        values.append(f"{dolphie.host_filter}%")
 
-    # Filter time
     if dolphie.query_time_filter:
-        if dolphie.use_performance_schema:
-            where_clause.append("processlist_time >= '%s'" % dolphie.query_time_filter)
-        else:
-            where_clause.append("Time >= '%s'" % dolphie.query_time_filter)
+        filters.append("query_time")
+        values.append(dolphie.query_time_filter)
 
-    # Filter query
     if dolphie.query_filter:
-        if dolphie.use_performance_schema:
-            where_clause.append(
-                "(processlist_info LIKE '%%%s%%' OR trx_query LIKE '%%%s%%')"
-                % (dolphie.query_filter, dolphie.query_filter),
-            )
-        else:
-            where_clause.append("Info LIKE '%%%s%%'" % dolphie.query_filter)
+        filters.append("query")
+        values.extend([f"%{dolphie.query_filter}%"] * (2 if dolphie.use_performance_schema else 1))
 
-    # Add in our dynamic WHERE clause for filtering
-    if where_clause:
-        processlist_query = processlist_query.replace("$placeholder", "AND " + " AND ".join(where_clause))
-    else:
-        processlist_query = processlist_query.replace("$placeholder", "")
+    processlist_query = build_query(
+        dolphie.use_performance_schema, dolphie.show_idle_threads, dolphie.show_trxs_only, tuple(filters)
+    )
 
     processlist_threads = {}
+    processlist_groups = {}
+    group_by = dolphie.processlist_group_by
+
     # Run the processlist query
-    dolphie.main_db_connection.execute(processlist_query)
-    threads = dolphie.main_db_connection.fetchall()
+    threads = dolphie.main_db_connection.fetch_rows(processlist_query, values)
 
     for thread in threads:
         # Don't include Dolphie's threads
-        if dolphie.main_db_connection_id == thread["id"] or dolphie.secondary_db_connection_id == thread["id"]:
+        if dolphie.main_db_connection_id == thread.id or dolphie.secondary_db_connection_id == thread.id:
             continue
 
-        command = thread["command"]
         # Use trx_query over Performance Schema query since it's more accurate
-        if dolphie.use_performance_schema and thread["trx_query"]:
-            query = thread["trx_query"]
+        if dolphie.use_performance_schema and thread.trx_query:
+            query = thread.trx_query
         else:
-            query = thread["query"]
-
-        # Determine time color
-        time = int(thread["time"])
-        thread_color = ""
-        if "SELECT /*!40001 SQL_NO_CACHE */ *" in query:
-            thread_color = "magenta"
-        elif query:
-            if time >= 10:
-                thread_color = "#fc7979"
-            elif time >= 5:
-                thread_color = "#f1fb82"
-            else:
-                thread_color = "#54efae"
+            query = thread.query
 
-        formatted_time = TextPlus(format_time(time), style=thread_color)
-        formatted_time_with_days = TextPlus("{:0>8}".format(str(timedelta(seconds=time))), style=thread_color)
+        # Fingerprints can't be filtered on by MySQL so it's done here
+        if dolphie.fingerprint_filter and QueryFingerprint.digest(query) != dolphie.fingerprint_filter:
+            continue
 
-        host = thread["host"].split(":")[0]
+        host = thread.host.split(":")[0]
         host = dolphie.get_hostname(host)
 
-        mysql_thread_id = thread.get("mysql_thread_id")
-
-        processlist_threads[str(thread["id"])] = {
-            "id": str(thread["id"]),
-            "mysql_thread_id": mysql_thread_id,
-            "user": thread["user"],
-            "host": host,
-            "db": thread["db"],
-            "time": time,
-            "formatted_time_with_days": formatted_time_with_days,
-            "formatted_time": formatted_time,
-            "command": command,
-            "state": thread["state"],
-            "trx_state": thread["trx_state"],
-            "trx_operation_state": thread["trx_operation_state"],
-            "trx_rows_locked": thread["trx_rows_locked"],
-            "trx_rows_modified": thread["trx_rows_modified"],
-            "trx_concurrency_tickets": thread["trx_concurrency_tickets"],
-            "query": query,
-        }
-
-    return processlist_threads
+        thread_id = str(thread.id)
+        record = ThreadRecord(
+            id=thread_id,
+            mysql_thread_id=getattr(thread, "mysql_thread_id", None),
+            user=thread.user,
+            host=host,
+            db=thread.db,
+            time=int(thread.time),
+            command=thread.command,
+            state=thread.state,
+            trx_state=thread.trx_state,
+            trx_operation_state=thread.trx_operation_state,
+            trx_rows_locked=thread.trx_rows_locked,
+            trx_rows_modified=thread.trx_rows_modified,
+            trx_concurrency_tickets=thread.trx_concurrency_tickets,
+            query=query,
+        )
+        processlist_threads[thread_id] = record
+
+        # Groups are built in the same pass so grouping doesn't need to go through the threads again
+        if group_by:
+            group_name = str(getattr(record, "digest" if group_by == "fingerprint" else group_by))
+            group = processlist_groups.get(group_name)
+            if group is None:
+                group = processlist_groups[group_name] = ThreadGroup()
+
+                if group_by == "fingerprint":
+                    group.query = QueryFingerprint.fingerprint(query)
+
+            group.threads += 1
+            group.max_time = max(group.max_time, record.time)
+            group.trx_rows_locked += int(record.trx_rows_locked or 0)
+            group.trx_rows_modified += int(record.trx_rows_modified or 0)
+            group.thread_ids.append(thread_id)
+
+    # dolphie.processlist_threads is still the previous tick's threads here, which is what's needed to tell a
+    # query that just crossed the threshold from one that already had
+    if dolphie.slow_query_capture:
+        dolphie.slow_query_capture.detect(
+            dolphie.mysql_host, dolphie.worker_start_time, dolphie.processlist_threads, processlist_threads
+        )
+
+    return processlist_threads, processlist_groups
 
 
 class TextPlus(Text):
@@ -264,3 +371,84 @@ class TextPlus(Text):
         if not isinstance(other, Text):
             return NotImplemented
         return self.plain >= other.plain
+
+
+class ThreadRecord:
+    """A thread in the processlist. Its display fields are only worked out when they're asked for, which is just
+    for the rows put in the datatable or the thread screen, and records are never changed once fetched so the
+    snapshot can share them instead of copying"""
+
+    __slots__ = (
+        "id",
+        "mysql_thread_id",
+        "user",
+        "host",
+        "db",
+        "time",
+        "command",
+        "state",
+        "trx_state",
+        "trx_operation_state",
+        "trx_rows_locked",
+        "trx_rows_modified",
+        "trx_concurrency_tickets",
+        "query",
+    )
+
+    def __init__(
+        self,
+        id,
+        mysql_thread_id,
+        user,
+        host,
+        db,
+        time,
+        command,
+        state,
+        trx_state,
+        trx_operation_state,
+        trx_rows_locked,
+        trx_rows_modified,
+        trx_concurrency_tickets,
+        query,
+    ):
+        self.id = id
+        self.mysql_thread_id = mysql_thread_id
+        self.user = user
+        self.host = host
+        self.db = db
+        self.time = time
+        self.command = command
+        self.state = state
+        self.trx_state = trx_state
+        self.trx_operation_state = trx_operation_state
+        self.trx_rows_locked = trx_rows_locked
+        self.trx_rows_modified = trx_rows_modified
+        self.trx_concurrency_tickets = trx_concurrency_tickets
+        self.query = query
+
+    @property
+    def digest(self) -> str:
+        return QueryFingerprint.digest(self.query)
+
+    @property
+    def thread_color(self) -> str:
+        if "SELECT /*!40001 SQL_NO_CACHE */ *" in self.query:
+            return "magenta"
+        elif self.query:
+            if self.time >= 10:
+                return "#fc7979"
+            elif self.time >= 5:
+                return "#f1fb82"
+            else:
+                return "#54efae"
+
+        return ""
+
+    @property
+    def formatted_time(self) -> TextPlus:
+        return TextPlus(format_time(self.time), style=self.thread_color)
+
+    @property
+    def formatted_time_with_days(self) -> TextPlus:
+        return TextPlus("{:0>8}".format(str(timedelta(seconds=self.time))), style=self.thread_color)
@@ -3,7 +3,6 @@ from datetime import timedelta
 
 import pymysql
 from dolphie import Dolphie
-from dolphie.Modules.Queries import MySQLQueries
 from rich import box
 from rich.align import Align
 from rich.console import Group
@@ -363,8 +362,8 @@ def fetch_replica_table_data(dolphie: Dolphie):
 
             replica_connection = dolphie.replica_connections[thread_id]
             replica_connection["cursor"] = replica_connection["connection"].cursor(pymysql.cursors.DictCursor)
-            replica_connection["cursor"].execute(MySQLQueries.replication_status)
-            replica_data = replica_connection["cursor"].fetchone()
+            replica_connection["cursor"].execute(dolphie.collection_plan.replication_status_query)
+            replica_data = dolphie.collection_plan.map_replication_status(replica_connection["cursor"].fetchone())
 
             if replica_data:
                 replica_tables[host] = create_table(dolphie, data=replica_data, replica_thread_id=thread_id)
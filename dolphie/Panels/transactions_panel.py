@@ -0,0 +1,180 @@
+import re
+
+from dolphie import Dolphie
+from dolphie.Modules.Functions import format_number, format_time
+from dolphie.Modules.Queries import MySQLQueries
+from rich import box
+from rich.align import Align
+from rich.console import Group
+from rich.style import Style
+from rich.table import Table
+
+# Transactions older than this are flagged as the likely reason purge can't keep up when the
+# history list is growing
+PURGE_BLOCKER_AGE = 60
+
+
+def create_panel(dolphie: Dolphie) -> Group:
+    transactions = dolphie.transactions
+
+    history_list_length = dolphie.innodb_metrics.get("trx_rseg_history_len")
+    history_list_rate = dolphie.history_list_length_per_sec
+
+    summary = "[b #bbc8e8]History List[/b #bbc8e8] "
+    if history_list_length is None:
+        summary += "N/A"
+    else:
+        if history_list_rate > 0:
+            rate_color = "#fc7979"
+        elif history_list_rate < 0:
+            rate_color = "#54efae"
+        else:
+            rate_color = "#c5c7d2"
+
+        sign = "+" if history_list_rate > 0 else "-" if history_list_rate < 0 else ""
+        summary += (
+            f"{format_number(history_list_length)} "
+            f"([{rate_color}]{sign}{format_number(history_list_rate)}/s[/{rate_color}])"
+        )
+    summary += f"  [b #bbc8e8]Active TRX[/b #bbc8e8] {format_number(dolphie.transactions_count)}"
+    if dolphie.transactions_count > len(transactions):
+        summary += f" [#969aad](showing the oldest {format_number(len(transactions))})[/#969aad]"
+
+    if not transactions:
+        return Group(Align.center(summary), Align.center("\nThere are no active transactions"))
+
+    oldest_transaction = transactions[0]
+    summary += (
+        f"  [b #bbc8e8]Oldest[/b #bbc8e8] {format_time(oldest_transaction['trx_age'])} "
+        f"[#969aad](thread {oldest_transaction['thread_id']})"
+    )
+
+    table = Table(
+        title="Transactions",
+        title_style=Style(bold=True),
+        header_style="bold #c5c7d2",
+        box=box.ROUNDED,
+        style="#52608d",
+    )
+
+    table.add_column("Thread ID", no_wrap=True)
+    table.add_column("User", no_wrap=True)
+    table.add_column("Host", no_wrap=True)
+    table.add_column("State", no_wrap=True)
+    table.add_column("Age", no_wrap=True)
+    table.add_column("Rows Mod", no_wrap=True)
+    table.add_column("Undo/s", no_wrap=True)
+    table.add_column("Rows Lock", no_wrap=True)
+    table.add_column("Tables", no_wrap=True)
+    table.add_column("Query", overflow="ellipsis", no_wrap=True, max_width=80)
+
+    for transaction in transactions:
+        trx_age = transaction["trx_age"]
+        if trx_age >= PURGE_BLOCKER_AGE:
+            age_color = "#fc7979"
+        elif trx_age >= 10:
+            age_color = "#f1fb82"
+        else:
+            age_color = "#54efae"
+
+        thread_id = str(transaction["thread_id"])
+        # The oldest transaction's read view is what holds back purge, so call it out when the history list grows
+        if transaction is oldest_transaction and history_list_rate > 0 and trx_age >= PURGE_BLOCKER_AGE:
+            thread_id += " [#fc7979](purge)"
+
+        undo_growth = transaction["undo_growth"]
+        if undo_growth is None:
+            undo_growth = ""
+        elif undo_growth > 0:
+            undo_growth = f"[#fc7979]{format_number(undo_growth, color=False)}"
+        else:
+            undo_growth = "0"
+
+        query = re.sub(r"\s+", " ", transaction["query"]) if transaction["query"] else ""
+        if not query and transaction["trx_state"] == "RUNNING":
+            query = "[#969aad]idle in transaction"
+
+        table.add_row(
+            thread_id,
+            transaction["user"],
+            transaction["host"],
+            transaction["trx_state"],
+            f"[{age_color}]{format_time(trx_age)}[/{age_color}]",
+            format_number(transaction["trx_rows_modified"]),
+            undo_growth,
+            format_number(transaction["trx_rows_locked"]),
+            format_number(transaction["trx_tables_locked"]),
+            query,
+        )
+
+    return Group(Align.center(summary), Align.center(table))
+
+
+def fetch_data(dolphie: Dolphie):
+    if dolphie.use_performance_schema:
+        query = MySQLQueries.ps_transactions
+    else:
+        query = MySQLQueries.pl_transactions
+
+    dolphie.main_db_connection.execute(query)
+    data = dolphie.main_db_connection.fetchall()
+
+    # Only the oldest ones are returned, so every row also has how many there are in total
+    dolphie.transactions_count = max(int(data[0]["total_transactions"]), len(data)) if data else 0
+
+    # The previous values are from the last refresh the panel was open for, which can be a while ago
+    elapsed = None
+    if dolphie.transactions_sampled_at:
+        elapsed = (dolphie.worker_start_time - dolphie.transactions_sampled_at).total_seconds()
+    dolphie.transactions_sampled_at = dolphie.worker_start_time
+
+    # Rows modified is the closest thing InnoDB exposes to how many undo records a transaction has
+    # generated, so we keep the previous value of each transaction to know how fast its undo is growing
+    undo_cache = dolphie.transaction_undo_cache
+    current_undo_cache = {}
+
+    transactions = []
+    for row in data:
+        trx_id = row["trx_id"]
+        rows_modified = int(row["trx_rows_modified"])
+
+        previous_rows_modified = undo_cache.get(trx_id)
+        undo_growth = None
+        if previous_rows_modified is not None and elapsed:
+            undo_growth = round((rows_modified - previous_rows_modified) / elapsed)
+
+        current_undo_cache[trx_id] = rows_modified
+
+        host = row["host"].split(":")[0]
+
+        transactions.append(
+            {
+                "trx_id": trx_id,
+                "thread_id": row["thread_id"],
+                "user": row["user"],
+                "host": dolphie.get_hostname(host) if host else "",
+                "db": row["db"],
+                "trx_state": row["trx_state"],
+                "trx_operation_state": row["trx_operation_state"],
+                "trx_age": int(row["trx_age"]),
+                "trx_rows_modified": rows_modified,
+                "trx_rows_locked": int(row["trx_rows_locked"]),
+                "trx_tables_locked": int(row["trx_tables_locked"]),
+                "undo_growth": undo_growth,
+                "query": row["query"],
+            }
+        )
+
+    # Replacing the cache drops transactions that have finished since the last refresh
+    dolphie.transaction_undo_cache = current_undo_cache
+
+    # Track how fast the history list is moving so it can be compared against the transactions above
+    history_list_length = dolphie.innodb_metrics.get("trx_rseg_history_len")
+    if history_list_length is not None and dolphie.previous_history_list_length is not None and elapsed:
+        history_list_change = history_list_length - dolphie.previous_history_list_length
+        dolphie.history_list_length_per_sec = round(history_list_change / elapsed)
+    else:
+        dolphie.history_list_length_per_sec = 0
+    dolphie.previous_history_list_length = history_list_length
+
+    return transactions
@@ -1,9 +1,11 @@
+import pymysql
+from dolphie.Modules.ManualException import ManualException
 from dolphie.Widgets.topbar import TopBar
-from textual import events
+from textual import events, work
 from textual.app import ComposeResult
 from textual.containers import VerticalScroll
 from textual.screen import Screen
-from textual.widgets import Static
+from textual.widgets import Label, LoadingIndicator, Static
 
 
 class CommandScreen(Screen):
@@ -13,18 +15,59 @@ class CommandScreen(Screen):
         }
     """
 
-    def __init__(self, app_version, host, data):
+    def __init__(self, app_version, host, data=None, loader=None, cancel=None):
         super().__init__()
         self.app_version = app_version
         self.host = host
         self.data = data
 
+        # When a loader is given, it's ran on a worker thread and its return value is what gets displayed
+        self.loader = loader
+        self.cancel = cancel
+        self.loading = bool(loader)
+
+    def on_mount(self):
+        if self.loader:
+            self.run_loader()
+
     def on_key(self, event: events.Key):
         exclude_events = ["up", "down", "left", "right", "pageup", "pagedown", "home", "end", "tab", "enter"]
         if event.key not in exclude_events:
+            if self.loading and self.cancel:
+                self.cancel()
+
             if self.screen.is_attached:
                 self.app.pop_screen()
 
     def compose(self) -> ComposeResult:
-        yield TopBar(app_version=self.app_version, host=self.host)
-        yield VerticalScroll(Static(self.data))
+        help = "press any key to cancel" if self.loading else ""
+
+        yield TopBar(app_version=self.app_version, host=self.host, help=help)
+
+        loading_indicator = LoadingIndicator(id="command_loading")
+        loading_indicator.display = self.loading
+        yield loading_indicator
+
+        yield VerticalScroll(Static(self.data or "", id="command_data"))
+
+    @work(thread=True)
+    def run_loader(self):
+        try:
+            data = self.loader()
+        except ManualException as e:
+            data = e.output()
+        except pymysql.Error as e:
+            data = ManualException("Failed to run command", reason=e.args[-1]).output()
+
+        self.app.call_from_thread(self.show_data, data)
+
+    def show_data(self, data):
+        self.loading = False
+
+        # The screen could have been closed (cancelled) while the loader was running
+        if not self.is_attached:
+            return
+
+        self.query_one("#command_loading").display = False
+        self.query_one("#command_data", Static).update(data or "")
+        self.query_one("#topbar_help", Label).update("press any key to return (except navigation keys)")
@@ -0,0 +1,49 @@
+from textual.app import ComposeResult
+from textual.binding import Binding
+from textual.containers import Horizontal, Vertical
+from textual.screen import ModalScreen
+from textual.widgets import Button, Label
+
+
+class ConfirmModal(ModalScreen):
+    CSS = """
+        ConfirmModal > Vertical {
+            background: #121626;
+            border: thick #20263d;
+            height: auto;
+            width: auto;
+        }
+        ConfirmModal > Vertical > * {
+            width: auto;
+            height: auto;
+        }
+        ConfirmModal Label {
+            margin: 1 2;
+            content-align: center middle;
+        }
+        ConfirmModal Horizontal {
+            width: 100%;
+            align-horizontal: center;
+        }
+    """
+    BINDINGS = [
+        Binding("escape", "app.pop_screen", "", show=False),
+    ]
+
+    def __init__(self, message):
+        super().__init__()
+
+        self.message = message
+
+    def compose(self) -> ComposeResult:
+        with Vertical():
+            yield Label(self.message)
+            with Horizontal(classes="button_container"):
+                yield Button("Yes", id="confirm", variant="primary")
+                yield Button("No", id="cancel")
+
+    def on_mount(self):
+        self.query_one("#cancel", Button).focus()
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        self.dismiss(event.button.id == "confirm")
@@ -1,11 +1,38 @@
+from collections import deque
+
+from dolphie.Modules.ManualException import ManualException
 from dolphie.Modules.Queries import MySQLQueries
 from dolphie.Widgets.topbar import TopBar
-from textual import events, on
+from rich.text import Text
+from textual import events, on, work
 from textual.app import ComposeResult
 from textual.containers import Container, Horizontal
 from textual.screen import Screen
 from textual.widgets import DataTable, Input, Label, Switch
 
+# How many events are fetched at a time. The error log can be huge so we only ever load what's needed
+EVENTS_PAGE_SIZE = 500
+
+# How many events are kept in the table. Loading past it drops events from the other end
+MAX_EVENTS = EVENTS_PAGE_SIZE * 10
+
+# How often (in seconds) to check for new events
+TAIL_INTERVAL = 2
+
+
+class EventTime(Text):
+    """The time of an event, sorted by when it was logged since what's shown only goes down to the second"""
+
+    def __init__(self, logged):
+        super().__init__(logged.strftime("%Y-%m-%d %H:%M:%S"), style="#858A97")
+
+        self.logged = logged
+
+    def __lt__(self, other: object) -> bool:
+        if not isinstance(other, EventTime):
+            return NotImplemented
+        return self.logged < other.logged
+
 
 class EventLog(Screen):
     CSS = """
@@ -27,6 +54,11 @@ class EventLog(Screen):
             text-align: center;
             text-style: bold;
         }
+        #summary {
+            width: 100%;
+            text-align: center;
+            color: #969aad;
+        }
         #search {
             background: #030918;
             content-align: right middle;
@@ -44,17 +76,37 @@ class EventLog(Screen):
         self.db = db
 
         self.levels = {
-            "system": {"active": True, "sql": "prio = 'System'"},
-            "warning": {"active": True, "sql": "prio = 'Warning'"},
-            "error": {"active": True, "sql": "prio = 'Error'"},
+            "system": {"active": True, "prio": "System"},
+            "warning": {"active": True, "prio": "Warning"},
+            "error": {"active": True, "prio": "Error"},
         }
 
+        # The row key and timestamp of each event in the table, oldest to newest. The timestamps of the first and
+        # last events are the cursors used to page backwards and forwards. New events are only tailed when the
+        # newest ones are in the table
+        self.events = deque()
+        self.event_key = 0
+        self.oldest_logged = None
+        self.newest_logged = None
+        self.has_older_events = False
+        self.has_newer_events = False
+
+        # Every filter change bumps the generation so results from a worker using an older filter are ignored
+        self.generation = 0
+        self.where_clause = None
+        self.where_values = []
+
     def on_mount(self):
         datatable = self.query_one(DataTable)
         datatable.focus()
         datatable.styles.overflow_x = "auto"
 
+        datatable.add_column("Time", key="time")
+        datatable.add_column("Level", key="level")
+        datatable.add_column("Event", key="event")
+
         self.update_datatable()
+        self.set_interval(TAIL_INTERVAL, self.tail_events)
 
     @on(events.Key)
     def on_keypress(self, event: events.Key):
@@ -64,15 +116,26 @@ class EventLog(Screen):
         elif event.key == "1":
             table = self.query_one(DataTable)
             table.move_cursor(row=0)
+            table.scroll_home(animate=False)
         elif event.key == "2":
             table = self.query_one(DataTable)
             table.move_cursor(row=table.row_count - 1)
+            table.scroll_end(animate=False)
+        elif event.key == "o":
+            if self.has_older_events and self.where_clause:
+                self.fetch_older_events(self.generation, self.where_clause, self.where_values, self.oldest_logged)
+        elif event.key == "n":
+            if self.has_newer_events and self.where_clause:
+                self.fetch_newer_events(self.generation, self.where_clause, self.where_values, self.newest_logged)
 
     def compose(self) -> ComposeResult:
         yield TopBar(
             app_version=self.app_version,
             host=self.host,
-            help="Press [b]q[/b] to return, [b]1[/b]=top/[b]2[/b]=bottom of events",
+            help=(
+                "Press [b]q[/b] to return, [b]1[/b]=top/[b]2[/b]=bottom of events, [b]o[/b]=load older events, "
+                "[b]n[/b]=load newer events"
+            ),
         )
 
         with Horizontal():
@@ -83,6 +146,7 @@ class EventLog(Screen):
 
         yield Label("", id="info")
         yield Input(id="search", placeholder="Search (hit enter when ready)")
+        yield Label("", id="summary")
         with Container():
             yield DataTable(show_cursor=False)
 
@@ -97,53 +161,198 @@ class EventLog(Screen):
         self.update_datatable()
 
     def update_datatable(self):
-        active_sql_list = [data["sql"] for data in self.levels.values() if data["active"]]
-        where_clause = " OR ".join(active_sql_list)
+        self.generation += 1
+
+        self.events.clear()
+        self.oldest_logged = None
+        self.newest_logged = None
+        self.has_older_events = False
+        self.has_newer_events = False
+
+        self.query_one(DataTable).clear()
+
+        active_levels = [data["prio"] for data in self.levels.values() if data["active"]]
+        if not active_levels:
+            self.where_clause = None
+            self.show_info("Toggle the switches above to filter what events you'd like to see", hide_search=True)
+            return
+
+        # Everything the user controls is passed as a parameter instead of being put into the query
+        where_clause = "AND prio IN (%s)" % ", ".join(["%s"] * len(active_levels))
+        where_values = list(active_levels)
+
+        search_text = self.query_one("#search", Input).value
+        if search_text:
+            search_text = search_text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+            where_clause += " AND data LIKE %s"
+            where_values.append(f"%{search_text}%")
+
+        self.where_clause = where_clause
+        self.where_values = where_values
+
+        self.query_one("#summary", Label).update("Loading events...")
+        self.fetch_older_events(self.generation, where_clause, where_values, None)
+
+    def fetch_events(self, where_clause, values):
+        query = MySQLQueries.error_log.replace("$placeholder", where_clause)
+
+        with self.db.lock:
+            self.db.execute(query, values)
+            return self.db.fetchall()
+
+    @work(exclusive=True, group="event_log_page", thread=True)
+    def fetch_older_events(self, generation, where_clause, where_values, before_logged):
+        # Page backwards from the oldest event we have. The newest events are what's usually wanted so
+        # they're always fetched first
+        values = list(where_values)
+        if before_logged:
+            where_clause += " AND logged < %s"
+            values.append(before_logged)
+
+        where_clause += " ORDER BY logged DESC LIMIT %s"
+        values.append(EVENTS_PAGE_SIZE + 1)
+
+        try:
+            data = self.fetch_events(where_clause, values)
+        except ManualException as e:
+            self.app.call_from_thread(self.show_info, f"[indian_red]{e.reason}")
+            return
+
+        has_older_events = len(data) > EVENTS_PAGE_SIZE
+        data = data[:EVENTS_PAGE_SIZE]
+        data.reverse()
+
+        self.app.call_from_thread(self.add_older_events, generation, data, has_older_events)
+
+    @work(exclusive=True, group="event_log_tail", thread=True)
+    def fetch_newer_events(self, generation, where_clause, where_values, after_logged):
+        try:
+            data = self.fetch_events(
+                where_clause + " AND logged > %s ORDER BY logged LIMIT %s",
+                list(where_values) + [after_logged, EVENTS_PAGE_SIZE + 1],
+            )
+        except ManualException:
+            # Tailing is best effort, the next interval will try again
+            return
 
-        search_text = self.query_one("#search", Input)
-        if search_text.value:
-            where_clause = f"({where_clause}) AND (data LIKE '%{search_text.value}%')"
+        has_newer_events = len(data) > EVENTS_PAGE_SIZE
+        data = data[:EVENTS_PAGE_SIZE]
+
+        if data:
+            self.app.call_from_thread(self.add_newer_events, generation, data, has_newer_events)
+
+    def tail_events(self):
+        if self.where_clause and self.newest_logged and not self.has_newer_events:
+            self.fetch_newer_events(self.generation, self.where_clause, self.where_values, self.newest_logged)
+
+    def add_older_events(self, generation, data, has_older_events):
+        # The screen could have been closed or the filters changed while the events were being fetched
+        if not self.is_attached or generation != self.generation:
+            return
+
+        self.has_older_events = has_older_events
+
+        if not data and not self.events:
+            self.show_info("No events found")
+            return
 
         table = self.query_one(DataTable)
-        info = self.query_one("#info", Label)
+        first_page = not self.events
+
+        if data:
+            self.oldest_logged = data[0]["timestamp"]
+            if first_page:
+                self.newest_logged = data[-1]["timestamp"]
+
+            # DataTable can only append, so older events are added to the end and sorted into place
+            keys = self.add_rows(table, data)
+            self.events.extendleft(reversed(keys))
+            if not first_page:
+                table.sort("time")
+
+            # Make room by dropping the newest events, which tailing stops for until they're loaded again
+            if len(self.events) > MAX_EVENTS:
+                while len(self.events) > MAX_EVENTS:
+                    table.remove_row(self.events.pop()[0])
+
+                self.newest_logged = self.events[-1][1]
+                self.has_newer_events = True
+
+        self.show_table()
+
+        if first_page:
+            table.scroll_end(animate=False)
+
+    def add_newer_events(self, generation, data, has_newer_events):
+        if not self.is_attached or generation != self.generation:
+            return
+
+        # Only follow new events if the user is already looking at the newest ones
+        table = self.query_one(DataTable)
+        follow = table.scroll_y >= table.max_scroll_y
+
+        self.newest_logged = data[-1]["timestamp"]
+        self.has_newer_events = has_newer_events
+        self.events.extend(self.add_rows(table, data))
 
-        table.clear(columns=True)
-        table.add_column("Time")
-        table.add_column("Level")
-
-        if where_clause:
-            query = MySQLQueries.error_log.replace("$placeholder", f"AND ({where_clause})")
-            event_count = self.db.execute(query)
-            data = self.db.fetchall()
-
-            if data:
-                table.add_column(f"Event ({event_count})")
-
-                info.display = False
-                table.display = True
-                search_text.display = True
-
-                for row in data:
-                    level_color = ""
-                    if row["level"] == "Error":
-                        level_color = "white on red"
-                    elif row["level"] == "Warning":
-                        level_color = "#f1fb82"
-
-                    level = row["level"]
-                    if level_color:
-                        level = f"[{level_color}]{row['level']}[/{level_color}]"
-
-                    timestamp = f"[#858A97]{row['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}[/#858A97]"
-
-                    table.add_row(timestamp, level, row["message"])
-            else:
-                table.display = False
-                search_text.display = False
-                info.display = True
-                info.update("No events found")
-        else:
-            table.display = False
-            search_text.display = False
-            info.display = True
-            info.update("Toggle the switches above to filter what events you'd like to see")
+        # Make room by dropping the oldest events, they can be loaded again by paging backwards
+        if len(self.events) > MAX_EVENTS:
+            while len(self.events) > MAX_EVENTS:
+                table.remove_row(self.events.popleft()[0])
+
+            self.oldest_logged = self.events[0][1]
+            self.has_older_events = True
+
+        self.show_table()
+
+        if follow:
+            table.scroll_end(animate=False)
+
+    def add_rows(self, table: DataTable, data):
+        keys = []
+        for row in data:
+            self.event_key += 1
+            key = str(self.event_key)
+
+            table.add_row(*self.format_row(row), key=key)
+            keys.append((key, row["timestamp"]))
+
+        return keys
+
+    def format_row(self, row):
+        level_color = ""
+        if row["level"] == "Error":
+            level_color = "white on red"
+        elif row["level"] == "Warning":
+            level_color = "#f1fb82"
+
+        level = row["level"]
+        if level_color:
+            level = f"[{level_color}]{row['level']}[/{level_color}]"
+
+        return EventTime(row["timestamp"]), level, row["message"]
+
+    def show_table(self):
+        self.query_one("#info", Label).display = False
+        self.query_one("#search", Input).display = True
+        self.query_one(DataTable).display = True
+
+        summary = f"Showing {len(self.events):,} events"
+        if self.has_older_events:
+            summary += ", press [b]o[/b] to load older events"
+        if self.has_newer_events:
+            summary += ", press [b]n[/b] to load newer events"
+
+        summary_label = self.query_one("#summary", Label)
+        summary_label.display = True
+        summary_label.update(summary)
+
+    def show_info(self, message, hide_search=False):
+        self.query_one(DataTable).display = False
+        self.query_one("#summary", Label).display = False
+        self.query_one("#search", Input).display = not hide_search
+
+        info = self.query_one("#info", Label)
+        info.display = True
+        info.update(message)
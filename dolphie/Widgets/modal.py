@@ -20,7 +20,7 @@ class CommandModal(ModalScreen):
         }
         CommandModal #kill_container {
             width: 100%;
-            height: 6;
+            height: 8;
         }
         CommandModal Label {
             text-style: bold;
@@ -58,12 +58,15 @@ class CommandModal(ModalScreen):
                     yield RadioButton("Database", id="database")
                     yield RadioButton("Query Text", id="query_text")
                     yield RadioButton("Query Time", id="query_time")
+                    yield RadioButton("Query Fingerprint", id="fingerprint")
                 with Vertical(id="kill_container"):
                     with RadioSet(id="kill_radio_buttons"):
                         yield RadioButton("Username", id="username")
                         yield RadioButton("Host/IP", id="host")
                         yield RadioButton("Time range", id="time_range")
+                        yield RadioButton("Query Fingerprint", id="fingerprint")
                     yield Checkbox("Include sleeping queries", id="sleeping_queries")
+                    yield Checkbox("Dry run (only count the threads that match)", id="dry_run")
                 yield AutoComplete(
                     Input(id="modal_input"),
                     Dropdown(id="dropdown_items", items=self.dropdown_items),
@@ -105,7 +108,7 @@ class CommandModal(ModalScreen):
         self.dropdown_items = []
 
         if field:
-            sorted_array = sorted(set(data.get(field) for _, data in self.processlist_data.items()))
+            sorted_array = sorted(set(getattr(data, field) for _, data in self.processlist_data.items()))
             self.dropdown_items = [DropdownItem(value) for value in sorted_array]
 
         self.query_one("#dropdown_items", Dropdown).items = self.dropdown_items
@@ -126,6 +129,9 @@ class CommandModal(ModalScreen):
                 modal_input.placeholder = "Partial query text"
             elif event.pressed.id == "query_time":
                 modal_input.placeholder = "Query time (in seconds)"
+            elif event.pressed.id == "fingerprint":
+                self.create_dropdown_items("digest")
+                modal_input.placeholder = "Query fingerprint"
             elif event.pressed.id == "user":
                 self.create_dropdown_items("user")
                 modal_input.placeholder = "Username"
@@ -138,6 +144,9 @@ class CommandModal(ModalScreen):
                 modal_input.placeholder = "Hostname or IP address"
             elif event.pressed.id == "time_range":
                 modal_input.placeholder = "Time range (ex. 10-20)"
+            elif event.pressed.id == "fingerprint":
+                self.create_dropdown_items("digest")
+                modal_input.placeholder = "Query fingerprint"
 
         modal_input.focus()
 
@@ -153,9 +162,12 @@ class CommandModal(ModalScreen):
                         self.dismiss([rb.id, modal_input.value])
             elif self.show_kill_options:
                 checkbox_sleeping_queries = self.query_one("#sleeping_queries", Checkbox)
+                checkbox_dry_run = self.query_one("#dry_run", Checkbox)
                 for rb in self.query("#kill_container RadioButton"):
                     if rb.value:
-                        self.dismiss([rb.id, modal_input.value, checkbox_sleeping_queries.value])
+                        self.dismiss(
+                            [rb.id, modal_input.value, checkbox_sleeping_queries.value, checkbox_dry_run.value]
+                        )
             else:
                 self.dismiss(modal_input.value)
         else:
@@ -0,0 +1,309 @@
+import hashlib
+import json
+import re
+
+import pymysql
+from dolphie.Modules import QueryFingerprint
+from dolphie.Modules.Functions import format_number
+from dolphie.Modules.Queries import MySQLQueries
+from dolphie.Widgets.confirm_modal import ConfirmModal
+from dolphie.Widgets.topbar import TopBar
+from rich import box
+from rich.align import Align
+from rich.console import Group
+from rich.syntax import Syntax
+from rich.table import Table
+from sqlparse import format as sqlformat
+from textual import events, work
+from textual.app import ComposeResult
+from textual.containers import VerticalScroll
+from textual.screen import Screen
+from textual.widgets import Static
+
+# How many formatted queries/EXPLAINs to keep around so reopening a thread is instant
+MAX_CACHED_QUERIES = 100
+
+
+class ThreadScreen(Screen):
+    CSS = """
+        ThreadScreen VerticalScroll {
+            padding: 1;
+        }
+        ThreadScreen Static {
+            padding-bottom: 1;
+        }
+    """
+
+    def __init__(
+        self,
+        app_version,
+        host,
+        db,
+        thread_id,
+        thread_data,
+        cache,
+        show_tickets=False,
+        show_transaction_history=False,
+        explain_analyze_supported=False,
+    ):
+        super().__init__()
+
+        self.app_version = app_version
+        self.host = host
+        self.db = db
+        self.thread_id = thread_id
+        self.thread_data = thread_data
+        self.cache = cache
+        self.show_tickets = show_tickets
+        self.show_transaction_history = show_transaction_history
+        # EXPLAIN ANALYZE actually runs the query, so it's only offered for plain SELECTs and never for anything
+        # that writes or takes row locks
+        query_fingerprint = QueryFingerprint.fingerprint(thread_data.query)
+        self.explain_analyze_supported = (
+            explain_analyze_supported
+            and query_fingerprint.startswith("select ")
+            and not re.search(r"\b(for update|for share|lock in share mode|into)\b", query_fingerprint)
+        )
+
+        self.explain_format = "traditional"
+
+    def on_mount(self):
+        self.load_query()
+
+        if self.show_transaction_history:
+            self.load_transaction_history()
+
+    def on_key(self, event: events.Key):
+        if event.key == "e" and self.thread_data.query:
+            self.explain_format = "json" if self.explain_format != "json" else "traditional"
+            self.load_query()
+        elif event.key == "a" and self.thread_data.query and self.explain_analyze_supported:
+
+            def command_get_input(confirmed):
+                if confirmed:
+                    self.explain_format = "analyze"
+                    self.load_query()
+
+            self.app.push_screen(
+                ConfirmModal("EXPLAIN ANALYZE runs the query on the host and waits for it to finish.\nRun it?"),
+                command_get_input,
+            )
+        elif event.key not in ["up", "down", "left", "right", "pageup", "pagedown", "home", "end", "tab", "enter"]:
+            if self.screen.is_attached:
+                self.app.pop_screen()
+
+    def compose(self) -> ComposeResult:
+        help = "press any key to return"
+        if self.thread_data.query:
+            help = "[b]e[/b] EXPLAIN JSON"
+            if self.explain_analyze_supported:
+                help += "/[b]a[/b] ANALYZE"
+            help += ", any other key to return"
+
+        yield TopBar(app_version=self.app_version, host=self.host, help=help)
+        with VerticalScroll():
+            yield Static(Align.center(self.create_thread_table()), id="thread_details")
+            yield Static(id="thread_query")
+            yield Static(id="thread_explain")
+            yield Static(id="thread_transaction_history")
+
+    def create_thread_table(self):
+        thread_data = self.thread_data
+
+        table = Table(box=box.ROUNDED, show_header=False, style="#52608d")
+        table.add_column("")
+        table.add_column("")
+
+        table.add_row("[#c5c7d2]Thread ID", str(self.thread_id))
+        table.add_row("[#c5c7d2]User", thread_data.user)
+        table.add_row("[#c5c7d2]Host", thread_data.host)
+        table.add_row("[#c5c7d2]Database", thread_data.db)
+        table.add_row("[#c5c7d2]Command", thread_data.command)
+        table.add_row("[#c5c7d2]State", thread_data.state)
+        table.add_row("[#c5c7d2]Time", thread_data.formatted_time_with_days)
+        table.add_row("[#c5c7d2]Fingerprint", thread_data.digest)
+        table.add_row("[#c5c7d2]Rows Locked", thread_data.trx_rows_locked)
+        table.add_row("[#c5c7d2]Rows Modified", thread_data.trx_rows_modified)
+
+        if self.show_tickets:
+            table.add_row("[#c5c7d2]Tickets", thread_data.trx_concurrency_tickets)
+
+        table.add_row("", "")
+        table.add_row("[#c5c7d2]TRX State", thread_data.trx_state)
+        table.add_row("[#c5c7d2]TRX Operation", thread_data.trx_operation_state)
+
+        return table
+
+    def update_static(self, static_id, renderable):
+        self.query_one(f"#{static_id}", Static).update(renderable)
+
+    @work(exclusive=True, group="thread_query", thread=True)
+    def load_query(self):
+        query = self.thread_data.query
+        query_db = self.thread_data.db
+
+        if not query:
+            return
+
+        self.app.call_from_thread(self.update_static, "thread_explain", Align.center("[#969aad]Loading EXPLAIN..."))
+
+        # The formatted query and its EXPLAIN only depend on the query text and database, so they're cached
+        # by a digest of those. EXPLAIN ANALYZE runs the query so it's never cached
+        digest = hashlib.sha1(f"{query_db}\0{query}".encode(errors="replace")).hexdigest()
+        cache_key = (digest, self.explain_format)
+
+        formatted_query = self.cache.get(digest)
+        if formatted_query is None:
+            self.app.call_from_thread(
+                self.update_static, "thread_query", Align.center("[#969aad]Formatting query...")
+            )
+
+            formatted_query = Syntax(
+                sqlformat(query, reindent_aligned=True),
+                "sql",
+                line_numbers=False,
+                word_wrap=True,
+                theme="monokai",
+                background_color="#000718",
+            )
+            self.cache_put(digest, formatted_query)
+
+        self.app.call_from_thread(self.update_static, "thread_query", Align.center(formatted_query))
+
+        explain = self.cache.get(cache_key)
+        if explain is None:
+            explain, cacheable = self.explain_query(query_db, query)
+            if cacheable and self.explain_format != "analyze":
+                self.cache_put(cache_key, explain)
+
+        self.app.call_from_thread(self.update_static, "thread_explain", explain)
+
+    def cache_put(self, key, value):
+        self.cache[key] = value
+
+        while len(self.cache) > MAX_CACHED_QUERIES:
+            self.cache.pop(next(iter(self.cache)))
+
+    def explain_query(self, query_db, query):
+        if not query_db:
+            return Align.center("[#969aad]EXPLAIN requires the thread to have a database selected"), True
+
+        if self.explain_format == "json":
+            explain_prefix = "EXPLAIN FORMAT=JSON"
+        elif self.explain_format == "analyze":
+            explain_prefix = "EXPLAIN ANALYZE"
+        else:
+            explain_prefix = "EXPLAIN"
+
+        try:
+            with self.db.lock:
+                self.db.cursor.execute("USE `%s`" % query_db.replace("`", "``"))
+                self.db.cursor.execute(f"{explain_prefix} {query}")
+
+                explain_data = self.db.fetchall()
+        except pymysql.Error as e:
+            reason = e.args[1] if len(e.args) > 1 else str(e)
+
+            # Errors can be transient (i.e. a lock wait timeout) so don't cache them
+            return Align.center("[b indian_red]EXPLAIN ERROR:[/b indian_red] [indian_red]%s" % reason), False
+
+        if not explain_data:
+            return Align.center("[#969aad]EXPLAIN returned no data"), True
+
+        if self.explain_format in ("json", "analyze"):
+            output = next(iter(explain_data[0].values()))
+            if self.explain_format == "json":
+                output = json.dumps(json.loads(output), indent=2)
+
+            return (
+                Align.center(
+                    Syntax(
+                        output,
+                        "json" if self.explain_format == "json" else "text",
+                        line_numbers=False,
+                        word_wrap=True,
+                        theme="monokai",
+                        background_color="#000718",
+                    )
+                ),
+                True,
+            )
+
+        explain_table = Table(box=box.ROUNDED, style="#52608d")
+
+        columns = []
+        for row in explain_data:
+            values = []
+            for column, value in row.items():
+                # Exclude possbile_keys field since it takes up too much space
+                if column == "possible_keys":
+                    continue
+
+                # Don't duplicate columns
+                if column not in columns:
+                    explain_table.add_column(column)
+                    columns.append(column)
+
+                if column == "key" and value is None:
+                    value = "[b white on red]NO INDEX[/b white on red]"
+
+                if column == "rows":
+                    value = format_number(value)
+
+                values.append(str(value))
+
+            explain_table.add_row(*values)
+
+        return Align.center(explain_table), True
+
+    @work(exclusive=True, group="thread_transaction_history", thread=True)
+    def load_transaction_history(self):
+        self.app.call_from_thread(
+            self.update_static, "thread_transaction_history", Align.center("[#969aad]Loading transaction history...")
+        )
+
+        query = MySQLQueries.thread_transaction_history.replace(
+            "$placeholder", str(self.thread_data.mysql_thread_id)
+        )
+
+        try:
+            with self.db.lock:
+                self.db.cursor.execute(query)
+                transaction_history = self.db.fetchall()
+        except pymysql.Error as e:
+            reason = e.args[1] if len(e.args) > 1 else str(e)
+
+            self.app.call_from_thread(
+                self.update_static,
+                "thread_transaction_history",
+                Align.center("[b indian_red]Transaction history error:[/b indian_red] [indian_red]%s" % reason),
+            )
+            return
+
+        if not transaction_history:
+            self.app.call_from_thread(self.update_static, "thread_transaction_history", "")
+            return
+
+        transaction_history_table = Table(box=box.ROUNDED, style="#52608d")
+        transaction_history_table.add_column("Start Time")
+        transaction_history_table.add_column("Query")
+
+        for query in transaction_history:
+            formatted_query = ""
+            if query["sql_text"]:
+                formatted_query = Syntax(
+                    re.sub(r"\s+", " ", query["sql_text"]),
+                    "sql",
+                    line_numbers=False,
+                    word_wrap=True,
+                    theme="monokai",
+                    background_color="#000718",
+                )
+
+            transaction_history_table.add_row(query["start_time"].strftime("%Y-%m-%d %H:%M:%S"), formatted_query)
+
+        self.app.call_from_thread(
+            self.update_static,
+            "thread_transaction_history",
+            Group(Align.center("[b]Transaction History[/b]"), Align.center(transaction_history_table)),
+        )
@@ -1,30 +1,48 @@
 import ipaddress
 import os
+import random
 import re
 import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from importlib import metadata
 
-import pymysql
 import requests
-from dolphie.Modules.Functions import format_number, format_sys_table_memory
+from dolphie.Modules.CollectionPlan import LOCK_WAITS_UNAVAILABLE, CollectionPlan, is_version_at_least
+from dolphie.Modules.Functions import (
+    format_bytes,
+    format_number,
+    format_sys_table_memory,
+    format_time,
+)
+from dolphie.Modules.InnoDBStatus import InnoDBStatus
 from dolphie.Modules.ManualException import ManualException
+from dolphie.Modules.MetricHistory import MetricHistory
 from dolphie.Modules.MetricManager import MetricManager
-from dolphie.Modules.MySQL import Database
+from dolphie.Modules.MySQL import (
+    RECONNECT_BASE_DELAY,
+    RECONNECT_MAX_DELAY,
+    Database,
+    ServerCapabilities,
+)
+from dolphie.Modules.ProcesslistHistory import ProcesslistHistory
 from dolphie.Modules.Queries import MySQLQueries
+from dolphie.Modules.SlowQueryCapture import SlowQueryCapture
 from dolphie.Widgets.command_screen import CommandScreen
+from dolphie.Widgets.confirm_modal import ConfirmModal
 from dolphie.Widgets.event_log_screen import EventLog
 from dolphie.Widgets.modal import CommandModal
 from dolphie.Widgets.new_version_modal import NewVersionModal
 from dolphie.Widgets.quick_switch import QuickSwitchHostModal
+from dolphie.Widgets.thread_screen import ThreadScreen
 from packaging.version import parse as parse_version
 from rich import box
 from rich.align import Align
 from rich.console import Group
 from rich.style import Style
-from rich.syntax import Syntax
 from rich.table import Table
-from sqlparse import format as sqlformat
 from textual.app import App
 
 try:
@@ -51,6 +69,12 @@ class Dolphie:
         self.config_file: str = None
         self.host_cache_file: str = None
         self.quick_switch_hosts_file: str = None
+        self.update_check: bool = True
+        self.metric_history_dir: str = None
+        self.metric_history_hours: int = 0
+        self.processlist_history_threads: int = 2000
+        self.slow_query_threshold: int = 0
+        self.slow_query_file: str = None
         self.debug: bool = False
         self.refresh_interval: int = 1
         self.use_processlist: bool = False
@@ -65,20 +89,32 @@ class Dolphie:
         self.host_filter: str = None
         self.query_time_filter: str = 0
         self.query_filter: str = None
+        self.fingerprint_filter: str = None
 
         self.dolphie_start_time: datetime = datetime.now()
+        self.startup_time: float = time.perf_counter()
+        self.time_to_first_frame: float = None
         self.worker_start_time: datetime = datetime.now()
         self.worker_previous_start_time: datetime = datetime.now()
         self.worker_job_time: int = 0
         self.processlist_threads: dict = {}
         self.processlist_threads_snapshot: dict = {}
+        self.processlist_groups: dict = {}
+        self.processlist_group_by: str = None
+        self.processlist_expanded_group: str = None
+        self.processlist_history: ProcesslistHistory = None
+        self.slow_query_capture: SlowQueryCapture = None
+        self.thread_query_cache: dict = {}
         self.pause_refresh: bool = False
         self.previous_binlog_position: int = 0
         self.previous_replica_sbm: int = 0
         self.quick_switch_hosts: list = []
         self.host_cache: dict = {}
         self.host_cache_from_file: dict = {}
+        self.host_cache_file_loaded: bool = False
         self.innodb_metrics: dict = {}
+        self.innodb_status_metrics: dict = {}
+        self.innodb_status_parser: InnoDBStatus = InnoDBStatus()
         self.global_variables: dict = {}
         self.global_status: dict = {}
         self.binlog_status: dict = {}
@@ -96,11 +132,24 @@ class Dolphie:
         self.replica_connections: dict = {}
         self.replica_tables: dict = {}
 
+        # This is for the locks panel
+        self.lock_chains: list = []
+
+        # These are for the transactions panel
+        self.transactions: list = []
+        self.transactions_count: int = 0
+        self.transaction_undo_cache: dict = {}
+        self.previous_history_list_length: int = None
+        self.transactions_sampled_at: datetime = None
+        self.history_list_length_per_sec: int = 0
+
         # Panel display states
         self.display_dashboard_panel: bool = False
         self.display_processlist_panel: bool = False
         self.display_replication_panel: bool = False
         self.display_graphs_panel: bool = False
+        self.display_locks_panel: bool = False
+        self.display_transactions_panel: bool = False
 
         # Database connection global_variables
         # Main connection is used for Textual's worker thread so it can run asynchronous
@@ -116,11 +165,25 @@ class Dolphie:
         self.server_uuid: str = None
         self.mysql_version: str = None
         self.host_distro: str = None
+        self.collection_plan: CollectionPlan = None
+
+        # Set while the connection to the host is lost and we're trying to get it back
+        self.disconnected_time: datetime = None
+        self.disconnected_reason: str = None
+        self.reconnect_attempts: int = 0
+        self.reconnect_delay: float = 0
+
+        # Commands that query the host are stopped server-side after this many seconds
+        self.command_max_execution_time: int = 30
+
+        # How many connections kill-by-option spreads its KILLs across
+        self.kill_connections: int = 4
 
         # Misc
         self.footer_timer = None
 
     def check_for_update(self):
+        # This runs in its own thread so a slow or unreachable PyPI never holds up startup
         # Query PyPI API to get the latest version
         try:
             url = f"https://pypi.org/pypi/{__package_name__}/json"
@@ -134,15 +197,15 @@ class Dolphie:
 
                 # Compare the current version with the latest version
                 if parse_version(latest_version) > parse_version(__version__):
-                    self.app.push_screen(NewVersionModal(current_version=__version__, latest_version=latest_version))
+                    self.app.call_from_thread(
+                        self.app.push_screen,
+                        NewVersionModal(current_version=__version__, latest_version=latest_version),
+                    )
         except Exception:
             pass
 
     def is_mysql_version_at_least(self, target):
-        parsed_source = parse_version(self.mysql_version)
-        parsed_target = parse_version(target)
-
-        return parsed_source >= parsed_target
+        return is_version_at_least(self.mysql_version, target)
 
     def update_footer(self, output, hide=False, temporary=True):
         if len(self.app.screen_stack) > 1:
@@ -161,71 +224,143 @@ class Dolphie:
                 self.footer_timer.stop()
             self.footer_timer = self.app.set_timer(7, lambda: setattr(footer, "display", False))
 
-    def db_connect(self):
-        self.main_db_connection = Database(self.host, self.user, self.password, self.socket, self.port, self.ssl)
-        self.secondary_db_connection = Database(self.host, self.user, self.password, self.socket, self.port, self.ssl)
+    def connect_database(self):
+        database = Database(self.host, self.user, self.password, self.socket, self.port, self.ssl)
 
         # Reduce any issues with the queries Dolphie runs (mostly targetting only_full_group_by)
-        self.main_db_connection.execute("SET SESSION sql_mode = ''")
-        self.secondary_db_connection.execute("SET SESSION sql_mode = ''")
-
-        self.mysql_host = self.main_db_connection.fetch_value_from_field("SELECT @@hostname")
-
-        self.main_db_connection_id = self.main_db_connection.fetch_value_from_field("SELECT CONNECTION_ID()")
-
-        query = "SELECT CONNECTION_ID() AS connection_id"
-        self.secondary_db_connection_id = self.secondary_db_connection.fetch_value_from_field("SELECT CONNECTION_ID()")
+        database.execute("SET SESSION sql_mode = ''")
 
-        performance_schema = self.main_db_connection.fetch_value_from_field("SELECT @@performance_schema")
-        if performance_schema == 1:
-            self.performance_schema_enabled = True
+        return database
 
-            if not self.use_processlist:
-                self.use_performance_schema = True
+    def probe_server_capabilities(self, database: Database) -> ServerCapabilities:
+        # Everything Dolphie needs to know about the host in one round trip. SHOW GLOBAL VARIABLES is used over
+        # selecting @@variables since it doesn't error on the ones a flavor doesn't have (aurora_version only
+        # exists on Aurora, server_uuid doesn't exist on MariaDB, etc)
+        variables = database.fetch_data("server_capabilities")
 
-        version_comment = self.main_db_connection.fetch_value_from_field("SELECT @@version_comment").lower()
-        basedir = self.main_db_connection.fetch_value_from_field("SELECT @@basedir")
+        version = str(variables.get("version") or database.server_version).lower()
+        version_comment = str(variables.get("version_comment", "")).lower()
+        basedir = str(variables.get("basedir", ""))
 
-        aurora_version = None
-        query = "SHOW GLOBAL VARIABLES LIKE 'aurora_version'"
-        aurora_version_data = self.main_db_connection.fetch_value_from_field(query)
-        if aurora_version_data:
-            aurora_version = aurora_version_data
+        version_match = re.search(r"(\d+)\.(\d+)\.(\d+)", version)
+        if not version_match:
+            raise ManualException(f"Failed to parse the version of host {self.host}", reason=version)
 
-        version = self.main_db_connection.fetch_value_from_field("SELECT @@version").lower()
-        version_split = version.split(".")
-
-        self.mysql_version = "%s.%s.%s" % (
-            version_split[0],
-            version_split[1],
-            version_split[2].split("-")[0],
-        )
-        major_version = int(version_split[0])
+        host_is_rds = False
+        host_is_cluster = False
 
         # Get proper host version and fork
         if "percona xtradb cluster" in version_comment:
-            self.host_distro = "Percona XtraDB Cluster"
-            self.host_is_cluster = True
+            host_distro = "Percona XtraDB Cluster"
+            host_is_cluster = True
         elif "percona server" in version_comment:
-            self.host_distro = "Percona Server"
+            host_distro = "Percona Server"
         elif "mariadb cluster" in version_comment:
-            self.host_distro = "MariaDB Cluster"
-            self.host_is_cluster = True
+            host_distro = "MariaDB Cluster"
+            host_is_cluster = True
         elif "mariadb" in version_comment or "mariadb" in version:
-            self.host_distro = "MariaDB"
-        elif aurora_version:
-            self.host_distro = "Amazon Aurora"
-            self.host_is_rds = True
+            host_distro = "MariaDB"
+        elif variables.get("aurora_version"):
+            host_distro = "Amazon Aurora"
+            host_is_rds = True
         elif "rdsdb" in basedir:
-            self.host_distro = "Amazon RDS"
-            self.host_is_rds = True
+            host_distro = "Amazon RDS"
+            host_is_rds = True
         else:
-            self.host_distro = "MySQL"
+            host_distro = "MySQL"
+
+        # MariaDB and MySQL before 5.6 don't have server_uuid so server_id is the closest thing to it
+        server_uuid = variables.get("server_uuid")
+        if "MariaDB" in host_distro or not server_uuid:
+            server_uuid = variables.get("server_id")
+
+        return ServerCapabilities(
+            server_version=database.server_version,
+            hostname=variables.get("hostname") or self.host,
+            mysql_version=".".join(version_match.groups()),
+            host_distro=host_distro,
+            host_is_rds=host_is_rds,
+            host_is_cluster=host_is_cluster,
+            performance_schema=variables.get("performance_schema") == "ON",
+            server_uuid=server_uuid,
+        )
 
-        server_uuid_query = "SELECT @@server_uuid"
-        if "MariaDB" in self.host_distro and major_version >= 10:
-            server_uuid_query = "SELECT @@server_id"
-        self.server_uuid = self.main_db_connection.fetch_value_from_field(server_uuid_query)
+    def connections_healthy(self):
+        return (
+            self.main_db_connection is not None
+            and self.main_db_connection.is_healthy()
+            and self.secondary_db_connection.is_healthy()
+        )
+
+    def connection_lost(self, error: ManualException):
+        if not self.disconnected_time:
+            self.disconnected_time = datetime.now()
+
+        self.disconnected_reason = error.reason or error.message
+        self.reconnect_attempts += 1
+
+        # Back off exponentially with some jitter so a host that's coming back up isn't hammered by every Dolphie
+        # watching it at the same moment
+        delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** (self.reconnect_attempts - 1))
+        self.reconnect_delay = delay * random.uniform(0.8, 1.2)
+
+    def db_connect(self):
+        for connection in (self.main_db_connection, self.secondary_db_connection):
+            if connection:
+                connection.close()
+
+        # Both connections are opened at the same time (along with reading the host cache file on first connect)
+        # since each one costs a few round trips which add up quickly on a high latency link
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            main_db_connection = executor.submit(self.connect_database)
+            secondary_db_connection = executor.submit(self.connect_database)
+
+            host_cache_file = None
+            if not self.host_cache_file_loaded:
+                host_cache_file = executor.submit(self.load_host_cache_file)
+
+            self.main_db_connection = main_db_connection.result()
+            self.secondary_db_connection = secondary_db_connection.result()
+            if host_cache_file:
+                host_cache_file.result()
+                self.host_cache_file_loaded = True
+
+        self.main_db_connection_id = self.main_db_connection.connection_id
+        self.secondary_db_connection_id = self.secondary_db_connection.connection_id
+
+        # The host is probed on every connect, reconnects included. A failover behind the same endpoint (cluster
+        # endpoint, VIP, proxy) can land on a different server with the same version, and reusing what was known
+        # about the old one would show the wrong host and mix the new server's metrics into the old one's history.
+        # Checking its identity would take a round trip anyway, which is all the probe costs
+        capabilities = self.probe_server_capabilities(self.main_db_connection)
+
+        self.mysql_host = capabilities.hostname
+        self.mysql_version = capabilities.mysql_version
+        self.host_distro = capabilities.host_distro
+        self.host_is_rds = capabilities.host_is_rds
+        self.host_is_cluster = capabilities.host_is_cluster
+        self.server_uuid = capabilities.server_uuid
+
+        self.performance_schema_enabled = capabilities.performance_schema
+        if not self.performance_schema_enabled:
+            self.use_performance_schema = False
+        elif not self.use_processlist:
+            self.use_performance_schema = True
+
+        self.load_metric_history()
+
+        # Reconnecting to the same host keeps the history of its processlist
+        if self.processlist_history_threads and not self.processlist_history:
+            self.processlist_history = ProcesslistHistory(self.processlist_history_threads)
+
+        if self.slow_query_threshold and not self.slow_query_capture:
+            self.slow_query_capture = SlowQueryCapture(self.slow_query_threshold)
+
+        self.collection_plan = CollectionPlan.build(capabilities, self.heartbeat_table, self.command_max_execution_time)
+        if self.collection_plan.command_max_execution_time_query:
+            self.secondary_db_connection.execute(
+                self.collection_plan.command_max_execution_time_query, ignore_error=True
+            )
 
         # Add host to quick switch hosts file if it doesn't exist
         with open(self.quick_switch_hosts_file, "a+") as file:
@@ -241,6 +376,78 @@ class Dolphie:
                 file.write(host)
                 self.quick_switch_hosts.append(host[:-1])  # remove the \n
 
+    def kill_threads(self, thread_ids: list):
+        # A KILL per thread one after another on the secondary connection takes far too long when thousands of
+        # threads need clearing, so they're split across connections of their own and killed at the same time
+        kill_query = "CALL mysql.rds_kill(%s)" if self.host_is_rds else "KILL %s"
+        total = len(thread_ids)
+        batches = [thread_ids[i :: self.kill_connections] for i in range(min(self.kill_connections, total))]
+
+        lock = threading.Lock()
+        progress = {"killed": 0, "failed": 0, "error": None, "last_update": time.monotonic()}
+
+        def finished(count: int, error: ManualException = None):
+            with lock:
+                if error:
+                    progress["failed"] += count
+                    progress["error"] = progress["error"] or error.reason or error.message
+                else:
+                    progress["killed"] += count
+
+                done = progress["killed"] + progress["failed"]
+                update = time.monotonic() - progress["last_update"] >= 0.25 and done < total
+                if update:
+                    progress["last_update"] = time.monotonic()
+
+            if update:
+                self.app.call_from_thread(
+                    self.update_footer,
+                    "Killing threads... [#91abec]%s[/#91abec]/[#91abec]%s[/#91abec]" % (done, total),
+                    temporary=False,
+                )
+
+        def kill_batch(batch: list):
+            try:
+                database = self.connect_database()
+            except ManualException as e:
+                finished(len(batch), e)
+                return
+
+            try:
+                for thread_id in batch:
+                    try:
+                        database.execute(kill_query, (int(thread_id),))
+                        finished(1)
+                    except ManualException as e:
+                        finished(1, e)
+            finally:
+                database.close()
+
+        with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+            list(executor.map(kill_batch, batches))
+
+        if total == 1:
+            if progress["failed"]:
+                summary = "[b][indian_red]Error killing query[/b]: %s" % progress["error"]
+            else:
+                summary = "Killed thread [b #91abec]%s[/b #91abec]" % thread_ids[0]
+        else:
+            summary = "Killed [#91abec]%s[/#91abec] of [#91abec]%s[/#91abec] threads" % (progress["killed"], total)
+
+        if total > 1 and progress["failed"]:
+            summary += ", [indian_red]%s failed[/indian_red] (%s)" % (progress["failed"], progress["error"])
+
+        self.app.call_from_thread(self.update_footer, summary)
+
+    def flush_slow_queries(self):
+        # Returns whether they were written and what to show in the footer
+        try:
+            flushed = self.slow_query_capture.flush(self.slow_query_file)
+        except OSError as e:
+            return False, f"[indian_red]Failed to write slow queries to {self.slow_query_file}: {e}"
+
+        return True, f"Wrote [#91abec]{flushed}[/#91abec] slow queries to {self.slow_query_file}"
+
     def command_input_to_variable(self, return_data):
         variable = return_data[0]
         value = return_data[1]
@@ -256,8 +463,62 @@ class Dolphie:
         if panel_name not in ["graphs"]:
             self.app.refresh_panel(panel_name, toggled=True)
 
+    def run_command(self, command):
+        # Only the command itself may be killed. Until it holds the lock, the secondary connection could be running
+        # something else (an EXPLAIN, an event log page) that a KILL QUERY would stop instead
+        state = {"cancelled": False, "running": False}
+        state_lock = threading.Lock()
+
+        def loader():
+            with self.secondary_db_connection.lock:
+                with state_lock:
+                    # The command could have been cancelled while waiting on a previous one to finish
+                    if state["cancelled"]:
+                        return None
+
+                    state["running"] = True
+
+                try:
+                    return command()
+                finally:
+                    with state_lock:
+                        state["running"] = False
+
+        def is_running():
+            with state_lock:
+                return state["running"]
+
+        def cancel():
+            with state_lock:
+                state["cancelled"] = True
+                running = state["running"]
+
+            # Use a separate thread since the kill needs its own connection to the host
+            if running:
+                threading.Thread(target=self.kill_command_query, args=(is_running,), daemon=True).start()
+
+        self.app.push_screen(
+            CommandScreen(self.app_version, f"{self.mysql_host}:{self.port}", loader=loader, cancel=cancel)
+        )
+
+    def kill_command_query(self, is_running):
+        try:
+            db = Database(self.host, self.user, self.password, self.socket, self.port, self.ssl)
+
+            # Connecting takes a moment, so make sure the command didn't finish in the meantime
+            if is_running():
+                if self.host_is_rds:
+                    db.execute("CALL mysql.rds_kill_query(%s)" % self.secondary_db_connection_id, ignore_error=True)
+                else:
+                    db.execute("KILL QUERY %s" % self.secondary_db_connection_id, ignore_error=True)
+
+            db.connection.close()
+        except ManualException:
+            pass
+
     def capture_key(self, key):
         screen_data = None
+        command = None
 
         if not self.main_db_connection:
             self.update_footer("Database connection must be established before using commands")
@@ -273,10 +534,26 @@ class Dolphie:
             self.toggle_panel("replication")
         elif key == "4":
             self.toggle_panel("graphs")
-            self.app.update_graphs("dml")
+            if self.display_graphs_panel:
+                self.app.call_later(self.app.show_graphs_panel)
+        elif key == "5":
+            locks_hidden = not self.app.query_one("#panel_locks").display
+            if locks_hidden and self.collection_plan and not self.collection_plan.lock_waits_query:
+                self.update_footer(LOCK_WAITS_UNAVAILABLE)
+            else:
+                self.toggle_panel("locks")
+        elif key == "6":
+            self.toggle_panel("transactions")
         elif key == "grave_accent":
 
             def command_get_input(data):
+                # What was captured from this host is saved first, and if it can't be the host isn't switched
+                if self.slow_query_capture:
+                    flushed, message = self.flush_slow_queries()
+                    if not flushed:
+                        self.update_footer(message)
+                        return
+
                 host_port = data["host"].split(":")
                 self.host = host_port[0]
                 self.port = int(host_port[1]) if len(host_port) > 1 else 3306
@@ -306,51 +583,12 @@ class Dolphie:
             self.host_filter = ""
             self.query_time_filter = ""
             self.query_filter = ""
+            self.fingerprint_filter = ""
 
             self.update_footer("Cleared all filters")
 
         elif key == "d":
-            tables = {}
-            all_tables = []
-
-            db_count = self.secondary_db_connection.execute(MySQLQueries.databases)
-            databases = self.secondary_db_connection.fetchall()
-
-            # Determine how many tables to provide data
-            max_num_tables = 1 if db_count <= 20 else 3
-
-            # Calculate how many databases per table
-            row_per_count = db_count // max_num_tables
-
-            # Create dictionary of tables
-            for table_counter in range(1, max_num_tables + 1):
-                tables[table_counter] = Table(box=box.ROUNDED, show_header=False, style="#52608d")
-                tables[table_counter].add_column("")
-
-            # Loop over databases
-            db_counter = 1
-            table_counter = 1
-
-            # Sort the databases by name
-            for database in databases:
-                tables[table_counter].add_row(database["SCHEMA_NAME"])
-                db_counter += 1
-
-                if db_counter > row_per_count and table_counter < max_num_tables:
-                    table_counter += 1
-                    db_counter = 1
-
-            # Collect table data into an array
-            all_tables = [table_data for table_data in tables.values() if table_data]
-
-            table_grid = Table.grid()
-            table_grid.add_row(*all_tables)
-
-            screen_data = Group(
-                Align.center("[b]Databases[/b]"),
-                Align.center(table_grid),
-                Align.center("Total: [b #91abec]%s[/b #91abec]" % db_count),
-            )
+            command = self.command_databases
 
         elif key == "e":
             if self.is_mysql_version_at_least("8.0"):
@@ -369,9 +607,9 @@ class Dolphie:
                 if filter_name == "user":
                     self.user_filter = next(
                         (
-                            data["user"]
+                            data.user
                             for data in self.processlist_threads_snapshot.values()
-                            if filter_value == data["user"]
+                            if filter_value == data.user
                         ),
                         None,
                     )
@@ -383,9 +621,9 @@ class Dolphie:
                 elif filter_name == "database":
                     self.db_filter = next(
                         (
-                            data["db"]
+                            data.db
                             for data in self.processlist_threads_snapshot.values()
-                            if filter_value == data["db"]
+                            if filter_value == data.db
                         ),
                         None,
                     )
@@ -409,6 +647,21 @@ class Dolphie:
                         return
                 elif filter_name == "query_text":
                     self.query_filter = filter_value
+                elif filter_name == "fingerprint":
+                    self.fingerprint_filter = next(
+                        (
+                            data.digest
+                            for data in self.processlist_threads_snapshot.values()
+                            if filter_value == data.digest
+                        ),
+                        None,
+                    )
+                    if not self.fingerprint_filter:
+                        self.update_footer(
+                            f"[indian_red]Fingerprint[/indian_red] {filter_value}[indian_red] was not found in"
+                            " processlist"
+                        )
+                        return
 
                 self.update_footer("Now filtering %s by [b #91abec]%s[/b #91abec]" % (filter_name, filter_value))
 
@@ -421,6 +674,73 @@ class Dolphie:
                 command_get_input,
             )
 
+        elif key == "g":
+            group_by_options = {
+                None: None,
+                "user": "user",
+                "host": "host",
+                "db": "database",
+                "fingerprint": "query fingerprint",
+            }
+            group_by_keys = list(group_by_options)
+            next_option = (group_by_keys.index(self.processlist_group_by) + 1) % len(group_by_keys)
+
+            self.processlist_group_by = group_by_keys[next_option]
+            self.processlist_expanded_group = None
+            self.processlist_groups = {}
+
+            if self.processlist_group_by:
+                self.update_footer(
+                    "Processlist is now grouped by [b #91abec]%s[/b #91abec]. Press [b #91abec]G[/b #91abec] to"
+                    " expand a group" % group_by_options[self.processlist_group_by]
+                )
+            else:
+                self.update_footer("Processlist is no longer grouped")
+
+        elif key == "G":
+            if not self.processlist_group_by:
+                self.update_footer("[indian_red]Processlist isn't grouped! Press [b]g[/b] to group it first")
+                return
+
+            def command_get_input(group_name):
+                if not group_name:
+                    self.processlist_expanded_group = None
+                    self.update_footer("Collapsed processlist groups")
+                elif group_name in self.processlist_groups:
+                    self.processlist_expanded_group = group_name
+                    self.update_footer(
+                        "Showing threads of group [b #91abec]%s[/b #91abec]. Press [b #91abec]G[/b #91abec] again and"
+                        " leave it blank to collapse" % group_name
+                    )
+                else:
+                    self.update_footer("Group [b #91abec]%s[/b #91abec] does not exist" % group_name)
+
+            self.app.push_screen(
+                CommandModal(message="Specify a group to expand\n[dim](leave blank to collapse)[/dim]"),
+                command_get_input,
+            )
+
+        elif key == "h":
+            if not self.processlist_history:
+                self.update_footer("[indian_red]Processlist history is disabled")
+                return
+
+            def command_get_input(value):
+                if value:
+                    self.app.push_screen(
+                        CommandScreen(
+                            self.app_version, f"{self.mysql_host}:{self.port}", self.create_thread_history(value)
+                        )
+                    )
+
+            self.app.push_screen(
+                CommandModal(
+                    message="Specify a Thread ID or query fingerprint to display the history of",
+                    processlist_data=self.processlist_threads_snapshot,
+                ),
+                command_get_input,
+            )
+
         elif key == "i":
             if self.show_idle_threads:
                 self.show_idle_threads = False
@@ -441,15 +761,9 @@ class Dolphie:
                     return
 
                 if thread_id in self.processlist_threads_snapshot:
-                    try:
-                        if self.host_is_rds:
-                            self.secondary_db_connection.cursor.execute("CALL mysql.rds_kill(%s)" % thread_id)
-                        else:
-                            self.secondary_db_connection.cursor.execute("KILL %s" % thread_id)
-
-                        self.update_footer("Killed thread [b #91abec]%s[/b #91abec]" % thread_id)
-                    except Exception as e:
-                        self.update_footer("[b][indian_red]Error killing query[/b]: %s" % e.args[1])
+                    # The secondary connection can be busy with a command for a while so the kill gets a connection
+                    # of its own in the background rather than waiting on it here
+                    threading.Thread(target=self.kill_threads, args=([thread_id],), daemon=True).start()
                 else:
                     self.update_footer("Thread ID [b #91abec]%s[/b #91abec] does not exist" % thread_id)
 
@@ -461,15 +775,10 @@ class Dolphie:
         elif key == "K":
 
             def command_get_input(data):
-                def execute_kill(thread_id):
-                    if self.host_is_rds:
-                        self.secondary_db_connection.cursor.execute("CALL mysql.rds_kill(%s)" % thread_id)
-                    else:
-                        self.secondary_db_connection.cursor.execute("KILL %s" % thread_id)
-
                 kill_type = data[0]
                 kill_value = data[1]
                 include_sleeping_queries = data[2]
+                dry_run = data[3]
 
                 if not kill_value:
                     self.update_footer("[indian_red]You did not specify a %s" % kill_type)
@@ -479,6 +788,8 @@ class Dolphie:
                     key = "user"
                 elif kill_type == "host":
                     key = "host"
+                elif kill_type == "fingerprint":
+                    key = "digest"
                 elif kill_type == "time_range":
                     key = "time"
                     if re.search(r"(\d+-\d+)", kill_value):
@@ -496,30 +807,28 @@ class Dolphie:
                     self.update_footer("[indian_red]Invalid option")
                     return
 
-                threads_killed = 0
                 commands_to_kill = ["Query", "Execute"]
                 if include_sleeping_queries:
                     commands_to_kill.append("Sleep")
 
+                threads_to_kill = []
                 for thread_id, thread in self.processlist_threads_snapshot.items():
-                    try:
-                        if thread["command"] in commands_to_kill:
-                            if kill_type == "time_range":
-                                if thread["time"] >= lower_limit and thread["time"] <= upper_limit:
-                                    execute_kill(thread_id)
-                                    threads_killed += 1
-                            else:
-                                if thread[key] == kill_value:
-                                    execute_kill(thread_id)
-                                    threads_killed += 1
-                    except Exception as e:
-                        self.update_footer("[b][indian_red]Error killing query[/b]: %s" % e.args[1])
-                        return
-
-                if threads_killed:
-                    self.update_footer("Killed [#91abec]%s[/#91abec] threads" % threads_killed)
+                    if thread.command in commands_to_kill:
+                        if kill_type == "time_range":
+                            if thread.time >= lower_limit and thread.time <= upper_limit:
+                                threads_to_kill.append(thread_id)
+                        elif getattr(thread, key) == kill_value:
+                            threads_to_kill.append(thread_id)
+
+                if not threads_to_kill:
+                    self.update_footer("No threads matched")
+                elif dry_run:
+                    self.update_footer("Dry run: [#91abec]%s[/#91abec] threads would be killed" % len(threads_to_kill))
                 else:
-                    self.update_footer("No threads were killed")
+                    self.update_footer(
+                        "Killing [#91abec]%s[/#91abec] threads..." % len(threads_to_kill), temporary=False
+                    )
+                    threading.Thread(target=self.kill_threads, args=(threads_to_kill,), daemon=True).start()
 
             self.app.push_screen(
                 CommandModal(
@@ -531,81 +840,13 @@ class Dolphie:
             )
 
         elif key == "l":
-            deadlock = ""
-            output = re.search(
-                r"------------------------\nLATEST\sDETECTED\sDEADLOCK\n------------------------"
-                "\n(.*?)------------\nTRANSACTIONS",
-                self.secondary_db_connection.fetch_value_from_field(MySQLQueries.innodb_status, "Status"),
-                flags=re.S,
-            )
-            if output:
-                deadlock = output.group(1)
-
-                deadlock = deadlock.replace("***", "[#f1fb82]*****[/#f1fb82]")
-                screen_data = deadlock
-            else:
-                screen_data = Align.center("No deadlock detected")
+            command = self.command_deadlock
 
         elif key == "o":
-            screen_data = self.secondary_db_connection.fetch_value_from_field(MySQLQueries.innodb_status, "Status")
+            command = self.command_innodb_status
 
         elif key == "m":
-            table_line_color = "#52608d"
-
-            table_grid = Table.grid()
-
-            table1 = Table(
-                box=box.ROUNDED,
-                style=table_line_color,
-            )
-
-            header_style = Style(bold=True)
-            table1.add_column("User", header_style=header_style)
-            table1.add_column("Current", header_style=header_style)
-            table1.add_column("Total", header_style=header_style)
-
-            self.secondary_db_connection.execute(MySQLQueries.memory_by_user)
-            data = self.secondary_db_connection.fetchall()
-            for row in data:
-                table1.add_row(
-                    row["user"],
-                    format_sys_table_memory(row["current_allocated"]),
-                    format_sys_table_memory(row["total_allocated"]),
-                )
-
-            table2 = Table(
-                box=box.ROUNDED,
-                style=table_line_color,
-            )
-            table2.add_column("Code Area", header_style=header_style)
-            table2.add_column("Current", header_style=header_style)
-
-            self.secondary_db_connection.execute(MySQLQueries.memory_by_code_area)
-            data = self.secondary_db_connection.fetchall()
-            for row in data:
-                table2.add_row(row["code_area"], format_sys_table_memory(row["current_allocated"]))
-
-            table3 = Table(
-                box=box.ROUNDED,
-                style=table_line_color,
-            )
-            table3.add_column("Host", header_style=header_style)
-            table3.add_column("Current", header_style=header_style)
-            table3.add_column("Total", header_style=header_style)
-
-            self.secondary_db_connection.execute(MySQLQueries.memory_by_host)
-            data = self.secondary_db_connection.fetchall()
-            for row in data:
-                table3.add_row(
-                    self.get_hostname(row["host"]),
-                    format_sys_table_memory(row["current_allocated"]),
-                    format_sys_table_memory(row["total_allocated"]),
-                )
-
-            table_grid.add_row("", Align.center("[b]Memory Allocation[/b]"), "")
-            table_grid.add_row(table1, table3, table2)
-
-            screen_data = Align.center(table_grid)
+            command = self.command_memory
 
         elif key == "p":
             if not self.pause_refresh:
@@ -630,6 +871,20 @@ class Dolphie:
                     self.update_footer("[indian_red]You can't switch to Performance Schema because it isn't enabled")
 
         elif key == "q":
+            if self.slow_query_capture:
+                flushed, message = self.flush_slow_queries()
+                if not flushed:
+
+                    def command_get_input(quit):
+                        if quit:
+                            self.app.exit()
+
+                    self.app.push_screen(
+                        ConfirmModal(f"{message}[/indian_red]\nQuit without saving the slow queries?"),
+                        command_get_input,
+                    )
+                    return
+
             self.app.exit()
 
         elif key == "r":
@@ -646,9 +901,10 @@ class Dolphie:
             )
 
         elif key == "R":
-            self.metric_manager = MetricManager()
-            active_graph = self.app.query_one("#tabbed_content").active
-            self.app.update_graphs(active_graph.split("tab_")[1])
+            self.metric_manager.reset()
+            if self.app.graphs_panel_created:
+                active_graph = self.app.query_one("#tabbed_content").active
+                self.app.update_graphs(active_graph.split("tab_")[1])
             self.update_footer("Metrics have been reset")
 
         elif key == "s":
@@ -664,147 +920,24 @@ class Dolphie:
             def command_get_input(thread_id):
                 if thread_id:
                     if thread_id in self.processlist_threads_snapshot:
-                        thread_data = self.processlist_threads_snapshot[thread_id]
-
-                        table = Table(box=box.ROUNDED, show_header=False, style="#52608d")
-                        table.add_column("")
-                        table.add_column("")
-
-                        table.add_row("[#c5c7d2]Thread ID", str(thread_id))
-                        table.add_row("[#c5c7d2]User", thread_data["user"])
-                        table.add_row("[#c5c7d2]Host", thread_data["host"])
-                        table.add_row("[#c5c7d2]Database", thread_data["db"])
-                        table.add_row("[#c5c7d2]Command", thread_data["command"])
-                        table.add_row("[#c5c7d2]State", thread_data["state"])
-                        table.add_row("[#c5c7d2]Time", thread_data["formatted_time_with_days"])
-                        table.add_row("[#c5c7d2]Rows Locked", thread_data["trx_rows_locked"])
-                        table.add_row("[#c5c7d2]Rows Modified", thread_data["trx_rows_modified"])
-
-                        # Transaction history
-                        transaction_history_title = ""
-                        transaction_history_table = Table(box=box.ROUNDED, style="#52608d")
-                        if self.is_mysql_version_at_least("5.7") and self.use_performance_schema:
-                            query = MySQLQueries.thread_transaction_history.replace(
-                                "$placeholder", str(thread_data["mysql_thread_id"])
-                            )
-                            self.secondary_db_connection.cursor.execute(query)
-                            transaction_history = self.secondary_db_connection.fetchall()
-
-                            if transaction_history:
-                                transaction_history_title = "[b]Transaction History[/b]"
-                                transaction_history_table.add_column("Start Time")
-                                transaction_history_table.add_column("Query")
-
-                                for query in transaction_history:
-                                    formatted_query = ""
-                                    if query["sql_text"]:
-                                        formatted_query = Syntax(
-                                            re.sub(r"\s+", " ", query["sql_text"]),
-                                            "sql",
-                                            line_numbers=False,
-                                            word_wrap=True,
-                                            theme="monokai",
-                                            background_color="#000718",
-                                        )
-
-                                    transaction_history_table.add_row(
-                                        query["start_time"].strftime("%Y-%m-%d %H:%M:%S"), formatted_query
-                                    )
-
-                        if (
-                            "innodb_thread_concurrency" in self.global_variables
-                            and self.global_variables["innodb_thread_concurrency"]
-                        ):
-                            table.add_row("[#c5c7d2]Tickets", thread_data["trx_concurrency_tickets"])
-
-                        table.add_row("", "")
-                        table.add_row("[#c5c7d2]TRX State", thread_data["trx_state"])
-                        table.add_row("[#c5c7d2]TRX Operation", thread_data["trx_operation_state"])
-
-                        query = sqlformat(thread_data["query"], reindent_aligned=True)
-                        query_db = thread_data["db"]
-
-                        if query:
-                            explain_failure = ""
-                            explain_data = ""
-
-                            formatted_query = Syntax(
-                                query,
-                                "sql",
-                                line_numbers=False,
-                                word_wrap=True,
-                                theme="monokai",
-                                background_color="#000718",
-                            )
-
-                            if query_db:
-                                try:
-                                    self.secondary_db_connection.cursor.execute("USE %s" % query_db)
-                                    self.secondary_db_connection.cursor.execute("EXPLAIN %s" % query)
-
-                                    explain_data = self.secondary_db_connection.fetchall()
-                                except pymysql.Error as e:
-                                    explain_failure = (
-                                        "[b indian_red]EXPLAIN ERROR:[/b indian_red] [indian_red]%s" % e.args[1]
-                                    )
-
-                            if explain_data:
-                                explain_table = Table(box=box.ROUNDED, style="#52608d")
-
-                                columns = []
-                                for row in explain_data:
-                                    values = []
-                                    for column, value in row.items():
-                                        # Exclude possbile_keys field since it takes up too much space
-                                        if column == "possible_keys":
-                                            continue
-
-                                        # Don't duplicate columns
-                                        if column not in columns:
-                                            explain_table.add_column(column)
-                                            columns.append(column)
-
-                                        if column == "key" and value is None:
-                                            value = "[b white on red]NO INDEX[/b white on red]"
-
-                                        if column == "rows":
-                                            value = format_number(value)
-
-                                        values.append(str(value))
-
-                                    explain_table.add_row(*values)
-
-                                screen_data = Group(
-                                    Align.center(table),
-                                    "",
-                                    Align.center(formatted_query),
-                                    "",
-                                    Align.center(explain_table),
-                                    "",
-                                    Align.center(transaction_history_title),
-                                    Align.center(transaction_history_table),
-                                )
-                            else:
-                                screen_data = Group(
-                                    Align.center(table),
-                                    "",
-                                    Align.center(formatted_query),
-                                    "",
-                                    Align.center(explain_failure),
-                                    "",
-                                    Align.center(transaction_history_title),
-                                    Align.center(transaction_history_table),
-                                )
-                        else:
-                            screen_data = Group(
-                                Align.center(table),
-                                "",
-                                Align.center(transaction_history_title),
-                                Align.center(transaction_history_table),
-                            )
-
+                        # The screen shows the snapshot data right away and loads the formatted query,
+                        # EXPLAIN and transaction history in the background
                         self.app.push_screen(
-                            CommandScreen(self.app_version, f"{self.mysql_host}:{self.port}", screen_data)
+                            ThreadScreen(
+                                app_version=self.app_version,
+                                host=f"{self.mysql_host}:{self.port}",
+                                db=self.secondary_db_connection,
+                                thread_id=thread_id,
+                                thread_data=self.processlist_threads_snapshot[thread_id],
+                                cache=self.thread_query_cache,
+                                show_tickets=bool(self.global_variables.get("innodb_thread_concurrency")),
+                                show_transaction_history=(
+                                    self.is_mysql_version_at_least("5.7") and self.use_performance_schema
+                                ),
+                                explain_analyze_supported=(
+                                    self.is_mysql_version_at_least("8.0.18") and "MariaDB" not in self.host_distro
+                                ),
+                            )
                         )
                     else:
                         self.update_footer("Thread ID [b #91abec]%s[/b #91abec] does not exist" % thread_id)
@@ -826,9 +959,8 @@ class Dolphie:
                 self.update_footer("Processlist will now only show threads that have an active transaction")
 
         elif key == "u":
-            user_stat_data = self.create_user_stats_table()
-            if user_stat_data:
-                screen_data = Align.center(user_stat_data)
+            if self.performance_schema_enabled:
+                command = self.command_user_stats
             else:
                 self.update_footer(
                     "[b indian_red]Cannot use this command![/b indian_red] It requires Performance Schema to be enabled"
@@ -837,65 +969,21 @@ class Dolphie:
         elif key == "v":
 
             def command_get_input(input_variable):
-                table_grid = Table.grid()
-                table_counter = 1
-                variable_counter = 1
-                row_counter = 1
-                variable_num = 1
-                all_tables = []
-                tables = {}
-                display_global_variables = {}
-
-                variable_data = self.secondary_db_connection.fetch_data("variables")
-                for variable, value in variable_data.items():
-                    if input_variable:
-                        if input_variable in variable:
-                            display_global_variables[variable] = variable_data[variable]
-                    else:
-                        display_global_variables[variable] = variable_data[variable]
-
-                max_num_tables = 1 if len(display_global_variables) <= 50 else 2
-
-                # Create the number of tables we want
-                while table_counter <= max_num_tables:
-                    tables[table_counter] = Table(box=box.ROUNDED, show_header=False, style="#52608d")
-                    tables[table_counter].add_column("")
-                    tables[table_counter].add_column("")
-
-                    table_counter += 1
-
-                # Calculate how many global_variables per table
-                row_per_count = len(display_global_variables) // max_num_tables
-
-                # Loop global_variables
-                for variable, value in display_global_variables.items():
-                    tables[variable_num].add_row("[#c5c7d2]%s" % variable, str(value))
-
-                    if variable_counter == row_per_count and row_counter != max_num_tables:
-                        row_counter += 1
-                        variable_counter = 0
-                        variable_num += 1
-
-                    variable_counter += 1
-
-                # Put all the variable data from dict into an array
-                all_tables = [table_data for table_data in tables.values() if table_data]
-
-                # Add the data into a single tuple for add_row
-                if display_global_variables:
-                    table_grid.add_row(*all_tables)
-                    screen_data = Align.center(table_grid)
-
-                    self.app.push_screen(CommandScreen(self.app_version, f"{self.mysql_host}:{self.port}", screen_data))
-                else:
-                    if input_variable:
-                        self.update_footer("No variable(s) found that match [b #91abec]%s[/b #91abec]" % input_variable)
+                self.run_command(lambda: self.command_variables(input_variable))
 
             self.app.push_screen(
                 CommandModal(message="Specify a variable to wildcard search\n[dim](leave blank for all)[/dim]"),
                 command_get_input,
             )
 
+        elif key == "w":
+            if self.slow_query_capture:
+                self.update_footer(self.flush_slow_queries()[1])
+            else:
+                self.update_footer(
+                    "[indian_red]Slow query capture is disabled! Use [b]--slow-query-threshold[/b] to enable it"
+                )
+
         elif key == "z":
             if self.host_cache:
                 table = Table(box=box.ROUNDED, style="#52608d")
@@ -924,6 +1012,9 @@ class Dolphie:
                 "d": "Display all databases",
                 "e": "Display error log from Performance Schema",
                 "f": "Filter processlist by a supported option",
+                "g": "Group processlist by user, host, database or query fingerprint",
+                "G": "Expand a processlist group to show its threads",
+                "h": "Display the history of a thread or query fingerprint, even after it's gone",
                 "i": "Toggle displaying idle threads",
                 "k": "Kill a thread by its ID",
                 "K": "Kill a thread by a supported option",
@@ -940,6 +1031,7 @@ class Dolphie:
                 "s": "Sort processlist by time in descending/ascending order",
                 "u": "List active connected users and their statistics",
                 "v": "Variable wildcard search sourced from SHOW GLOBAL VARIABLES",
+                "w": "Write the slow queries captured from the processlist to the slow query file",
                 "z": "Display all entries in the host cache",
             }
 
@@ -955,6 +1047,8 @@ class Dolphie:
                 "2": "Show/hide Processlist",
                 "3": "Show/hide Replication/Replicas",
                 "4": "Show/hide Graph Metrics",
+                "5": "Show/hide Lock Waits/Blocking Chains",
+                "6": "Show/hide Transactions",
             }
             table_panels = Table(box=box.HORIZONTALS, style=table_line_color, title="Panels", title_style="bold")
             table_panels.add_column("Key", justify="center", style="b #91abec")
@@ -1008,9 +1102,194 @@ class Dolphie:
                 ),
             )
 
-        if screen_data:
+        if command:
+            self.run_command(command)
+        elif screen_data:
             self.app.push_screen(CommandScreen(self.app_version, f"{self.mysql_host}:{self.port}", screen_data))
 
+    def command_databases(self):
+        tables = {}
+        all_tables = []
+
+        db_count = self.secondary_db_connection.execute(MySQLQueries.databases)
+        databases = self.secondary_db_connection.fetchall()
+
+        # Determine how many tables to provide data
+        max_num_tables = 1 if db_count <= 20 else 3
+
+        # Calculate how many databases per table
+        row_per_count = db_count // max_num_tables
+
+        # Create dictionary of tables
+        for table_counter in range(1, max_num_tables + 1):
+            tables[table_counter] = Table(box=box.ROUNDED, show_header=False, style="#52608d")
+            tables[table_counter].add_column("")
+
+        # Loop over databases
+        db_counter = 1
+        table_counter = 1
+
+        # Sort the databases by name
+        for database in databases:
+            tables[table_counter].add_row(database["SCHEMA_NAME"])
+            db_counter += 1
+
+            if db_counter > row_per_count and table_counter < max_num_tables:
+                table_counter += 1
+                db_counter = 1
+
+        # Collect table data into an array
+        all_tables = [table_data for table_data in tables.values() if table_data]
+
+        table_grid = Table.grid()
+        table_grid.add_row(*all_tables)
+
+        return Group(
+            Align.center("[b]Databases[/b]"),
+            Align.center(table_grid),
+            Align.center("Total: [b #91abec]%s[/b #91abec]" % db_count),
+        )
+
+    def command_deadlock(self):
+        innodb_status = self.innodb_status_parser.parse(
+            self.secondary_db_connection.fetch_value_from_field(MySQLQueries.innodb_status, "Status")
+        )
+
+        deadlock = innodb_status.latest_deadlock
+        if deadlock:
+            return deadlock.replace("***", "[#f1fb82]*****[/#f1fb82]")
+
+        return Align.center("No deadlock detected")
+
+    def command_innodb_status(self):
+        innodb_status = self.innodb_status_parser.parse(
+            self.secondary_db_connection.fetch_value_from_field(MySQLQueries.innodb_status, "Status")
+        )
+
+        return Group(
+            Align.center(self.create_innodb_status_table(innodb_status)),
+            "",
+            innodb_status.raw,
+        )
+
+    def command_memory(self):
+        table_line_color = "#52608d"
+
+        table_grid = Table.grid()
+
+        table1 = Table(
+            box=box.ROUNDED,
+            style=table_line_color,
+        )
+
+        header_style = Style(bold=True)
+        table1.add_column("User", header_style=header_style)
+        table1.add_column("Current", header_style=header_style)
+        table1.add_column("Total", header_style=header_style)
+
+        self.secondary_db_connection.execute(MySQLQueries.memory_by_user)
+        data = self.secondary_db_connection.fetchall()
+        for row in data:
+            table1.add_row(
+                row["user"],
+                format_sys_table_memory(row["current_allocated"]),
+                format_sys_table_memory(row["total_allocated"]),
+            )
+
+        table2 = Table(
+            box=box.ROUNDED,
+            style=table_line_color,
+        )
+        table2.add_column("Code Area", header_style=header_style)
+        table2.add_column("Current", header_style=header_style)
+
+        self.secondary_db_connection.execute(MySQLQueries.memory_by_code_area)
+        data = self.secondary_db_connection.fetchall()
+        for row in data:
+            table2.add_row(row["code_area"], format_sys_table_memory(row["current_allocated"]))
+
+        table3 = Table(
+            box=box.ROUNDED,
+            style=table_line_color,
+        )
+        table3.add_column("Host", header_style=header_style)
+        table3.add_column("Current", header_style=header_style)
+        table3.add_column("Total", header_style=header_style)
+
+        self.secondary_db_connection.execute(MySQLQueries.memory_by_host)
+        data = self.secondary_db_connection.fetchall()
+        for row in data:
+            table3.add_row(
+                self.get_hostname(row["host"]),
+                format_sys_table_memory(row["current_allocated"]),
+                format_sys_table_memory(row["total_allocated"]),
+            )
+
+        table_grid.add_row("", Align.center("[b]Memory Allocation[/b]"), "")
+        table_grid.add_row(table1, table3, table2)
+
+        return Align.center(table_grid)
+
+    def command_user_stats(self):
+        user_stat_data = self.create_user_stats_table()
+        if user_stat_data:
+            return Align.center(user_stat_data)
+
+        return Align.center("\nThere are currently no users connected")
+
+    def command_variables(self, input_variable):
+        table_grid = Table.grid()
+        table_counter = 1
+        variable_counter = 1
+        row_counter = 1
+        variable_num = 1
+        all_tables = []
+        tables = {}
+        display_global_variables = {}
+
+        variable_data = self.secondary_db_connection.fetch_data("variables")
+        for variable, value in variable_data.items():
+            if input_variable:
+                if input_variable in variable:
+                    display_global_variables[variable] = variable_data[variable]
+            else:
+                display_global_variables[variable] = variable_data[variable]
+
+        if not display_global_variables:
+            return Align.center("\nNo variable(s) found that match [b #91abec]%s[/b #91abec]" % input_variable)
+
+        max_num_tables = 1 if len(display_global_variables) <= 50 else 2
+
+        # Create the number of tables we want
+        while table_counter <= max_num_tables:
+            tables[table_counter] = Table(box=box.ROUNDED, show_header=False, style="#52608d")
+            tables[table_counter].add_column("")
+            tables[table_counter].add_column("")
+
+            table_counter += 1
+
+        # Calculate how many global_variables per table
+        row_per_count = len(display_global_variables) // max_num_tables
+
+        # Loop global_variables
+        for variable, value in display_global_variables.items():
+            tables[variable_num].add_row("[#c5c7d2]%s" % variable, str(value))
+
+            if variable_counter == row_per_count and row_counter != max_num_tables:
+                row_counter += 1
+                variable_counter = 0
+                variable_num += 1
+
+            variable_counter += 1
+
+        # Put all the variable data from dict into an array
+        all_tables = [table_data for table_data in tables.values() if table_data]
+
+        # Add the data into a single tuple for add_row
+        table_grid.add_row(*all_tables)
+
+        return Align.center(table_grid)
+
     def create_user_stats_table(self):
         table = Table(header_style="bold white", box=box.ROUNDED, style="#52608d")
 
@@ -1070,6 +1349,115 @@ class Dolphie:
 
         return table if user_stats else False
 
+    def create_thread_history(self, value):
+        timelines = self.processlist_history.find(value)
+        if not timelines:
+            return Align.center("\nThere is no history of thread or query fingerprint [b #91abec]%s" % value)
+
+        renderables = []
+
+        fingerprint = self.processlist_history.get_fingerprint(value)
+        if fingerprint:
+            renderables.append(
+                Align.center("[b]Query fingerprint[/b] [#91abec]%s[/#91abec]\n%s\n" % (value, fingerprint))
+            )
+
+        for timeline in timelines[:25]:
+            table_thread = Table(box=box.ROUNDED, show_header=False, style="#52608d")
+            table_thread.add_column("")
+            table_thread.add_column("")
+
+            table_thread.add_row("[#c5c7d2]Thread ID", timeline.thread_id)
+            table_thread.add_row("[#c5c7d2]User", timeline.user)
+            table_thread.add_row("[#c5c7d2]Host", timeline.host)
+            table_thread.add_row("[#c5c7d2]Database", timeline.db)
+            table_thread.add_row("[#c5c7d2]First Seen", timeline.first_seen.strftime("%Y-%m-%d %H:%M:%S"))
+            table_thread.add_row("[#c5c7d2]Last Seen", timeline.last_seen.strftime("%Y-%m-%d %H:%M:%S"))
+            table_thread.add_row(
+                "[#c5c7d2]Seen For", format_time((timeline.last_seen - timeline.first_seen).total_seconds())
+            )
+            table_thread.add_row(
+                "[#c5c7d2]Disappeared",
+                timeline.disappeared.strftime("%Y-%m-%d %H:%M:%S") if timeline.disappeared else "Still running",
+            )
+
+            table_transitions = Table(header_style="bold white", box=box.ROUNDED, style="#52608d")
+            table_transitions.add_column("Seen At")
+            table_transitions.add_column("Time")
+            table_transitions.add_column("Command")
+            table_transitions.add_column("State")
+            table_transitions.add_column("Fingerprint")
+
+            # The worker keeps adding to the timeline while this is built
+            for seen_at, query_time, command, state, digest in list(timeline.transitions):
+                table_transitions.add_row(
+                    seen_at.strftime("%H:%M:%S"), format_time(query_time), command, state, digest
+                )
+
+            table_grid = Table.grid(padding=(0, 2))
+            table_grid.add_row(table_thread, table_transitions)
+            renderables.append(Align.center(table_grid))
+
+        if len(timelines) > 25:
+            renderables.append(Align.center("Only the 25 most recent of %s threads are shown" % len(timelines)))
+
+        return Group(*renderables)
+
+    def create_innodb_status_table(self, innodb_status):
+        table_grid = Table.grid()
+
+        sections = {
+            "Semaphores": {
+                "Reservations": format_number(innodb_status.semaphores.reservation_count),
+                "Signals": format_number(innodb_status.semaphores.signal_count),
+                "OS Waits": format_number(innodb_status.semaphores.os_waits),
+                "Spin Waits": format_number(innodb_status.semaphores.spin_waits),
+            },
+            "Transactions": {
+                "Trx ID Counter": str(innodb_status.transactions.trx_id_counter),
+                "History List": format_number(innodb_status.transactions.history_list_length),
+                "Active": format_number(innodb_status.transactions.active_transactions),
+            },
+            "File I/O": {
+                "Pending Reads": format_number(innodb_status.file_io.pending_reads),
+                "Pending Writes": format_number(innodb_status.file_io.pending_writes),
+                "Pending Log Fsync": format_number(innodb_status.file_io.pending_log_fsyncs),
+                "Pending BP Fsync": format_number(innodb_status.file_io.pending_buffer_pool_fsyncs),
+            },
+            "Log": {
+                "LSN": str(innodb_status.log.log_sequence_number),
+                "Checkpoint Age": format_bytes(innodb_status.log.checkpoint_age),
+                "Pending Flushes": format_number(innodb_status.log.pending_log_flushes),
+                "I/Os Done": format_number(innodb_status.log.log_ios),
+            },
+            "Buffer Pool": {
+                "Free Buffers": format_number(innodb_status.buffer_pool.free_buffers),
+                "Modified Pages": format_number(innodb_status.buffer_pool.modified_pages),
+                "Pending Reads": format_number(innodb_status.buffer_pool.pending_reads),
+                "Pages Read": format_number(innodb_status.buffer_pool.pages_read),
+            },
+            "Row Operations": {
+                "Inside InnoDB": format_number(innodb_status.row_operations.queries_inside),
+                "In Queue": format_number(innodb_status.row_operations.queries_in_queue),
+                "Read Views": format_number(innodb_status.row_operations.read_views),
+            },
+        }
+
+        tables = []
+        for title, data in sections.items():
+            table = Table(box=box.ROUNDED, show_header=False, style="#52608d", title=title, title_style="bold")
+            table.add_column("")
+            table.add_column("")
+
+            for label, value in data.items():
+                table.add_row(f"[#c5c7d2]{label}", value)
+
+            tables.append(table)
+
+        table_grid.add_row(*tables)
+
+        return table_grid
+
     def load_host_cache_file(self):
         if os.path.exists(self.host_cache_file):
             with open(self.host_cache_file) as file:
@@ -1089,6 +1477,37 @@ class Dolphie:
 
                     self.host_cache_from_file[host] = hostname
 
+    def load_metric_history(self):
+        if not self.metric_history_hours or not self.server_uuid:
+            return
+
+        # MariaDB only gives us server_id which isn't unique across hosts so the hostname is added to it
+        history_key = str(self.server_uuid)
+        if "MariaDB" in self.host_distro:
+            history_key = f"{self.mysql_host}_{history_key}"
+        history_file = os.path.join(self.metric_history_dir, re.sub(r"[^\w.-]", "_", history_key) + ".metrics")
+
+        # Reconnecting to the same host keeps using the history that's already loaded
+        metric_manager = self.metric_manager
+        if metric_manager.history:
+            if metric_manager.history.path == history_file:
+                return
+
+            metric_manager.close_history()
+
+        history_seconds = self.metric_history_hours * 3600
+        try:
+            history = MetricHistory(
+                history_file, list(metric_manager.store.columns), capacity=history_seconds, retention=history_seconds
+            )
+        except OSError as e:
+            self.app.call_from_thread(
+                self.update_footer, f"[indian_red]Metric history is disabled, failed to open {history_file}: {e}"
+            )
+            return
+
+        metric_manager.load_history(history)
+
     def get_hostname(self, host):
         if host in self.host_cache:
             return self.host_cache[host]
@@ -1108,19 +1527,18 @@ class Dolphie:
         return hostname
 
     def massage_metrics_data(self):
-        if self.is_mysql_version_at_least("8.0"):
-            # If we're using MySQL 8, we need to fetch the checkpoint age from the performance schema if it's not
-            # available in global status
-            if not self.global_status.get("Innodb_checkpoint_age"):
-                self.global_status["Innodb_checkpoint_age"] = self.main_db_connection.fetch_value_from_field(
-                    MySQLQueries.checkpoint_age, "checkpoint_age"
-                )
+        # If we're using MySQL 8, we need to fetch the checkpoint age from the performance schema if it's not
+        # available in global status
+        if self.collection_plan.checkpoint_age and not self.global_status.get("Innodb_checkpoint_age"):
+            self.global_status["Innodb_checkpoint_age"] = self.main_db_connection.fetch_value_from_field(
+                MySQLQueries.checkpoint_age, "checkpoint_age"
+            )
 
-            if self.is_mysql_version_at_least("8.0.30"):
-                active_redo_logs_count = self.main_db_connection.fetch_value_from_field(
-                    MySQLQueries.active_redo_logs, "count"
-                )
-                self.global_status["Active_redo_log_count"] = active_redo_logs_count
+        if self.collection_plan.active_redo_logs:
+            active_redo_logs_count = self.main_db_connection.fetch_value_from_field(
+                MySQLQueries.active_redo_logs, "count"
+            )
+            self.global_status["Active_redo_log_count"] = active_redo_logs_count
 
         # If the server doesn't support Innodb_lsn_current, use Innodb_os_log_written instead
         # which has less precision, but it's good enough
@@ -1128,23 +1546,17 @@ class Dolphie:
             self.global_status["Innodb_lsn_current"] = self.global_status["Innodb_os_log_written"]
 
     def fetch_replication_data(self, replica_cursor=None):
-        if self.heartbeat_table:
-            query = MySQLQueries.heartbeat_replica_lag
-            replica_lag_source = "HB"
-        elif self.is_mysql_version_at_least("8.0") and self.performance_schema_enabled:
-            query = MySQLQueries.ps_replica_lag
-            replica_lag_source = "PS"
-        else:
-            query = MySQLQueries.replication_status
-            replica_lag_source = None
+        plan = self.collection_plan
+        query = plan.replica_lag_query
+        replica_lag_source = plan.replica_lag_source
 
         if replica_cursor:
             replica_cursor.execute(query)
-            replica_lag_data = replica_cursor.fetchone()
+            replica_lag_data = plan.map_replication_status(replica_cursor.fetchone())
         else:
             # Determine if this server is a replica or not
-            self.main_db_connection.execute(MySQLQueries.replication_status)
-            replica_lag_data = self.main_db_connection.fetchone()
+            self.main_db_connection.execute(plan.replication_status_query)
+            replica_lag_data = plan.map_replication_status(self.main_db_connection.fetchone())
             self.replication_status = replica_lag_data
 
             if self.replication_status:
@@ -1156,9 +1568,9 @@ class Dolphie:
                 # If we're using MySQL 8, fetch the replication applier status data
                 self.replication_applier_status = None
                 if (
-                    self.is_mysql_version_at_least("8.0")
+                    plan.replication_applier_status
                     and self.display_replication_panel
-                    and self.global_variables.get("slave_parallel_workers", 0) > 1
+                    and self.global_variables.get(plan.parallel_workers_variable, 0) > 1
                 ):
                     self.main_db_connection.execute(MySQLQueries.replication_applier_status)
                     self.replication_applier_status = self.main_db_connection.fetchall()
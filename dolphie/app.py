@@ -8,6 +8,8 @@
 import os
 import re
 import sys
+import threading
+import time
 from argparse import ArgumentParser, RawTextHelpFormatter
 from configparser import ConfigParser
 from datetime import datetime
@@ -16,12 +18,21 @@ from urllib.parse import urlparse
 import dolphie.Modules.MetricManager as MetricManager
 import myloginpath
 from dolphie import Dolphie
+from dolphie.Modules.Functions import format_number
 from dolphie.Modules.ManualException import ManualException
 from dolphie.Modules.Queries import MySQLQueries
-from dolphie.Panels import dashboard_panel, processlist_panel, replication_panel
+from dolphie.Panels import (
+    dashboard_panel,
+    locks_panel,
+    processlist_panel,
+    replication_panel,
+    transactions_panel,
+)
 from dolphie.Widgets.topbar import TopBar
+from rich.align import Align
 from rich.console import Console
 from rich.prompt import Prompt
+from rich.table import Table
 from rich.traceback import Traceback
 from textual import events, on, work
 from textual.app import App, ComposeResult
@@ -31,6 +42,7 @@ from textual.widgets import (
     DataTable,
     Label,
     LoadingIndicator,
+    Select,
     Sparkline,
     Static,
     Switch,
@@ -239,6 +251,57 @@ Environment variables support these options:
         default=False,
         help="Start with using Processlist instead of Performance Schema for listing queries",
     )
+    parser.add_argument(
+        "--metric-history-hours",
+        dest="metric_history_hours",
+        default=0,
+        type=int,
+        help=(
+            "Save the graph metrics of each host to disk and load the last N hours of them when connecting so "
+            "graphs survive restarts and host switches. Each hour uses about 1 MB per host [default: off]"
+        ),
+    )
+    parser.add_argument(
+        "--metric-history-dir",
+        dest="metric_history_dir",
+        type=str,
+        help="Directory to save the metric history of each host in [default: ~/dolphie_metric_history]",
+    )
+    parser.add_argument(
+        "--processlist-history",
+        dest="processlist_history_threads",
+        default=2000,
+        type=int,
+        help=(
+            "How many threads to remember the history of so they can still be looked at once they're gone. Threads "
+            "that are still running are always kept on top of it. Each one uses about 1 KB [default: 2000, 0 to "
+            "disable]"
+        ),
+    )
+    parser.add_argument(
+        "--slow-query-threshold",
+        dest="slow_query_threshold",
+        default=0,
+        type=int,
+        help=(
+            "Capture queries from the processlist that run for at least this many seconds, as a lightweight "
+            "alternative to the slow log. They're written to the slow query file when pressing w, switching hosts "
+            "or quitting [default: off]"
+        ),
+    )
+    parser.add_argument(
+        "--slow-query-file",
+        dest="slow_query_file",
+        type=str,
+        help="JSON Lines file to append captured slow queries to [default: ~/dolphie_slow_queries.jsonl]",
+    )
+    parser.add_argument(
+        "--no-update-check",
+        dest="no_update_check",
+        action="store_true",
+        default=False,
+        help="Don't check PyPI for a newer version of Dolphie when starting",
+    )
     parser.add_argument(
         "-V", "--version", action="version", version=dolphie.app_version, help="Display version and exit"
     )
@@ -369,10 +432,31 @@ Environment variables support these options:
     if parameter_options["quick_switch_hosts_file"]:
         dolphie.quick_switch_hosts_file = parameter_options["quick_switch_hosts_file"]
 
+    dolphie.metric_history_dir = f"{home_dir}/dolphie_metric_history"
+    if parameter_options["metric_history_dir"]:
+        dolphie.metric_history_dir = parameter_options["metric_history_dir"]
+
+    if parameter_options["metric_history_hours"] < 0:
+        sys.exit(console.print("Metric history hours must be a positive number"))
+    dolphie.metric_history_hours = parameter_options["metric_history_hours"]
+
+    if parameter_options["processlist_history_threads"] < 0:
+        sys.exit(console.print("Processlist history must be a positive number"))
+    dolphie.processlist_history_threads = parameter_options["processlist_history_threads"]
+
+    if parameter_options["slow_query_threshold"] < 0:
+        sys.exit(console.print("Slow query threshold must be a positive number"))
+    dolphie.slow_query_threshold = parameter_options["slow_query_threshold"]
+
+    dolphie.slow_query_file = f"{home_dir}/dolphie_slow_queries.jsonl"
+    if parameter_options["slow_query_file"]:
+        dolphie.slow_query_file = parameter_options["slow_query_file"]
+
     dolphie.show_trxs_only = parameter_options["show_trxs_only"]
     dolphie.show_additional_query_columns = parameter_options["show_additional_query_columns"]
     dolphie.use_processlist = parameter_options["use_processlist"]
     dolphie.hide_dashboard = parameter_options["hide_dashboard"]
+    dolphie.update_check = not parameter_options["no_update_check"]
 
     if os.path.exists(dolphie.quick_switch_hosts_file):
         with open(dolphie.quick_switch_hosts_file, "r") as file:
@@ -389,6 +473,8 @@ class DolphieApp(App):
         self.dolphie = dolphie
         dolphie.app = self
 
+        self.graphs_panel_created = False
+
         self.console.set_window_title(self.TITLE)
 
     @work(exclusive=True, thread=True)
@@ -402,9 +488,15 @@ class DolphieApp(App):
             dolphie.metric_manager.update_metrics_with_last_value()
 
         try:
-            if not dolphie.main_db_connection or not dolphie.main_db_connection.connection.open:
+            if not dolphie.connections_healthy():
                 dolphie.db_connect()
 
+                if dolphie.disconnected_time:
+                    # Rates across the outage are meaningless (and counters start over if the host restarted), so
+                    # the first refresh only gathers the values to calculate the next one from
+                    dolphie.metric_manager.last_values = {}
+                    self.call_from_thread(self.connection_restored)
+
             dolphie.worker_start_time = datetime.now()
             dolphie.worker_job_time = (dolphie.worker_start_time - dolphie.worker_previous_start_time).total_seconds()
             dolphie.worker_previous_start_time = dolphie.worker_start_time
@@ -418,14 +510,33 @@ class DolphieApp(App):
             dolphie.fetch_replication_data()
             dolphie.massage_metrics_data()
 
+            # SHOW ENGINE INNODB STATUS isn't cheap, so only collect it when the graphs can be seen
+            if dolphie.display_graphs_panel:
+                innodb_status = dolphie.innodb_status_parser.parse(
+                    dolphie.main_db_connection.fetch_value_from_field(MySQLQueries.innodb_status, "Status")
+                )
+                dolphie.innodb_status_metrics = innodb_status.metrics
+            else:
+                dolphie.innodb_status_metrics = {}
+
             if dolphie.display_dashboard_panel:
-                dolphie.binlog_status = dolphie.main_db_connection.fetch_data("binlog_status")
+                dolphie.main_db_connection.execute(dolphie.collection_plan.binlog_status_query)
+                dolphie.binlog_status = dolphie.main_db_connection.fetchone()
 
             if dolphie.display_replication_panel:
                 dolphie.replica_tables = replication_panel.fetch_replica_table_data(dolphie)
 
             if dolphie.display_processlist_panel:
-                dolphie.processlist_threads = processlist_panel.fetch_data(dolphie)
+                dolphie.processlist_threads, dolphie.processlist_groups = processlist_panel.fetch_data(dolphie)
+
+                if dolphie.processlist_history:
+                    dolphie.processlist_history.record(dolphie.worker_start_time, dolphie.processlist_threads)
+
+            if dolphie.display_locks_panel:
+                dolphie.lock_chains = locks_panel.fetch_data(dolphie)
+
+            if dolphie.display_transactions_panel:
+                dolphie.transactions = transactions_panel.fetch_data(dolphie)
 
             # If we're not displaying the replication panel, close all replica connections
             if not dolphie.display_replication_panel and dolphie.replica_connections:
@@ -442,16 +553,29 @@ class DolphieApp(App):
                 global_variables=dolphie.global_variables,
                 global_status=dolphie.global_status,
                 innodb_metrics=dolphie.innodb_metrics,
+                innodb_status=dolphie.innodb_status_metrics,
                 replication_status=dolphie.replication_status,
                 replication_lag=dolphie.replica_lag,
             )
         except ManualException as e:
-            self.exit(message=e.output())
+            # Losing the connection once we've been connected is treated as temporary so failovers and network blips
+            # don't end the session and its history. Anything else, including failing to connect at all, is fatal
+            if dolphie.collection_plan and not (
+                dolphie.main_db_connection.connection.open and dolphie.secondary_db_connection.connection.open
+            ):
+                dolphie.connection_lost(e)
+            else:
+                self.exit(message=e.output())
 
     def on_worker_state_changed(self, event: Worker.StateChanged):
         if event.state == WorkerState.SUCCESS:
             dolphie = self.dolphie
 
+            if dolphie.disconnected_time:
+                self.show_reconnecting()
+                self.set_timer(dolphie.reconnect_delay, self.worker_fetch_data)
+                return
+
             # Skip this if the conditions are right
             if (
                 len(self.screen_stack) > 1
@@ -465,9 +589,13 @@ class DolphieApp(App):
             try:
                 loading_indicator = self.app.query_one("LoadingIndicator")
                 if loading_indicator.display:
+                    if dolphie.time_to_first_frame is None:
+                        dolphie.time_to_first_frame = time.perf_counter() - dolphie.startup_time
+
                     loading_indicator.display = False
                     self.app.query_one("#main_container").display = True
-                    self.layout_graphs()
+                    if self.graphs_panel_created:
+                        self.layout_graphs()
 
                     # Update our header with host information
                     self.app.query_one("#topbar_host").update(f"{dolphie.mysql_host}:{dolphie.port}")
@@ -491,21 +619,21 @@ class DolphieApp(App):
                 if dolphie.display_replication_panel:
                     self.refresh_panel("replication")
 
-                if dolphie.display_graphs_panel:
-                    # Hide/show replication tab based on replication status
-                    replication_tab = self.app.query_one("#tabbed_content", TabbedContent)
-                    if dolphie.replication_status:
-                        replication_tab.show_tab("tab_replication_lag")
-                    else:
-                        replication_tab.hide_tab("tab_replication_lag")
-
-                    # Refresh the graph(s) for the selected tab
-                    metric_instance_name = replication_tab.active.split("tab_")[1]
-                    self.update_graphs(metric_instance_name)
-
-                # We take a snapshot of the processlist to be used for commands
-                # since the data can change after a key is pressed
-                dolphie.processlist_threads_snapshot = dolphie.processlist_threads.copy()
+                if dolphie.display_locks_panel:
+                    self.refresh_panel("locks")
+
+                if dolphie.display_transactions_panel:
+                    self.refresh_panel("transactions")
+
+                if dolphie.display_graphs_panel and self.graphs_panel_created:
+                    self.update_graphs_panel()
+
+                self.notify_anomalies()
+
+                # We take a snapshot of the processlist to be used for commands since the data can change after a
+                # key is pressed. Each refresh builds a new dict and its records are never changed, so holding on
+                # to this one is enough without copying it
+                dolphie.processlist_threads_snapshot = dolphie.processlist_threads
             except NoMatches:
                 # This is thrown if a user toggles panels on and off and the display_* states aren't 1:1
                 # with worker thread/state change due to asynchronous nature of the worker thread
@@ -522,8 +650,6 @@ class DolphieApp(App):
     def on_mount(self):
         dolphie = self.dolphie
 
-        dolphie.load_host_cache_file()
-
         # Set these components by default to not show
         components_to_disable = [
             ".panel_container",
@@ -546,13 +672,8 @@ class DolphieApp(App):
         else:
             dolphie.display_dashboard_panel = True
 
-        # Set default switches to be toggled on
-        switches = self.query(".switch_container Switch")
-        switches_to_toggle = [switch for switch in switches if switch.id not in ["Queries", "Threads_connected"]]
-        for switch in switches_to_toggle:
-            switch.toggle()
-
-        dolphie.check_for_update()
+        if dolphie.update_check:
+            threading.Thread(target=dolphie.check_for_update, daemon=True).start()
 
         self.worker_fetch_data()
 
@@ -589,13 +710,22 @@ class DolphieApp(App):
 
         self.update_graphs(metric_instance_name)
 
+    @on(Select.Changed, "#graph_window")
+    def graph_window_changed(self, event: Select.Changed):
+        for graph in self.query(MetricManager.Graph):
+            graph.window = event.value
+
+        if self.dolphie.display_graphs_panel:
+            tabbed_content = self.query_one("#tabbed_content", TabbedContent)
+            self.update_graphs(tabbed_content.active.split("tab_")[1])
+
     def generate_switches(self, metric_instance_name):
         metric_instance = getattr(self.dolphie.metric_manager.metrics, metric_instance_name)
 
         for metric, metric_data in metric_instance.__dict__.items():
             if isinstance(metric_data, MetricManager.MetricData) and metric_data.graphable:
                 yield Label(metric_data.label)
-                yield Switch(animate=False, id=metric, name=metric_instance_name)
+                yield Switch(animate=False, id=metric, name=metric_instance_name, value=metric_data.visible)
 
     def update_graphs(self, tab_metric_instance_name):
         for metric_instance in self.dolphie.metric_manager.metrics.__dict__.values():
@@ -606,17 +736,83 @@ class DolphieApp(App):
         self.update_stats_label(tab_metric_instance_name)
 
     def update_stats_label(self, tab_metric_instance_name):
-        stat_data = {}
+        table = Table(box=None, header_style="bold #bbc8e8", pad_edge=False, padding=(0, 2))
+        for column in ["", "Now", "EWMA", "Std Dev", "p50", "p95", "p99"]:
+            table.add_column(column, justify="right")
 
         for metric_instance in self.dolphie.metric_manager.metrics.__dict__.values():
             if hasattr(metric_instance, "tab_name") and metric_instance.tab_name == tab_metric_instance_name:
                 number_format_func = MetricManager.get_number_format_function(metric_instance, color=True)
                 for metric_data in metric_instance.__dict__.values():
-                    if isinstance(metric_data, MetricManager.MetricData) and metric_data.values and metric_data.visible:
-                        stat_data[metric_data.label] = number_format_func(metric_data.values[-1])
+                    if not isinstance(metric_data, MetricManager.MetricData) or not metric_data.visible:
+                        continue
+
+                    latest_value = metric_data.latest
+                    if latest_value is None:
+                        continue
+
+                    statistics = metric_data.statistics
+                    label = f"[b #bbc8e8]{metric_data.label}"
+                    if statistics.anomaly is not None:
+                        label = f"[b white on #b30000] {metric_data.label} {statistics.anomaly:+.1f}σ "
+
+                    table.add_row(
+                        label,
+                        number_format_func(latest_value),
+                        *[
+                            number_format_func(value) if value is not None else "N/A"
+                            for value in [statistics.ewma, statistics.stddev] + statistics.get_percentiles()
+                        ],
+                    )
+
+        stats = self.query_one(f"#stats_{tab_metric_instance_name}")
+        stats.update(Align.center(table) if table.row_count else "")
+
+    def notify_anomalies(self):
+        anomalies = self.dolphie.metric_manager.new_anomalies
+        if not anomalies:
+            return
 
-        formatted_stat_data = "  ".join(f"[b #bbc8e8]{label}[/b #bbc8e8] {value}" for label, value in stat_data.items())
-        self.query_one(f"#stats_{tab_metric_instance_name}").update(formatted_stat_data)
+        # Only the worst one fits in the footer, the rest are highlighted in their graph's stats
+        metric_data = max(anomalies, key=lambda metric_data: abs(metric_data.statistics.anomaly))
+        statistics = metric_data.statistics
+        direction = "above" if statistics.anomaly > 0 else "below"
+
+        message = (
+            f"[b #fc7979]Anomaly[/b #fc7979]: [b]{metric_data.name}[/b] is {abs(statistics.anomaly):.1f}σ {direction}"
+            f" its baseline of {format_number(statistics.ewma)}"
+        )
+        if len(anomalies) > 1:
+            message += f" ({len(anomalies) - 1} more metric(s) also went abnormal)"
+
+        self.dolphie.update_footer(message)
+
+    def show_reconnecting(self):
+        dolphie = self.dolphie
+
+        host = f"{dolphie.mysql_host}:{dolphie.port}"
+        self.query_one("#topbar_host", Label).update(f"[#fc7979]reconnecting[/#fc7979] {host}")
+
+        downtime = str(datetime.now() - dolphie.disconnected_time).split(".")[0]
+        dolphie.update_footer(
+            f"[b #fc7979]Lost connection[/b #fc7979] to [b]{dolphie.host}:{dolphie.port}[/b] {downtime} ago"
+            f" ({dolphie.disconnected_reason}). Attempt [b]{dolphie.reconnect_attempts}[/b] failed, trying again"
+            f" in {dolphie.reconnect_delay:.0f}s",
+            temporary=False,
+        )
+
+    def connection_restored(self):
+        dolphie = self.dolphie
+
+        downtime = str(datetime.now() - dolphie.disconnected_time).split(".")[0]
+        dolphie.disconnected_time = None
+        dolphie.disconnected_reason = None
+        dolphie.reconnect_attempts = 0
+
+        self.query_one("#topbar_host", Label).update(f"{dolphie.mysql_host}:{dolphie.port}")
+        dolphie.update_footer(
+            f"[b #54efae]Reconnected[/b #54efae] to [b]{dolphie.host}:{dolphie.port}[/b] after {downtime}"
+        )
 
     def refresh_panel(self, panel_name, toggled=False):
         # If loading indicator is displaying, don't refresh
@@ -635,16 +831,43 @@ class DolphieApp(App):
             self.query_one("#panel_dashboard_data", Static).update(dashboard_panel.create_panel(self.dolphie))
         elif panel_name == "processlist":
             processlist_panel.create_panel(self.dolphie)
+        elif panel_name == "locks":
+            self.query_one("#panel_locks_data", Static).update(locks_panel.create_panel(self.dolphie))
+        elif panel_name == "transactions":
+            self.query_one("#panel_transactions_data", Static).update(transactions_panel.create_panel(self.dolphie))
 
     def quick_host_switch(self):
         dolphie = self.dolphie
 
-        dolphie.main_db_connection.connection.close()
-        dolphie.secondary_db_connection.connection.close()
+        dolphie.main_db_connection.close()
+        dolphie.secondary_db_connection.close()
+
+        # Failing to connect to the new host should end the session like it does on startup rather than retrying
+        dolphie.collection_plan = None
+        dolphie.disconnected_time = None
+        dolphie.reconnect_attempts = 0
 
         dolphie.replication_status = {}
         dolphie.replica_data = {}
         dolphie.replica_tables = {}
+        dolphie.lock_chains = []
+        dolphie.transactions = []
+        dolphie.transactions_count = 0
+        dolphie.transaction_undo_cache = {}
+        dolphie.previous_history_list_length = None
+        dolphie.transactions_sampled_at = None
+        dolphie.history_list_length_per_sec = 0
+        dolphie.processlist_history = None
+        dolphie.thread_query_cache = {}
+
+        # Anything captured from the previous host since it was flushed to switch is saved before starting over.
+        # If that fails they're kept, along with what's captured from the new host, and written with their own host
+        if dolphie.slow_query_capture:
+            flushed, message = dolphie.flush_slow_queries()
+            if flushed:
+                dolphie.slow_query_capture = None
+            else:
+                self.call_from_thread(dolphie.update_footer, message)
 
         if dolphie.replica_connections:
             for connection in dolphie.replica_connections.values():
@@ -652,6 +875,7 @@ class DolphieApp(App):
 
             dolphie.replica_connections = {}
 
+        dolphie.metric_manager.close_history()
         dolphie.metric_manager.reset()
         dolphie.dolphie_start_time = datetime.now()
 
@@ -669,7 +893,7 @@ class DolphieApp(App):
         dolphie.quick_switched_connection = False
 
     def layout_graphs(self):
-        if self.dolphie.is_mysql_version_at_least("8.0.30"):
+        if self.dolphie.collection_plan.active_redo_logs:
             self.query_one("#graph_redo_log").styles.width = "55%"
             self.query_one("#graph_redo_log_bar").styles.width = "12%"
             self.query_one("#graph_redo_log_active_count").styles.width = "33%"
@@ -683,6 +907,91 @@ class DolphieApp(App):
         self.query_one("#graph_adaptive_hash_index").styles.width = "50%"
         self.query_one("#graph_adaptive_hash_index_hit_ratio").styles.width = "50%"
 
+    def create_graphs_panel(self):
+        Graph = MetricManager.Graph
+
+        def graph_tab(title, metric_instance_name, *graphs, switches=True):
+            widgets = [Label(id=f"stats_{metric_instance_name}", classes="stats_data")]
+            widgets.append(graphs[0] if len(graphs) == 1 else Horizontal(*graphs))
+            if switches:
+                widgets.append(Horizontal(*self.generate_switches(metric_instance_name), classes="switch_container"))
+
+            return TabPane(title, *widgets, id=f"tab_{metric_instance_name}")
+
+        tabbed_content = TabbedContent(initial="tab_dml", id="tabbed_content")
+        for tab_pane in [
+            graph_tab("DML", "dml", Graph(id="graph_dml", classes="panel_data")),
+            graph_tab("Table Cache", "table_cache", Graph(id="graph_table_cache", classes="panel_data")),
+            graph_tab("Threads", "threads", Graph(id="graph_threads", classes="panel_data")),
+            graph_tab(
+                "BP Requests", "buffer_pool_requests", Graph(id="graph_buffer_pool_requests", classes="panel_data")
+            ),
+            graph_tab("Checkpoint", "checkpoint", Graph(id="graph_checkpoint", classes="panel_data"), switches=False),
+            graph_tab(
+                "Redo Log",
+                "redo_log",
+                Graph(id="graph_redo_log", classes="panel_data"),
+                Graph(id="graph_redo_log_active_count", classes="panel_data"),
+                Graph(bar=True, id="graph_redo_log_bar", classes="panel_data"),
+                switches=False,
+            ),
+            graph_tab(
+                "AHI",
+                "adaptive_hash_index",
+                Graph(id="graph_adaptive_hash_index", classes="panel_data"),
+                Graph(id="graph_adaptive_hash_index_hit_ratio", classes="panel_data"),
+            ),
+            graph_tab("Temp Objects", "temporary_objects", Graph(id="graph_temporary_objects", classes="panel_data")),
+            graph_tab(
+                "Aborted Connections",
+                "aborted_connections",
+                Graph(id="graph_aborted_connections", classes="panel_data"),
+            ),
+            graph_tab("InnoDB Activity", "innodb_activity", Graph(id="graph_innodb_activity", classes="panel_data")),
+            graph_tab(
+                "Replication",
+                "replication_lag",
+                Graph(id="graph_replication_lag", classes="panel_data"),
+                switches=False,
+            ),
+        ]:
+            tabbed_content.compose_add_child(tab_pane)
+
+        graph_window = Horizontal(
+            Label("Window"),
+            Select(
+                MetricManager.GRAPH_WINDOWS,
+                allow_blank=False,
+                value=MetricManager.DEFAULT_GRAPH_WINDOW,
+                id="graph_window",
+            ),
+            classes="switch_container",
+            id="graph_window_container",
+        )
+
+        return [tabbed_content, graph_window]
+
+    async def show_graphs_panel(self):
+        if not self.graphs_panel_created:
+            await self.query_one("#panel_graphs", Container).mount_all(self.create_graphs_panel())
+            self.graphs_panel_created = True
+
+            if self.dolphie.collection_plan:
+                self.layout_graphs()
+
+        self.update_graphs_panel()
+
+    def update_graphs_panel(self):
+        # Hide/show replication tab based on replication status
+        tabbed_content = self.query_one("#tabbed_content", TabbedContent)
+        if self.dolphie.replication_status:
+            tabbed_content.show_tab("tab_replication_lag")
+        else:
+            tabbed_content.hide_tab("tab_replication_lag")
+
+        # Refresh the graph(s) for the selected tab
+        self.update_graphs(tabbed_content.active.split("tab_")[1])
+
     def compose(self) -> ComposeResult:
         yield TopBar(host="Connecting to MySQL", app_version=self.dolphie.app_version, help="press [b]?[/b] for help")
 
@@ -692,74 +1001,18 @@ class DolphieApp(App):
                 yield Static(id="panel_dashboard_data", classes="panel_data")
                 yield Sparkline([], id="panel_dashboard_queries_qps")
 
-            with Container(id="panel_graphs", classes="panel_container"):
-                with TabbedContent(initial="tab_dml", id="tabbed_content"):
-                    with TabPane("DML", id="tab_dml"):
-                        yield Label(id="stats_dml", classes="stats_data")
-                        yield MetricManager.Graph(id="graph_dml", classes="panel_data")
-
-                        with Horizontal(classes="switch_container"):
-                            yield from self.generate_switches("dml")
-
-                    with TabPane("Table Cache", id="tab_table_cache"):
-                        yield Label(id="stats_table_cache", classes="stats_data")
-                        yield MetricManager.Graph(id="graph_table_cache", classes="panel_data")
-
-                        with Horizontal(classes="switch_container"):
-                            yield from self.generate_switches("table_cache")
-
-                    with TabPane("Threads", id="tab_threads"):
-                        yield Label(id="stats_threads", classes="stats_data")
-                        yield MetricManager.Graph(id="graph_threads", classes="panel_data")
-
-                        with Horizontal(classes="switch_container"):
-                            yield from self.generate_switches("threads")
-
-                    with TabPane("BP Requests", id="tab_buffer_pool_requests"):
-                        yield Label(id="stats_buffer_pool_requests", classes="stats_data")
-                        yield MetricManager.Graph(id="graph_buffer_pool_requests", classes="panel_data")
-
-                        with Horizontal(classes="switch_container"):
-                            yield from self.generate_switches("buffer_pool_requests")
-                    with TabPane("Checkpoint", id="tab_checkpoint"):
-                        yield Label(id="stats_checkpoint", classes="stats_data")
-                        yield MetricManager.Graph(id="graph_checkpoint", classes="panel_data")
-
-                    with TabPane("Redo Log", id="tab_redo_log"):
-                        yield Label(id="stats_redo_log", classes="stats_data")
-                        with Horizontal():
-                            yield MetricManager.Graph(id="graph_redo_log", classes="panel_data")
-                            yield MetricManager.Graph(id="graph_redo_log_active_count", classes="panel_data")
-                            yield MetricManager.Graph(bar=True, id="graph_redo_log_bar", classes="panel_data")
-
-                    with TabPane("AHI", id="tab_adaptive_hash_index"):
-                        yield Label(id="stats_adaptive_hash_index", classes="stats_data")
-                        with Horizontal():
-                            yield MetricManager.Graph(id="graph_adaptive_hash_index", classes="panel_data")
-                            yield MetricManager.Graph(id="graph_adaptive_hash_index_hit_ratio", classes="panel_data")
-
-                        with Horizontal(classes="switch_container"):
-                            yield from self.generate_switches("adaptive_hash_index")
-
-                    with TabPane("Temp Objects", id="tab_temporary_objects"):
-                        yield Label(id="stats_temporary_objects", classes="stats_data")
-                        yield MetricManager.Graph(id="graph_temporary_objects", classes="panel_data")
-                        with Horizontal(classes="switch_container"):
-                            yield from self.generate_switches("temporary_objects")
-
-                    with TabPane("Aborted Connections", id="tab_aborted_connections"):
-                        yield Label(id="stats_aborted_connections", classes="stats_data")
-                        yield MetricManager.Graph(id="graph_aborted_connections", classes="panel_data")
-                        with Horizontal(classes="switch_container"):
-                            yield from self.generate_switches("aborted_connections")
-
-                    with TabPane("Replication", id="tab_replication_lag"):
-                        yield Label(id="stats_replication_lag", classes="stats_data")
-                        yield MetricManager.Graph(id="graph_replication_lag", classes="panel_data")
+            # The graphs are only created the first time the panel is shown since most sessions never show it
+            yield Container(id="panel_graphs", classes="panel_container")
 
             with VerticalScroll(id="panel_replication", classes="panel_container"):
                 yield Static(id="panel_replication_data", classes="panel_data")
 
+            with VerticalScroll(id="panel_locks", classes="panel_container"):
+                yield Static(id="panel_locks_data", classes="panel_data")
+
+            with VerticalScroll(id="panel_transactions", classes="panel_container"):
+                yield Static(id="panel_transactions_data", classes="panel_data")
+
             yield DataTable(id="panel_processlist", classes="panel_data", show_cursor=False)
 
             yield Static(id="footer")